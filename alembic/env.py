@@ -12,7 +12,7 @@ from app.core.config import settings
 
 # モデルをインポート（これにより、モデルがBaseのメタデータに登録されます）
 # 重要: すべてのモデルをインポートしてください
-from app.models import user, item
+from app.models import user, item, token_revocation
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
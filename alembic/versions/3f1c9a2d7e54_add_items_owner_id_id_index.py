@@ -0,0 +1,29 @@
+"""Add composite index for keyset pagination of items by owner
+
+Revision ID: 3f1c9a2d7e54
+Revises: 8b76e441ab8b
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f1c9a2d7e54"
+down_revision: Union[str, None] = "8b76e441ab8b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("items", schema=None) as batch_op:
+        batch_op.create_index("ix_items_owner_id_id", ["owner_id", "id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("items", schema=None) as batch_op:
+        batch_op.drop_index("ix_items_owner_id_id")
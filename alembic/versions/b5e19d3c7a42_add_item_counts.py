@@ -0,0 +1,40 @@
+"""Add item_counts table with per-owner item counts
+
+Revision ID: b5e19d3c7a42
+Revises: e8a3f5c1b207
+Create Date: 2026-10-18 21:04:37.185620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5e19d3c7a42"
+down_revision: Union[str, None] = "e8a3f5c1b207"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "item_counts",
+        sa.Column("owner_id", sa.UUID(), nullable=False),
+        sa.Column("item_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+    # 既存のアイテムを数えて初期値にする
+    op.execute(
+        "INSERT INTO item_counts (owner_id, item_count) "
+        "SELECT owner_id, count(*) FROM items "
+        "WHERE owner_id IS NOT NULL GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("item_counts")
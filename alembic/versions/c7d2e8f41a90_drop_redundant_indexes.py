@@ -0,0 +1,42 @@
+"""Drop redundant indexes on primary keys and unbounded text columns
+
+Revision ID: c7d2e8f41a90
+Revises: 3f1c9a2d7e54
+Create Date: 2026-10-18 13:40:22.871064
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e8f41a90"
+down_revision: Union[str, None] = "3f1c9a2d7e54"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ix_items_id / ix_users_id は主キーのインデックスと重複している。
+    # description / full_name は検索に使われておらず、書き込みのたびに長い値を索引するだけになっている。
+    # owner_id での検索は 3f1c9a2d7e54 の (owner_id, id) 複合インデックスで賄う
+    with op.batch_alter_table("items", schema=None) as batch_op:
+        batch_op.drop_index("ix_items_description")
+        batch_op.drop_index("ix_items_id")
+
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.drop_index("ix_users_full_name")
+        batch_op.drop_index("ix_users_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("users", schema=None) as batch_op:
+        batch_op.create_index("ix_users_id", ["id"], unique=False)
+        batch_op.create_index("ix_users_full_name", ["full_name"], unique=False)
+
+    with op.batch_alter_table("items", schema=None) as batch_op:
+        batch_op.create_index("ix_items_id", ["id"], unique=False)
+        batch_op.create_index("ix_items_description", ["description"], unique=False)
@@ -0,0 +1,74 @@
+"""Add full-text search over item title and description
+
+Revision ID: d41b7c9e2f63
+Revises: c7d2e8f41a90
+Create Date: 2026-10-18 15:02:57.316420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d41b7c9e2f63"
+down_revision: Union[str, None] = "c7d2e8f41a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLiteではFTS5の仮想テーブルとトリガーで代替する
+        op.execute(
+            "CREATE VIRTUAL TABLE items_fts USING fts5("
+            "title, description, content='items', content_rowid='rowid')"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN "
+            "INSERT INTO items_fts(rowid, title, description) "
+            "VALUES (new.rowid, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN "
+            "INSERT INTO items_fts(items_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER items_fts_au AFTER UPDATE ON items BEGIN "
+            "INSERT INTO items_fts(items_fts, rowid, title, description) "
+            "VALUES ('delete', old.rowid, old.title, old.description); "
+            "INSERT INTO items_fts(rowid, title, description) "
+            "VALUES (new.rowid, new.title, new.description); END"
+        )
+        # 既存の行を索引に登録
+        op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+        return
+
+    # 生成列の追加は既存の全行を書き換えるため、大きなテーブルではメンテナンス時間中に実行すること
+    op.execute(
+        "ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('simple', "
+        "coalesce(title, '') || ' ' || coalesce(description, ''))) STORED"
+    )
+    op.create_index(
+        "ix_items_search_vector",
+        "items",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TRIGGER items_fts_au")
+        op.execute("DROP TRIGGER items_fts_ad")
+        op.execute("DROP TRIGGER items_fts_ai")
+        op.execute("DROP TABLE items_fts")
+        return
+
+    op.drop_index("ix_items_search_vector", table_name="items")
+    op.drop_column("items", "search_vector")
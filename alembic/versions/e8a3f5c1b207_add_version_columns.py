@@ -0,0 +1,54 @@
+"""Add version and updated_at columns to items and users
+
+Revision ID: e8a3f5c1b207
+Revises: d41b7c9e2f63
+Create Date: 2026-10-18 17:25:09.448213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8a3f5c1b207"
+down_revision: Union[str, None] = "d41b7c9e2f63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ("items", "users"):
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+        )
+        if op.get_bind().dialect.name == "sqlite":
+            # SQLiteは ADD COLUMN で CURRENT_TIMESTAMP を既定値にできないため、
+            # NULL許容のまま追加して既存の行を埋める（テスト用）
+            op.add_column(
+                table,
+                sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            )
+            op.execute(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP")
+        else:
+            op.add_column(
+                table,
+                sa.Column(
+                    "updated_at",
+                    sa.DateTime(timezone=True),
+                    server_default=sa.text("now()"),
+                    nullable=False,
+                ),
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # batch_alter_table はSQLiteでテーブルを作り直し、items の全文検索用トリガーが
+    # 消えてしまうため、ALTER TABLE ... DROP COLUMN（SQLite 3.35以降）で削除する
+    for table in ("users", "items"):
+        op.drop_column(table, "updated_at")
+        op.drop_column(table, "version")
@@ -0,0 +1,52 @@
+"""Add token_revocations table for revoked JWTs
+
+Revision ID: f2a7c4e9d135
+Revises: b5e19d3c7a42
+Create Date: 2026-10-18 23:12:08.447193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f2a7c4e9d135"
+down_revision: Union[str, None] = "b5e19d3c7a42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "token_revocations",
+        sa.Column("jti", sa.String(length=64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index(
+        op.f("ix_token_revocations_expires_at"),
+        "token_revocations",
+        ["expires_at"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_token_revocations_revoked_at"),
+        "token_revocations",
+        ["revoked_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_token_revocations_revoked_at"), table_name="token_revocations"
+    )
+    op.drop_index(
+        op.f("ix_token_revocations_expires_at"), table_name="token_revocations"
+    )
+    op.drop_table("token_revocations")
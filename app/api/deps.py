@@ -1,18 +1,20 @@
 import uuid
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
+from jose.exceptions import JWTError
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud
-from app.models.user import User
-from app.schemas.token import TokenPayload
 from app.core import security
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal, read_replicas
+from app.schemas.token import TokenPayload
+from app.services import read_your_writes, token_revocation
+from app.services.principal import Principal, cache_principal, get_cached_principal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -27,32 +29,105 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
+def get_read_db(request: Request, db: Session = Depends(get_db)) -> Generator:
+    """
+    読み取り専用のセッション。レプリカが設定されていればそのいずれかを使い、
+    レプリカがない・すべて外れている・直前に同じクライアントが書き込んだ場合
+    （app/middleware/read_your_writes.py）はプライマリ（`get_db` と同じセッション）を使う
+    """
+    replica = None
+    if read_replicas and not read_your_writes.reads_from_primary(request):
+        replica = read_replicas.checkout()
+    if replica is None:
+        yield db
+        return
+    replica_db = replica.session_factory()
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+        yield replica_db
+    finally:
+        replica_db.close()
+        read_replicas.release(replica)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _get_token_payload(token: str) -> TokenPayload:
+    """
+    アクセストークンを検証する。失効の確認はプロセス内の集合だけで行い、DBは参照しない
+    """
+    try:
+        token_data = security.decode_access_token(token)
+    except (JWTError, ValidationError):
+        token_data = None
+    if token_data is None or token_revocation.is_revoked(token_data.jti):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="認証情報を確認できませんでした",
         )
-    
+    return token_data
+
+
+def get_token_payload(token: str = Depends(reusable_oauth2)) -> TokenPayload:
+    return _get_token_payload(token)
+
+
+def _get_user_id_from_token(token: str) -> uuid.UUID:
+    """
+    JWTを検証し、subに含まれるユーザーIDを返す（同期・非同期の依存関係で共通）
+    """
+    token_data = _get_token_payload(token)
+
     # UUIDに変換
     try:
-        user_id = uuid.UUID(token_data.sub)
-    except ValueError:
+        return uuid.UUID(token_data.sub)
+    except (TypeError, ValueError):
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-        
+
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> Principal:
+    """
+    キャッシュにない場合はプライマリから読む。レプリカの遅延で、無効化・降格された
+    ユーザーの古い行をキャッシュしてしまわないようにするため
+    """
+    user_id = _get_user_id_from_token(token)
+    principal = get_cached_principal(user_id)
+    if principal:
+        return principal
     user = crud.user.get(db, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
-    return user
+    return cache_principal(user)
+
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if not crud.user.is_active(current_user):
         raise HTTPException(status_code=400, detail="非アクティブユーザー")
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(reusable_oauth2)
+) -> Principal:
+    user_id = _get_user_id_from_token(token)
+    principal = get_cached_principal(user_id)
+    if principal:
+        return principal
+    user = await crud.async_user.get(db, id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
+    return cache_principal(user)
+
+
+async def get_current_active_user_async(
+    current_user: Principal = Depends(get_current_user_async),
+) -> Principal:
+    if not crud.async_user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="非アクティブユーザー")
+    return current_user
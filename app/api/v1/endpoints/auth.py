@@ -1,21 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
+from jose.exceptions import JWTError
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.crud.crud_user import user as crud_user
 from app.core import security
 from app.schemas import token as schemas
+from app.schemas.token import TokenPayload
+from app.services import login_throttle, token_revocation
 
 router = APIRouter()
 
+
 @router.post("/login/access-token", response_model=schemas.Token)
 def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
 ):
     """
     OAuth2 compatible token login, get an access token for future requests
+
+    Attempts are throttled per email and per client IP (429 with Retry-After)
     """
+    login_throttle.check_login_attempt(
+        form_data.username, request.client.host if request.client else None
+    )
     user = crud_user.authenticate(
         db, email=form_data.username, password=form_data.password
     )
@@ -23,8 +38,64 @@ def login_access_token(
         raise HTTPException(status_code=400, detail="メールアドレスまたはパスワードが正しくありません")
     elif not crud_user.is_active(user):
         raise HTTPException(status_code=400, detail="非アクティブなユーザーです")
+    return _issue_tokens(user.id)
+
+
+def _issue_tokens(user_id: UUID) -> dict:
     return {
-        "access_token": security.create_access_token(user.id),
+        "access_token": security.create_access_token(user_id),
+        "refresh_token": security.create_refresh_token(user_id),
         "token_type": "bearer",
     }
 
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(status_code=403, detail="認証情報を確認できませんでした")
+
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(
+    body: schemas.RefreshTokenRequest,
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Exchange a refresh token for a new access token and refresh token
+
+    The refresh token is single-use: it is revoked here, and presenting it again
+    is rejected (403)
+    """
+    try:
+        token_data = security.decode_refresh_token(body.refresh_token)
+        user_id = UUID(token_data.sub)
+    except (JWTError, ValidationError, TypeError, ValueError):
+        raise _invalid_refresh_token()
+    # 他のワーカーで使われた直後の可能性があるため、ここではDBで確かめる
+    # （同時に2回使われた場合も、失効の登録に成功した1回だけが通る）
+    if not token_revocation.revoke(db, token_data.jti, token_data.exp):
+        raise _invalid_refresh_token()
+    user = crud_user.get(db, id=user_id)
+    if not user or not crud_user.is_active(user):
+        raise _invalid_refresh_token()
+    return _issue_tokens(user.id)
+
+
+@router.post("/logout", status_code=204)
+def logout(
+    body: Optional[schemas.LogoutRequest] = None,
+    token_data: TokenPayload = Depends(deps.get_token_payload),
+    db: Session = Depends(deps.get_db),
+) -> Response:
+    """
+    Revoke the current access token and, if given, the refresh token
+    """
+    if token_data.jti is not None:
+        token_revocation.revoke(db, token_data.jti, token_data.exp)
+    if body is not None and body.refresh_token:
+        try:
+            refresh_data = security.decode_refresh_token(body.refresh_token)
+        except (JWTError, ValidationError):
+            raise _invalid_refresh_token()
+        if refresh_data.sub != token_data.sub:
+            raise _invalid_refresh_token()
+        token_revocation.revoke(db, refresh_data.jti, refresh_data.exp)
+    return Response(status_code=204)
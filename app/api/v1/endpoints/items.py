@@ -1,34 +1,181 @@
 from uuid import UUID
-from typing import Any, List
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.config import settings
+from app.core.exceptions import PreconditionFailedError
 from app.crud.crud_item import item as crud_item
-from app.models.user import User
-from app.schemas.item import Item, ItemCreate, ItemUpdate
+from app.services.item_export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    export_disposition,
+    iter_export,
+)
+from app.services.principal import Principal
+from app.schemas.item import (
+    Item,
+    ItemBulkDelete,
+    ItemBulkResult,
+    ItemBulkUpdate,
+    ItemCreate,
+    ItemImportResult,
+    ItemUpdate,
+)
+from app.services import item_import
+from app.utils.etag import (
+    ETAG_HEADER,
+    collection_etag,
+    etag_matches,
+    not_modified,
+    parse_if_match,
+    resource_etag,
+)
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    CountMode,
+    decode_id_cursor,
+    decode_rank_cursor,
+    next_id_cursor,
+    next_rank_cursor,
+)
+from app.utils.serialization import ListSerializer, list_response
 
 router = APIRouter()
 
+item_list_serializer = ListSerializer(Item)
+# 一括APIのレスポンスは件数が多いため、jsonable_encoderを通さずに直接JSONへ変換する
+bulk_results_serializer = ListSerializer(ItemBulkResult)
+
+
+def _check_bulk_size(count: int) -> None:
+    if count > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"一度に処理できるのは{settings.BULK_MAX_ITEMS}件までです",
+        )
+
+
+def _bulk_response(results: List[Dict[str, Any]]) -> Response:
+    return bulk_results_serializer.response(results)
+
+
+def _bulk_denied_status(
+    id: UUID, owners: Dict[UUID, UUID], owner_id: Optional[UUID]
+) -> Optional[str]:
+    """
+    一括操作で処理できない行の状態を返す（処理できる場合はNone）
+    """
+    if id not in owners:
+        return "not_found"
+    if owner_id is not None and owners[id] != owner_id:
+        return "forbidden"
+    return None
+
 
 @router.get("/", response_model=List[Item])
 def read_items(
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = None,
+    count: Optional[CountMode] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     アイテム一覧を取得
+
+    `cursor` を指定するとキーセットページングになる（`skip` は無視される）。
+    次ページがある場合は `X-Next-Cursor` ヘッダーでカーソルを返す。
+    `count` を指定すると、その方法で数えた総件数を `X-Total-Count` ヘッダーで返す。
+    `If-None-Match` がページのETagと一致すれば、(id, version) だけを読んで304を返す
     """
-    if crud_item.is_superuser(current_user):
-        items = crud_item.get_multi(db, skip=skip, limit=limit)
+    after = decode_id_cursor(cursor) if cursor else None
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        versions = crud_item.get_multi_versions_by_owner(
+            db, owner_id=owner_id, skip=skip, limit=limit, after=after
+        )
+        etag = collection_etag(versions)
+        if etag_matches(if_none_match, etag):
+            headers = {}
+            next_cursor = next_id_cursor(versions, limit)
+            if next_cursor:
+                headers[NEXT_CURSOR_HEADER] = next_cursor
+            # 304でも200と同じく総件数を返す
+            if count:
+                total = crud_item.count_by_owner(db, owner_id=owner_id, mode=count)
+                headers[TOTAL_COUNT_HEADER] = str(total)
+            return not_modified(etag, headers)
+    if owner_id is None:
+        items = crud_item.get_multi(db, skip=skip, limit=limit, after=after)
     else:
         items = crud_item.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+            db=db, owner_id=owner_id, skip=skip, limit=limit, after=after
         )
-    return items
+    next_cursor = next_id_cursor(items, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if count:
+        total = crud_item.count_by_owner(db, owner_id=owner_id, mode=count)
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[ETAG_HEADER] = collection_etag(items)
+    return list_response(item_list_serializer, items, response)
+
+
+@router.get("/search", response_model=List[Item])
+def search_items(
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    タイトルと説明文の全文検索（関連度の高い順）
+
+    対象は read_items と同じ。次ページがある場合は `X-Next-Cursor` ヘッダーでカーソルを返す
+    """
+    after = decode_rank_cursor(cursor) if cursor else None
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    rows = crud_item.search(db, q=q, owner_id=owner_id, limit=limit, after=after)
+    next_cursor = next_rank_cursor(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return list_response(item_list_serializer, [item for item, _ in rows], response)
+
+
+@router.get("/export")
+def export_items(
+    db: Session = Depends(deps.get_read_db),
+    format: ExportFormat = "ndjson",
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    アイテムをNDJSONまたはCSVでストリーミング出力する
+
+    対象は read_items と同じ（スーパーユーザーは全件、それ以外は自分のアイテム）。
+    行はサーバーサイドカーソルで少しずつ取り出すため、件数が多くてもメモリ使用量は一定
+    """
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    partitions = crud_item.stream_for_export(
+        db, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    return StreamingResponse(
+        iter_export(partitions, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": export_disposition(format)},
+    )
 
 
 @router.post("/", response_model=Item)
@@ -36,7 +183,7 @@ def create_item(
     *,
     db: Session = Depends(deps.get_db),
     item_in: ItemCreate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     新規アイテムを作成
@@ -45,58 +192,218 @@ def create_item(
     return item
 
 
+@router.post("/bulk", response_model=List[ItemBulkResult])
+def create_items_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    items_in: List[ItemCreate],
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    アイテムを一括作成
+    """
+    _check_bulk_size(len(items_in))
+    items = crud_item.create_multi_with_owner(
+        db=db, objs_in=items_in, owner_id=current_user.id
+    )
+    return _bulk_response(
+        [{"id": item.id, "status": "created", "item": item} for item in items]
+    )
+
+
+@router.patch("/bulk", response_model=List[ItemBulkResult])
+def update_items_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    items_in: List[ItemBulkUpdate],
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    アイテムを一括更新（行ごとに結果を返す）
+    """
+    _check_bulk_size(len(items_in))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    owners = crud_item.get_owner_ids(db=db, ids=[item_in.id for item_in in items_in])
+    allowed = [
+        item_in
+        for item_in in items_in
+        if _bulk_denied_status(item_in.id, owners, owner_id) is None
+    ]
+    updated = {
+        item.id: item
+        for item in crud_item.update_multi_by_owner(
+            db=db, objs_in=allowed, owner_id=owner_id
+        )
+    }
+    results = []
+    for item_in in items_in:
+        status = _bulk_denied_status(item_in.id, owners, owner_id)
+        if status is None and item_in.id not in updated:
+            status = "not_found"
+        results.append(
+            {
+                "id": item_in.id,
+                "status": status or "updated",
+                "item": updated.get(item_in.id),
+            }
+        )
+    return _bulk_response(results)
+
+
+@router.delete("/bulk", response_model=List[ItemBulkResult])
+def delete_items_bulk(
+    *,
+    db: Session = Depends(deps.get_db),
+    items_in: ItemBulkDelete,
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    アイテムを一括削除（行ごとに結果を返す）
+    """
+    _check_bulk_size(len(items_in.ids))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    owners = crud_item.get_owner_ids(db=db, ids=items_in.ids)
+    allowed = [
+        id for id in items_in.ids if _bulk_denied_status(id, owners, owner_id) is None
+    ]
+    deleted = set(
+        crud_item.remove_multi_by_owner(db=db, ids=allowed, owner_id=owner_id)
+    )
+    results = []
+    for id in items_in.ids:
+        status = _bulk_denied_status(id, owners, owner_id)
+        if status is None and id not in deleted:
+            status = "not_found"
+        results.append({"id": id, "status": status or "deleted"})
+    return _bulk_response(results)
+
+
+def _iter_request_body(stream: AsyncIterator[bytes]) -> Iterator[bytes]:
+    """
+    リクエストボディの非同期ストリームを、ワーカースレッドから同期的に読めるようにする
+    """
+    while True:
+        try:
+            yield anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+@router.post("/import", response_model=ItemImportResult)
+async def import_items(
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    format: item_import.ImportFormat = "ndjson",
+    current_user: Principal = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    NDJSONまたはCSV（1行目はヘッダー）のリクエストボディからアイテムを一括登録する
+
+    ボディは受信しながら少しずつ検証・書き込みするため、全体をメモリに読み込まない。
+    検証に失敗した行は取り込まず、行番号とエラーを結果に含める
+    """
+    return await run_in_threadpool(
+        item_import.import_items,
+        db,
+        _iter_request_body(request.stream()),
+        format=format,
+        owner_id=current_user.id,
+        batch_size=settings.IMPORT_BATCH_SIZE,
+        max_errors=settings.IMPORT_MAX_ERRORS,
+    )
+
+
 @router.get("/{id}", response_model=Item)
 def read_item(
     *,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
     id: UUID,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     特定のアイテムを取得
+
+    `If-None-Match` が現在のETagと一致すれば、所有者とバージョンだけを読んで304を返す
     """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        row = crud_item.get_owner_and_version(db=db, id=id)
+        _check_owner(row and row.owner_id, current_user)
+        etag = resource_etag(row.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
     item = crud_item.get(db=db, id=id)
-    if not item:
-        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
-    if not crud_item.is_superuser(current_user) and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="権限がありません")
+    _check_owner(item and item.owner_id, current_user)
+    response.headers[ETAG_HEADER] = resource_etag(item.version)
     return item
 
 
+def _check_owner(owner_id: Optional[UUID], current_user: Principal) -> None:
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
+    if not crud_item.is_superuser(current_user) and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="権限がありません")
+
+
+def _raise_update_failed(db: Session, id: UUID, owner_id: Optional[UUID]) -> None:
+    """
+    条件付きの更新・削除が0行だったときに、404・403・412を区別して返す
+    （失敗した場合だけ所有者とバージョンを確認するため、成功時のクエリは増えない）
+    """
+    row = crud_item.get_owner_and_version(db=db, id=id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
+    if owner_id is not None and row.owner_id != owner_id:
+        raise HTTPException(status_code=403, detail="権限がありません")
+    raise PreconditionFailedError(detail="アイテムが更新されています")
+
+
 @router.put("/{id}", response_model=Item)
 def update_item(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     id: UUID,
     item_in: ItemUpdate,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     アイテムを更新
+
+    `If-Match` を指定すると、ETagが一致する場合だけ更新する（一致しなければ412）
     """
-    item = crud_item.get(db=db, id=id)
+    version = parse_if_match(request.headers.get("if-match"))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    item = crud_item.update_by_owner(
+        db=db, id=id, obj_in=item_in, owner_id=owner_id, version=version
+    )
     if not item:
-        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
-    if not crud_item.is_superuser(current_user) and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="権限がありません")
-    item = crud_item.update(db=db, db_obj=item, obj_in=item_in)
+        _raise_update_failed(db, id, owner_id)
+    response.headers[ETAG_HEADER] = resource_etag(item.version)
     return item
 
 
 @router.delete("/{id}", response_model=Item)
 def delete_item(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     id: UUID,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: Principal = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     アイテムを削除
+
+    `If-Match` を指定すると、ETagが一致する場合だけ削除する（一致しなければ412）
     """
-    item = crud_item.get(db=db, id=id)
+    version = parse_if_match(request.headers.get("if-match"))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    item = crud_item.remove_by_owner(
+        db=db, id=id, owner_id=owner_id, version=version
+    )
     if not item:
-        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
-    if not crud_item.is_superuser(current_user) and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="権限がありません")
-    item = crud_item.remove(db=db, id=id)
+        _raise_update_failed(db, id, owner_id)
     return item
@@ -1,26 +1,81 @@
+from typing import Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.exceptions import PreconditionFailedError
 from app.crud.crud_user import user as crud_user
 from app.schemas.user import User, UserCreate, UserUpdate
+from app.utils.etag import (
+    ETAG_HEADER,
+    collection_etag,
+    etag_matches,
+    not_modified,
+    parse_if_match,
+    resource_etag,
+)
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_id_cursor,
+    next_id_cursor,
+)
+from app.utils.serialization import ListSerializer, list_response
 
 router = APIRouter()
 
+user_list_serializer = ListSerializer(User)
+
+
+def _count_users(db: Session, count: str) -> int:
+    if count == "estimated":
+        return crud_user.estimate_count(db)
+    return crud_user.count(db)
+
 
 @router.get("/", response_model=list[User])
 def read_users(
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Optional[Literal["exact", "estimated"]] = None,
 ):
     """
     全ユーザーの取得
+
+    `cursor` を指定するとキーセットページングになる（`skip` は無視される）。
+    `count` を指定すると、その方法で数えた総件数を `X-Total-Count` ヘッダーで返す。
+    `If-None-Match` がページのETagと一致すれば、(id, version) だけを読んで304を返す
     """
-    users = crud_user.get_multi(db, skip=skip, limit=limit)
-    return users
+    after = decode_id_cursor(cursor) if cursor else None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        versions = crud_user.get_multi_versions(
+            db, skip=skip, limit=limit, after=after
+        )
+        etag = collection_etag(versions)
+        if etag_matches(if_none_match, etag):
+            headers = {}
+            next_cursor = next_id_cursor(versions, limit)
+            if next_cursor:
+                headers[NEXT_CURSOR_HEADER] = next_cursor
+            # 304でも200と同じく総件数を返す
+            if count:
+                headers[TOTAL_COUNT_HEADER] = str(_count_users(db, count))
+            return not_modified(etag, headers)
+    users = crud_user.get_multi(db, skip=skip, limit=limit, after=after)
+    next_cursor = next_id_cursor(users, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if count:
+        response.headers[TOTAL_COUNT_HEADER] = str(_count_users(db, count))
+    response.headers[ETAG_HEADER] = collection_etag(users)
+    return list_response(user_list_serializer, users, response)
 
 
 @router.post("/", response_model=User)
@@ -45,55 +100,76 @@ def create_user(
 @router.get("/{user_id}", response_model=User)
 def read_user(
     *,
-    db: Session = Depends(deps.get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_read_db),
     user_id: UUID,
 ):
     """
     特定ユーザーの取得
     """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = crud_user.get_version(db, id=user_id)
+        if version is not None and etag_matches(if_none_match, resource_etag(version)):
+            return not_modified(resource_etag(version))
     user = crud_user.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="このユーザーは存在しません。",
         )
+    response.headers[ETAG_HEADER] = resource_etag(user.version)
     return user
 
 
 @router.put("/{user_id}", response_model=User)
 def update_user(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     user_id: UUID,
     user_in: UserUpdate,
 ):
     """
     ユーザー情報の更新
+
+    `If-Match` を指定すると、ETagが一致する場合だけ更新する（一致しなければ412）
     """
+    version = parse_if_match(request.headers.get("if-match"))
     user = crud_user.get(db, id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="このユーザーは存在しません。",
         )
-    user = crud_user.update(db, db_obj=user, obj_in=user_in)
+    user = crud_user.update(db, db_obj=user, obj_in=user_in, version=version)
+    if not user:
+        raise PreconditionFailedError(detail="ユーザー情報が更新されています。")
+    response.headers[ETAG_HEADER] = resource_etag(user.version)
     return user
 
 
 @router.delete("/{user_id}", response_model=User)
 def delete_user(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     user_id: UUID,
 ):
     """
     ユーザーの削除
+
+    `If-Match` を指定すると、ETagが一致する場合だけ削除する（一致しなければ412）
     """
-    user = crud_user.get(db, id=user_id)
+    version = parse_if_match(request.headers.get("if-match"))
+    user = crud_user.remove(db, id=user_id, version=version)
     if not user:
+        if version is not None and crud_user.get_version(db, id=user_id):
+            raise PreconditionFailedError(detail="ユーザー情報が更新されています。")
         raise HTTPException(
             status_code=404,
             detail="このユーザーは存在しません。",
         )
-    user = crud_user.remove(db, id=user_id)
     return user
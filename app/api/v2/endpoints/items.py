@@ -0,0 +1,231 @@
+from uuid import UUID
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.core.exceptions import PreconditionFailedError
+from app.crud.crud_item import async_item as crud_item
+from app.services.item_export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    aiter_export,
+    export_disposition,
+)
+from app.services.principal import Principal
+from app.schemas.item import Item, ItemCreate, ItemUpdate
+from app.utils.etag import (
+    ETAG_HEADER,
+    collection_etag,
+    etag_matches,
+    not_modified,
+    parse_if_match,
+    resource_etag,
+)
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_id_cursor,
+    decode_rank_cursor,
+    next_id_cursor,
+    next_rank_cursor,
+)
+from app.utils.serialization import ListSerializer, list_response
+
+router = APIRouter()
+
+item_list_serializer = ListSerializer(Item)
+
+
+@router.get("/", response_model=List[Item])
+async def read_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    アイテム一覧を取得
+
+    `If-None-Match` がページのETagと一致すれば304を返す
+    """
+    after = decode_id_cursor(cursor) if cursor else None
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        versions = await crud_item.get_multi_versions_by_owner(
+            db, owner_id=owner_id, skip=skip, limit=limit, after=after
+        )
+        etag = collection_etag(versions)
+        if etag_matches(if_none_match, etag):
+            next_cursor = next_id_cursor(versions, limit)
+            return not_modified(
+                etag, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+            )
+    if owner_id is None:
+        items = await crud_item.get_multi(db, skip=skip, limit=limit, after=after)
+    else:
+        items = await crud_item.get_multi_by_owner(
+            db=db, owner_id=owner_id, skip=skip, limit=limit, after=after
+        )
+    next_cursor = next_id_cursor(items, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    response.headers[ETAG_HEADER] = collection_etag(items)
+    return list_response(item_list_serializer, items, response)
+
+
+@router.get("/search", response_model=List[Item])
+async def search_items(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    タイトルと説明文の全文検索（関連度の高い順）
+    """
+    after = decode_rank_cursor(cursor) if cursor else None
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    rows = await crud_item.search(db, q=q, owner_id=owner_id, limit=limit, after=after)
+    next_cursor = next_rank_cursor(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return list_response(item_list_serializer, [item for item, _ in rows], response)
+
+
+@router.get("/export")
+async def export_items(
+    db: AsyncSession = Depends(deps.get_async_db),
+    format: ExportFormat = "ndjson",
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    アイテムをNDJSONまたはCSVでストリーミング出力する
+    """
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    partitions = crud_item.stream_for_export(
+        db, owner_id=owner_id, batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    return StreamingResponse(
+        aiter_export(partitions, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": export_disposition(format)},
+    )
+
+
+@router.post("/", response_model=Item)
+async def create_item(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    item_in: ItemCreate,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    新規アイテムを作成
+    """
+    item = await crud_item.create_with_owner(
+        db=db, obj_in=item_in, owner_id=current_user.id
+    )
+    return item
+
+
+@router.get("/{id}", response_model=Item)
+async def read_item(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    id: UUID,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    特定のアイテムを取得
+
+    `If-None-Match` が現在のETagと一致すれば304を返す
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        row = await crud_item.get_owner_and_version(db=db, id=id)
+        _check_owner(row and row.owner_id, current_user)
+        etag = resource_etag(row.version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    item = await crud_item.get(db=db, id=id)
+    _check_owner(item and item.owner_id, current_user)
+    response.headers[ETAG_HEADER] = resource_etag(item.version)
+    return item
+
+
+def _check_owner(owner_id: Optional[UUID], current_user: Principal) -> None:
+    if owner_id is None:
+        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
+    if not crud_item.is_superuser(current_user) and owner_id != current_user.id:
+        raise HTTPException(status_code=403, detail="権限がありません")
+
+
+async def _raise_update_failed(
+    db: AsyncSession, id: UUID, owner_id: Optional[UUID]
+) -> None:
+    row = await crud_item.get_owner_and_version(db=db, id=id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="アイテムが見つかりません")
+    if owner_id is not None and row.owner_id != owner_id:
+        raise HTTPException(status_code=403, detail="権限がありません")
+    raise PreconditionFailedError(detail="アイテムが更新されています")
+
+
+@router.put("/{id}", response_model=Item)
+async def update_item(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    id: UUID,
+    item_in: ItemUpdate,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    アイテムを更新
+
+    `If-Match` を指定すると、ETagが一致する場合だけ更新する（一致しなければ412）
+    """
+    version = parse_if_match(request.headers.get("if-match"))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    item = await crud_item.update_by_owner(
+        db=db, id=id, obj_in=item_in, owner_id=owner_id, version=version
+    )
+    if not item:
+        await _raise_update_failed(db, id, owner_id)
+    response.headers[ETAG_HEADER] = resource_etag(item.version)
+    return item
+
+
+@router.delete("/{id}", response_model=Item)
+async def delete_item(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    id: UUID,
+    current_user: Principal = Depends(deps.get_current_active_user_async),
+) -> Any:
+    """
+    アイテムを削除
+
+    `If-Match` を指定すると、ETagが一致する場合だけ削除する（一致しなければ412）
+    """
+    version = parse_if_match(request.headers.get("if-match"))
+    owner_id = None if crud_item.is_superuser(current_user) else current_user.id
+    item = await crud_item.remove_by_owner(
+        db=db, id=id, owner_id=owner_id, version=version
+    )
+    if not item:
+        await _raise_update_failed(db, id, owner_id)
+    return item
@@ -0,0 +1,153 @@
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.exceptions import PreconditionFailedError
+from app.crud.crud_user import async_user as crud_user
+from app.schemas.user import User, UserCreate, UserUpdate
+from app.utils.etag import (
+    ETAG_HEADER,
+    collection_etag,
+    etag_matches,
+    not_modified,
+    parse_if_match,
+    resource_etag,
+)
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_id_cursor, next_id_cursor
+from app.utils.serialization import ListSerializer, list_response
+
+router = APIRouter()
+
+user_list_serializer = ListSerializer(User)
+
+
+@router.get("/", response_model=list[User])
+async def read_users(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+):
+    """
+    全ユーザーの取得
+    """
+    after = decode_id_cursor(cursor) if cursor else None
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        versions = await crud_user.get_multi_versions(
+            db, skip=skip, limit=limit, after=after
+        )
+        etag = collection_etag(versions)
+        if etag_matches(if_none_match, etag):
+            next_cursor = next_id_cursor(versions, limit)
+            return not_modified(
+                etag, {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+            )
+    users = await crud_user.get_multi(db, skip=skip, limit=limit, after=after)
+    next_cursor = next_id_cursor(users, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    response.headers[ETAG_HEADER] = collection_etag(users)
+    return list_response(user_list_serializer, users, response)
+
+
+@router.post("/", response_model=User)
+async def create_user(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_in: UserCreate,
+):
+    """
+    新規ユーザーの作成
+    """
+    user = await crud_user.get_by_email(db, email=user_in.email)
+    if user:
+        raise HTTPException(
+            status_code=400,
+            detail="このメールアドレスは既に登録されています。",
+        )
+    user = await crud_user.create(db, obj_in=user_in)
+    return user
+
+
+@router.get("/{user_id}", response_model=User)
+async def read_user(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_id: UUID,
+):
+    """
+    特定ユーザーの取得
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        version = await crud_user.get_version(db, id=user_id)
+        if version is not None and etag_matches(if_none_match, resource_etag(version)):
+            return not_modified(resource_etag(version))
+    user = await crud_user.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="このユーザーは存在しません。",
+        )
+    response.headers[ETAG_HEADER] = resource_etag(user.version)
+    return user
+
+
+@router.put("/{user_id}", response_model=User)
+async def update_user(
+    *,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_id: UUID,
+    user_in: UserUpdate,
+):
+    """
+    ユーザー情報の更新
+
+    `If-Match` を指定すると、ETagが一致する場合だけ更新する（一致しなければ412）
+    """
+    version = parse_if_match(request.headers.get("if-match"))
+    user = await crud_user.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="このユーザーは存在しません。",
+        )
+    user = await crud_user.update(db, db_obj=user, obj_in=user_in, version=version)
+    if not user:
+        raise PreconditionFailedError(detail="ユーザー情報が更新されています。")
+    response.headers[ETAG_HEADER] = resource_etag(user.version)
+    return user
+
+
+@router.delete("/{user_id}", response_model=User)
+async def delete_user(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    user_id: UUID,
+):
+    """
+    ユーザーの削除
+
+    `If-Match` を指定すると、ETagが一致する場合だけ削除する（一致しなければ412）
+    """
+    version = parse_if_match(request.headers.get("if-match"))
+    user = await crud_user.remove(db, id=user_id, version=version)
+    if not user:
+        if version is not None and await crud_user.get_version(db, id=user_id):
+            raise PreconditionFailedError(detail="ユーザー情報が更新されています。")
+        raise HTTPException(
+            status_code=404,
+            detail="このユーザーは存在しません。",
+        )
+    return user
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+
+from app.api.v2.endpoints import items, users
+
+# v2はAsyncSession上で動作する非同期版のエンドポイント
+api_router = APIRouter()
+api_router.include_router(users.router, prefix="/users", tags=["users-v2"])
+api_router.include_router(items.router, prefix="/items", tags=["items-v2"])
@@ -1,6 +1,6 @@
 import os
 import secrets
-from typing import Any, Dict, List, Optional, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -8,14 +8,107 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
+    API_V2_STR: str = "/api/v2"
     SECRET_KEY: str = secrets.token_urlsafe(32)
     PROJECT_NAME: str = "FastAPI Template"
     PROJECT_DESCRIPTION: str = "A reusable FastAPI template"
     VERSION: str = "0.1.0"
+    # 開発用。有効にするとレスポンスヘッダーでSQL文の数とDBの処理時間を返す
+    DEBUG: bool = False
     
-    # 60分 * 24時間 * 8日 = 8日間
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # アクセストークンは短命にし、期限が切れたらリフレッシュトークンで取り直す
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # 失効したトークン（ログアウト、使用済みのリフレッシュトークン）。各ワーカーは
+    # この秒数ごとに token_revocations から新しく失効したものだけを読み込み、
+    # 認証ではプロセス内の集合（ブルームフィルター）だけで判定する。0で読み込まない
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5
+    # 集合のブルームフィルターの初期の大きさ（超えると自動で大きくする）
+    TOKEN_REVOCATION_CAPACITY: int = 100000
+
+    # JWTの署名方式。HS256は SECRET_KEY を共有する必要があるため、他のサービスで
+    # 検証する場合は RS256 / ES256 にし、/.well-known/jwks.json の公開鍵で検証させる
+    JWT_ALGORITHM: Literal["HS256", "RS256", "ES256"] = "HS256"
+    # 署名に使う秘密鍵（PEM）のファイル。RS256 / ES256 では必須
+    JWT_PRIVATE_KEY_FILE: Optional[str] = None
+    # 鍵の入れ替え後も、以前の鍵で署名されたトークンを検証するための公開鍵（PEM）の
+    # ファイル（JSON配列またはカンマ区切り）。トークンの期限が切れたら外してよい
+    JWT_PUBLIC_KEY_FILES: List[str] = []
+    # /.well-known/jwks.json の Cache-Control の max-age（秒）
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    # 認証済みユーザー（プリンシパル）のキャッシュ。サイズ0で無効
+    # 無効化は同一プロセス内のみのため、他ワーカーでの変更はTTL秒以内に反映される
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
+    # 検証済みアクセストークンのキャッシュ。サイズ0で無効
+    # 有効なトークンはexpまで、不正なトークンはこの秒数だけ保持する。
+    # 不正なトークンは別のキャッシュ（TOKEN_CACHE_NEGATIVE_SIZE件まで）に保持し、
+    # 大量の不正なトークンで有効なトークンが追い出されないようにする
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_NEGATIVE_SIZE: int = 1000
+    TOKEN_CACHE_NEGATIVE_TTL_SECONDS: int = 5
+
+    # bcryptを実行するプロセス数（0でリクエスト処理中のスレッドで直接実行）と、
+    # 実行中・待機中のハッシュ処理の上限（超えた分は503で即座に拒否する）
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # ログイン試行のレート制限（メールアドレスごと・クライアントIPごとのトークンバケット）。
+    # BURST回まで連続で試行でき、その後は1分あたりPER_MINUTE回まで回復する。BURST=0で無効。
+    # PER_MINUTE は0より大きい値にする（0では空になったバケットが回復しないため）
+    LOGIN_RATE_LIMIT_EMAIL_BURST: int = 10
+    LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE: float = 5
+    LOGIN_RATE_LIMIT_IP_BURST: int = 50
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = 60
+    # プロセス内で保持するバケットの最大数（超えると最も古く使われたものから捨てる）
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
     
+    # 一括作成・更新・削除APIで1リクエストに含められる最大件数
+    BULK_MAX_ITEMS: int = 10000
+
+    # 一覧APIのレスポンスを高速な経路（DBの行をそのままJSONのバイト列へ変換）で返す。
+    # 有効にするとデフォルトのレスポンスクラスもORJSONResponseになる
+    FAST_JSON_RESPONSES: bool = False
+
+    # エクスポートAPIでDBから1回に取り出す行数（サーバーサイドカーソルのフェッチサイズ）
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # インポートで検証・書き込みをまとめて行う行数と、レスポンスに含めるエラーの最大件数
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 1000
+
+    # 1リクエスト内で同じSQL文（パラメータを除く）がこの回数を超えて実行されたら、
+    # N+1の疑いとしてスタックトレース付きで警告をログに出す。0で無効
+    QUERY_REPEAT_WARNING_THRESHOLD: int = 10
+
+    # 本番用のサーバー（python -m app.server）。WEB_CONCURRENCY はワーカー数（0でCPU数）
+    WEB_CONCURRENCY: int = 0
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # ワーカーをこのリクエスト数ごとに入れ替える（0で無効）。すべてのワーカーが
+    # 同時に入れ替わらないよう、ワーカーごとに最大 SERVER_MAX_REQUESTS_JITTER ずらす
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    # RSSがこの大きさ（MB）を超えたワーカーを入れ替える（0で無効）
+    SERVER_MAX_RSS_MB: int = 0
+    # 終了・入れ替えのときに処理中のリクエストの完了を待つ秒数
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+
+    # レスポンスの圧縮（gzip。brotli・zstandardがインストールされていればbr・zstdも）。
+    # COMPRESSION_MINIMUM_SIZE バイト未満の本文は圧縮しない。COMPRESSION_LEVEL は
+    # 1〜9（大きいほど小さく遅い）で、ルートごとの値は app/main.py で指定する
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 5
+
+    # Prometheus形式のメトリクス（ルートごとのレイテンシ、コネクションプールの状態など）。
+    # 公開するパスはリバースプロキシなどで外部から遮断すること
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+
     # CORSの設定 - すでに配列になっているのでそのまま使用
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:8000"]
 
@@ -28,6 +121,22 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
     
+    @field_validator("DB_REPLICA_URLS", "JWT_PUBLIC_KEY_FILES", mode="before")
+    @classmethod
+    def assemble_comma_separated(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    @field_validator(
+        "LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE", "LOGIN_RATE_LIMIT_IP_PER_MINUTE"
+    )
+    @classmethod
+    def validate_positive_rate(cls, v: float) -> float:
+        if v <= 0:
+            raise ValueError("must be greater than 0")
+        return v
+
     # Pydantic v2では内部のvalidatorで変換する
     @field_validator("CORS_ORIGINS")
     @classmethod
@@ -50,10 +159,61 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD", "postgres")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "app")
+
+    # コネクションプール（同期・非同期のエンジンそれぞれに、ワーカープロセスごとに作られる）。
+    # 1ワーカーが開く接続の上限は 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)。
+    # 取り出しをDB_POOL_TIMEOUT秒待っても空かなければエラーにする
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    # 全ワーカーで開く接続数の上限。設定すると本番用のサーバー（app/server.py）が
+    # ワーカー数から各ワーカーの DB_POOL_SIZE と DB_MAX_OVERFLOW を決める（0で無効）
+    DB_MAX_CONNECTIONS: int = 0
+    DB_POOL_TIMEOUT: float = 10
+    # この秒数より古い接続は取り出し時に開き直す（-1で無効）
+    DB_POOL_RECYCLE: int = 1800
+    # 取り出し時の死活確認。always: 毎回 SELECT 1 を実行する、
+    # idle: DB_POOL_PRE_PING_IDLE_SECONDS 秒以上使われていなかった接続だけ確認する、
+    # never: 確認しない（切断された接続はエラーになった時点でプールから捨てられる）
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PRE_PING_IDLE_SECONDS: float = 30
+
+    # 接続ごとのタイムアウト（ミリ秒、0で設定しない）。接続時のパラメータで渡す
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # エクスポートAPIはクライアントが受信し終えるまでトランザクションを開いたままにするため、
+    # 有効にする場合は遅いクライアントを考慮した値にする
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS: int = 0
+
+    # 読み取り専用レプリカのURL（JSON配列またはカンマ区切り）。空ならすべてプライマリで処理する。
+    # レプリカの選び方は round_robin か least_connections。接続エラーが起きたレプリカは
+    # DB_REPLICA_EJECT_SECONDS 秒間使わない
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STRATEGY: Literal["round_robin", "least_connections"] = "round_robin"
+    DB_REPLICA_EJECT_SECONDS: float = 30
+    # 書き込みを行ったクライアント（Authorizationヘッダー、ない場合はクライアントIPで
+    # 区別）の読み取りは、この秒数だけプライマリで処理する（レプリカの遅延で直前の
+    # 書き込みが見えないのを防ぐ）。認証時のユーザーの参照は常にプライマリで行う。
+    # プロセス内で保持するため、同じワーカーに来たリクエストにだけ効く
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+    DB_READ_YOUR_WRITES_MAX_CLIENTS: int = 100000
+
+    # PgBouncerのtransactionモード経由で接続する。アプリ側ではプールせず（NullPool）、
+    # 接続時のパラメータやプリペアドステートメントのキャッシュなどセッションの状態を使わない。
+    # タイムアウトは ALTER ROLE ... SET statement_timeout などDB側で設定する
+    DB_PGBOUNCER: bool = False
     
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        return (
+            f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        )
+
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
+            f"@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        )
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
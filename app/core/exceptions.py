@@ -19,3 +19,25 @@ class PermissionDeniedError(HTTPException):
 class BadRequestError(HTTPException):
     def __init__(self, detail: str = "Bad request"):
         super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(
+        self, detail: str = "Service temporarily unavailable", retry_after: int = 1
+    ):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+class PreconditionFailedError(HTTPException):
+    def __init__(self, detail: str = "Precondition failed"):
+        super().__init__(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=detail)
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str = "Too many requests", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
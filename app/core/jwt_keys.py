@@ -0,0 +1,109 @@
+import base64
+import hashlib
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from jose.exceptions import JWTError
+
+from app.core.config import Settings
+
+if TYPE_CHECKING:
+    from jose.backends.base import Key
+
+# RFC 7638 のサムプリントの計算に使うメンバー
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y")}
+
+
+def key_thumbprint(public_jwk: Dict[str, Any]) -> str:
+    """
+    公開鍵のJWKのサムプリント（RFC 7638）。鍵の内容から決まるため、kid に使う
+    """
+    members = {
+        name: public_jwk[name] for name in _THUMBPRINT_MEMBERS[public_jwk["kty"]]
+    }
+    digest = hashlib.sha256(
+        json.dumps(members, sort_keys=True, separators=(",", ":")).encode()
+    ).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeySet:
+    """
+    JWTの署名用の鍵と、kid ごとの検証用の鍵
+
+    鍵はPEMから一度だけ読み込んで保持し、署名・検証のたびに解析しない。
+    HS256 では SECRET_KEY だけを使い、kid は付けない（JWKSも空）
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_key: "Key",
+        signing_kid: Optional[str] = None,
+        verification_keys: Optional[Dict[str, "Key"]] = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.signing_kid = signing_kid
+        self.verification_keys = verification_keys or {}
+        self.jwks = {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self.verification_keys.items()
+            ]
+        }
+        # /.well-known/jwks.json のレスポンスの本文とETag
+        self.jwks_body = json.dumps(self.jwks, separators=(",", ":")).encode()
+        self.jwks_etag = f'"{hashlib.sha1(self.jwks_body).hexdigest()}"'
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        """
+        署名するトークンのヘッダーに加える値
+        """
+        return {"kid": self.signing_kid} if self.signing_kid else None
+
+    def verification_key(self, kid: Optional[str]) -> "Key":
+        """
+        トークンのヘッダーの kid に対応する検証用の鍵。不明な kid は `JWTError`
+        """
+        if not self.verification_keys:
+            return self.signing_key
+        key = self.verification_keys.get(kid) if kid else None
+        if key is None:
+            raise JWTError("Unknown key id")
+        return key
+
+
+def _read_key(path: str, algorithm: str) -> "Key":
+    from jose import jwk
+
+    return jwk.construct(Path(path).read_text(), algorithm)
+
+
+def load_key_set(config: Settings) -> KeySet:
+    """
+    設定からJWTの鍵を読み込む。RS256 / ES256 で秘密鍵がない場合は `ValueError`
+    """
+    # python-jose の署名の実装（RSA・ECDSAのバックエンド）は鍵を読み込むときに読み込む
+    from jose import jwk
+
+    algorithm = config.JWT_ALGORITHM
+    if algorithm == "HS256":
+        return KeySet(algorithm, jwk.construct(config.SECRET_KEY, algorithm))
+    if not config.JWT_PRIVATE_KEY_FILE:
+        raise ValueError(f"JWT_PRIVATE_KEY_FILE is required for {algorithm}")
+
+    signing_key = _read_key(config.JWT_PRIVATE_KEY_FILE, algorithm)
+    public_keys: List["Key"] = [signing_key.public_key()]
+    for path in config.JWT_PUBLIC_KEY_FILES:
+        key = _read_key(path, algorithm)
+        public_keys.append(key if key.is_public() else key.public_key())
+    verification_keys = {key_thumbprint(key.to_dict()): key for key in public_keys}
+    return KeySet(
+        algorithm,
+        signing_key,
+        signing_kid=key_thumbprint(public_keys[0].to_dict()),
+        verification_keys=verification_keys,
+    )
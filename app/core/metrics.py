@@ -0,0 +1,121 @@
+from typing import Dict, List, Tuple
+
+import anyio.to_thread
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.utils.metrics import Counter, Gauge, Histogram, Labels, Registry
+
+registry = Registry()
+
+# HTTP（ルートはパスのテンプレート、例: /api/v1/items/{id}）
+http_requests = registry.register(
+    Counter(
+        "http_requests",
+        "Total HTTP requests.",
+        ("method", "route", "status"),
+    )
+)
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency including the response body.",
+        ("method", "route"),
+    )
+)
+http_requests_in_flight = registry.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being processed.")
+)
+
+# DBのコネクションプール
+db_pool_checkout_duration = registry.register(
+    Histogram(
+        "db_pool_checkout_duration_seconds",
+        "Time spent waiting for a connection from the pool.",
+        ("pool",),
+        buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+    )
+)
+db_pool_checkout_timeouts = registry.register(
+    Counter(
+        "db_pool_checkout_timeouts",
+        "Pool checkouts that timed out because the pool was exhausted.",
+        ("pool",),
+    )
+)
+_engines: List[Tuple[str, Engine]] = []
+
+
+def register_engine(name: str, engine: Engine) -> None:
+    """
+    コネクションプールの状態（使用中・待機中・オーバーフロー）を出力の対象にする
+    """
+    _engines.append((name, engine))
+
+
+def _pool_stats(attribute: str) -> Dict[Labels, float]:
+    values = {}
+    for name, engine in _engines:
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            values[(name,)] = max(0, getattr(pool, attribute)())
+    return values
+
+
+for _attribute, _documentation in (
+    ("checkedout", "Connections currently checked out of the pool."),
+    ("checkedin", "Idle connections in the pool."),
+    ("overflow", "Connections opened beyond pool_size."),
+    ("size", "Configured pool_size."),
+):
+    registry.register(
+        Gauge(
+            f"db_pool_{_attribute}",
+            _documentation,
+            ("pool",),
+            collect=lambda attribute=_attribute: _pool_stats(attribute),
+        )
+    )
+
+
+# 同期エンドポイントを実行するスレッドプール（anyioの既定のCapacityLimiter）
+def _threadpool_stats(attribute: str) -> Dict[Labels, float]:
+    try:
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        # イベントループの外から出力した場合
+        return {}
+    if attribute == "waiting":
+        return {(): limiter.statistics().tasks_waiting}
+    return {(): getattr(limiter, attribute)}
+
+
+for _attribute, _documentation in (
+    ("borrowed_tokens", "Worker threads currently running sync endpoints."),
+    ("total_tokens", "Maximum number of worker threads."),
+    ("waiting", "Tasks queued waiting for a worker thread."),
+):
+    registry.register(
+        Gauge(
+            f"threadpool_{_attribute}",
+            _documentation,
+            collect=lambda attribute=_attribute: _threadpool_stats(attribute),
+        )
+    )
+
+# 認証（bcryptはプロセスプールでの待ち時間を含む）
+password_hash_duration = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "bcrypt hash/verify latency including queueing for the process pool.",
+        ("operation",),
+    )
+)
+jwt_duration = registry.register(
+    Histogram(
+        "jwt_duration_seconds",
+        "JWT signing and signature verification latency (cache misses only).",
+        ("operation",),
+        buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+    )
+)
@@ -1,33 +1,279 @@
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Dict, Optional, Union
 
-from jose import jwt
-from passlib.context import CryptContext
+from jose.exceptions import JWTError
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+from app.core.jwt_keys import KeySet, load_key_set
+from app.core.metrics import jwt_duration, password_hash_duration
+from app.schemas.token import TokenPayload
+from app.utils.cache import TTLCache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib（bcrypt）・python-jose の署名の実装とJWTの鍵は最初に使うときに読み込む。
+# アプリでは lifespan の `init_crypto` で起動時に読み込むため、importしただけでは何もしない
+_pwd_context = None
+_key_set: Optional[KeySet] = None
+_crypto_lock = threading.Lock()
 
-ALGORITHM = "HS256"
+# JWTの type クレーム。リフレッシュトークンをアクセストークンとして使えないようにする
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# bcrypt専用のプロセスプール（GILを占有しないよう別プロセスで実行する）
+_password_executor: Optional[ProcessPoolExecutor] = None
+_password_slots: Optional[threading.BoundedSemaphore] = None
+_password_executor_lock = threading.Lock()
+
+# 検証済みトークンのキャッシュ（キーはトークンのSHA-256）。有効なトークンはexpまで
+# 保持する。不正なトークンは別のキャッシュに短いTTLで保持し、大量の不正なトークンで
+# 有効なトークンのエントリが追い出されないようにする
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=0)
+invalid_token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_NEGATIVE_SIZE,
+    ttl=settings.TOKEN_CACHE_NEGATIVE_TTL_SECONDS,
+)
+
+
+def _get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        # passlibのimportには時間がかかるため、必要になるまで遅らせる
+        from passlib.context import CryptContext
+
+        with _crypto_lock:
+            if _pwd_context is None:
+                _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
+
+def get_key_set() -> KeySet:
+    """
+    JWTの署名・検証に使う鍵
+    """
+    global _key_set
+    if _key_set is None:
+        with _crypto_lock:
+            if _key_set is None:
+                _key_set = load_key_set(settings)
+    return _key_set
+
+
+def init_crypto() -> None:
+    """
+    JWTの鍵とpython-joseを読み込む（鍵の設定の誤りを起動時に検出し、最初のリクエストで
+    読み込まないようにする）。パスワードのハッシュ処理が同じプロセスで行われる場合は
+    passlibも読み込む
+    """
+    import jose.jwt  # noqa: F401
+
+    get_key_set()
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        _get_pwd_context()
+
+
+def _create_token(
+    subject: Union[str, Any], token_type: str, expires_delta: timedelta
+) -> str:
+    to_encode = {
+        "exp": datetime.utcnow() + expires_delta,
+        "sub": str(subject),
+        # 失効（ログアウトなど）の対象を特定するためのID
+        "jti": uuid.uuid4().hex,
+        "type": token_type,
+    }
+    from jose import jwt
+
+    key_set = get_key_set()
+    started = time.perf_counter()
+    encoded_jwt = jwt.encode(
+        to_encode,
+        key_set.signing_key,
+        algorithm=key_set.algorithm,
+        headers=key_set.headers,
+    )
+    jwt_duration.observe(time.perf_counter() - started, "encode")
+    return encoded_jwt
 
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: timedelta = None
 ) -> str:
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    return _create_token(
+        subject,
+        ACCESS_TOKEN_TYPE,
+        expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+
+
+def create_refresh_token(
+    subject: Union[str, Any], expires_delta: timedelta = None
+) -> str:
+    return _create_token(
+        subject,
+        REFRESH_TOKEN_TYPE,
+        expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    アクセストークンを検証してペイロードを返す（リフレッシュトークンは不正として扱う）
+    """
+    token_data = _decode_token(token)
+    if token_data.type == REFRESH_TOKEN_TYPE:
+        raise JWTError("Refresh token used as access token")
+    return token_data
+
+
+def decode_refresh_token(token: str) -> TokenPayload:
+    token_data = _decode_token(token)
+    if (
+        token_data.type != REFRESH_TOKEN_TYPE
+        or token_data.jti is None
+        or token_data.exp is None
+    ):
+        raise JWTError("Not a refresh token")
+    return token_data
+
+
+def _decode_token(token: str) -> TokenPayload:
+    """
+    トークンを検証してペイロードを返す。
+
+    不正なトークンの場合は `JWTError` または `ValidationError` を送出する。
+    同じトークンの検証結果はキャッシュし、署名検証を繰り返さない。
+    鍵の読み込みの失敗などトークン以外の原因の例外はキャッシュせずにそのまま送出する。
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
+    if invalid_token_cache.get(key) is not None:
+        raise JWTError("Invalid token")
+
+    from jose import jwt
+
+    key_set = get_key_set()
+    started = time.perf_counter()
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        payload = jwt.decode(
+            token, key_set.verification_key(kid), algorithms=[key_set.algorithm]
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        invalid_token_cache.set(key, True)
+        raise
+    finally:
+        jwt_duration.observe(time.perf_counter() - started, "decode")
+
+    # 期限のないトークンは保持期間が決められないためキャッシュしない
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(key, token_data, ttl=exp - time.time())
+    return token_data
+
+
+def token_cache_stats() -> Dict[str, int]:
+    return token_cache.stats()
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _get_pwd_context().verify(plain_password, hashed_password)
+
+
+def _get_password_hash(password: str) -> str:
+    return _get_pwd_context().hash(password)
+
+
+def _get_password_executor() -> ProcessPoolExecutor:
+    global _password_executor, _password_slots
+    with _password_executor_lock:
+        if _password_executor is None:
+            # スレッドを持つプロセスからのforkを避けるためspawnで起動する
+            _password_executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _password_slots = threading.BoundedSemaphore(
+                settings.PASSWORD_HASH_MAX_PENDING
+            )
+        return _password_executor
+
+
+def _acquire_password_slot() -> ProcessPoolExecutor:
+    """
+    実行中・待機中のハッシュ処理が上限に達している場合はすぐに503を返す
+    """
+    executor = _get_password_executor()
+    if not _password_slots.acquire(blocking=False):
+        raise ServiceUnavailableError(
+            detail="混雑しています。しばらくしてから再度お試しください"
+        )
+    return executor
+
+
+def _run_password_task(operation: str, fn: Callable, *args: Any) -> Any:
+    started = time.perf_counter()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return fn(*args)
+        executor = _acquire_password_slot()
+        try:
+            return executor.submit(fn, *args).result()
+        finally:
+            _password_slots.release()
+    finally:
+        password_hash_duration.observe(time.perf_counter() - started, operation)
+
+
+async def _run_password_task_async(operation: str, fn: Callable, *args: Any) -> Any:
+    started = time.perf_counter()
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(fn, *args)
+        executor = _acquire_password_slot()
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        finally:
+            _password_slots.release()
+    finally:
+        password_hash_duration.observe(time.perf_counter() - started, operation)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_password_task(
+        "verify", _verify_password, plain_password, hashed_password
+    )
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _run_password_task("hash", _get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_task_async(
+        "verify", _verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_task_async("hash", _get_password_hash, password)
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is not None:
+            _password_executor.shutdown(wait=True)
+            _password_executor = None
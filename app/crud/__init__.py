@@ -1,2 +1,3 @@
-from app.crud.crud_item import item
-from app.crud.crud_user import user
+from app.crud.crud_item import async_item, item
+from app.crud.crud_user import async_user, user
+from app.crud.crud_token_revocation import token_revocation
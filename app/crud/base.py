@@ -1,17 +1,144 @@
+import json
+from itertools import groupby
 from uuid import UUID
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    bindparam,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.db.session import Base
+from app.models.mixins import utcnow
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def get_update_values(
+    model: Type[ModelType], obj_in: Union[BaseModel, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    更新内容のうちモデルのカラムに対応する値だけを返す
+    """
+    if isinstance(obj_in, dict):
+        update_data = obj_in
+    else:
+        update_data = obj_in.model_dump(exclude_unset=True)
+    columns = model.__table__.columns
+    return {field: value for field, value in update_data.items() if field in columns}
+
+
+def get_version_values(model: Type[ModelType]) -> Dict[str, Any]:
+    """
+    更新時に追加する値（version を1増やし、updated_at を現在時刻にする）
+    """
+    if not hasattr(model, "version"):
+        return {}
+    return {"version": model.version + 1, "updated_at": utcnow()}
+
+
+def dialect_insert(dialect_name: str, model: Type[ModelType]):
+    """
+    ON CONFLICT 句（on_conflict_do_update / on_conflict_do_nothing）を付けられる
+    INSERT を返す（PostgreSQLとテスト用のSQLite）
+    """
+    if dialect_name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _where_version(stmt, model: Type[ModelType], version: Optional[int]):
+    """
+    `version` を指定した場合は、行のバージョンが一致することをWHERE句の条件に加える
+    （If-Match による楽観的排他制御）
+    """
+    if version is not None:
+        stmt = stmt.where(model.version == version)
+    return stmt
+
+
+# テーブルの行数の推定値。プランナーと同じく、最後のANALYZE/VACUUM時点の1ページあたりの
+# 行数に現在のページ数を掛ける（未ANALYZEの場合はNULL）
+_TABLE_ROWS_ESTIMATE = text(
+    "SELECT CASE WHEN c.reltuples < 0 THEN NULL "
+    "WHEN c.relpages = 0 THEN c.reltuples "
+    "ELSE c.reltuples / c.relpages "
+    "* (pg_relation_size(c.oid) / current_setting('block_size')::int) END "
+    "FROM pg_class c WHERE c.oid = CAST(:table AS regclass)"
+)
+
+
+def _explain_rows(db: Session, stmt) -> int:
+    """
+    `EXPLAIN (FORMAT JSON)` でプランナーが見積もった行数を返す（PostgreSQL）
+    """
+    sql = stmt.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _update_multi_batches(
+    model: Type[ModelType],
+    objs_in: Sequence[Dict[str, Any]],
+    criteria: Sequence[ColumnElement],
+):
+    """
+    update_multi の (文, パラメータのリスト) を、更新するカラムの組み合わせごとに返す
+
+    ORMの「主キーによる一括UPDATE」は、version + 1 のようなSQL式を含むと1行ずつ
+    実行されるため、テーブルに対するUPDATEをexecutemanyで実行する。
+    更新するカラムはパラメータのキーから決まる（SET句は組み合わせごとに異なる）
+    """
+    table = model.__table__
+    rows = [
+        {k: v for k, v in obj_in.items() if k != "id" and k in table.c}
+        | {"_id": obj_in["id"]}
+        for obj_in in objs_in
+    ]
+    rows = sorted((row for row in rows if len(row) > 1), key=sorted)
+    for _, group in groupby(rows, key=sorted):
+        params = list(group)
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("_id"), *criteria)
+            .values(**get_version_values(model))
+        )
+        yield stmt, params
+
+
+def _update_stmt(model: Type[ModelType], id: UUID, values: Dict[str, Any]):
+    """
+    `UPDATE ... WHERE id = :id RETURNING *`（version を1増やす）。
+    変更がなければ更新せず（versionも増やさず）に現在の行を返すSELECT
+    """
+    if not values:
+        return select(model).where(model.id == id)
+    return (
+        update(model)
+        .where(model.id == id)
+        .values(**values, **get_version_values(model))
+        .returning(model)
+    )
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -27,16 +154,30 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        """
+        idの昇順で取得する。`after` を指定した場合はOFFSETの代わりに
+        `id > after` のシーク条件でページングする（キーセットページング）
+        """
+        query = db.query(self.model).order_by(self.model.id)
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit).all()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        # 既定値はPython側で設定されるため、コミット後の refresh（再SELECT）は不要
         return db_obj
 
     def update(
@@ -44,23 +185,266 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
-    ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        version: Optional[int] = None,
+    ) -> Optional[ModelType]:
+        """
+        1つの UPDATE ... RETURNING で更新し、version を1増やす（`db_obj` も更新後の値になる）
+
+        `version` を指定した場合は、行のバージョンが一致しなければ更新せずにNoneを返す
+        """
+        values = get_update_values(self.model, obj_in)
+        stmt = _where_version(
+            _update_stmt(self.model, db_obj.id, values), self.model, version
+        )
+        obj = db.scalars(stmt.execution_options(populate_existing=True)).first()
+        db.commit()
+        return obj
+
+    def remove(
+        self, db: Session, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[ModelType]:
+        """
+        1つの DELETE ... RETURNING で削除する。該当する行がなければNone
+        """
+        stmt = _where_version(
+            delete(self.model).where(self.model.id == id), self.model, version
+        )
+        obj = db.scalars(stmt.returning(self.model)).first()
+        db.commit()
+        return obj
+
+    def get_version(
+        self, db: Session, *, id: UUID, criteria: Sequence[ColumnElement] = ()
+    ) -> Optional[int]:
+        """
+        行のバージョンだけを取得する（If-None-Match の判定用）
+        """
+        return db.scalar(
+            select(self.model.version).where(self.model.id == id, *criteria)
+        )
+
+    def get_multi_versions(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+        criteria: Sequence[ColumnElement] = (),
+    ) -> List[Row]:
+        """
+        get_multi と同じ行の (id, version) だけを取得する（一覧の If-None-Match の判定用）
+        """
+        stmt = (
+            select(self.model.id, self.model.version)
+            .where(*criteria)
+            .order_by(self.model.id)
+        )
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
         else:
-            update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
+            stmt = stmt.offset(skip)
+        return list(db.execute(stmt.limit(limit)))
+
+    def count(self, db: Session, *, criteria: Sequence[ColumnElement] = ()) -> int:
+        """
+        条件に一致する行数を `SELECT count(*)` で数える
+        """
+        return db.scalar(select(func.count()).select_from(self.model).where(*criteria))
+
+    def estimate_count(
+        self, db: Session, *, criteria: Sequence[ColumnElement] = ()
+    ) -> int:
+        """
+        条件に一致する行数の推定値（PostgreSQLのプランナーの統計情報を使う）
+
+        条件がなければ pg_class の統計情報から、条件があればEXPLAINの見積もり行数を返す。
+        どちらもテーブルを読まないため行数によらず一定の時間で返るが、
+        値はANALYZEの時点の統計情報による。PostgreSQL以外では count と同じ
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return self.count(db, criteria=criteria)
+        if not criteria:
+            estimate = db.scalar(
+                _TABLE_ROWS_ESTIMATE, {"table": self.model.__tablename__}
+            )
+            if estimate is not None:
+                return int(estimate)
+        return _explain_rows(db, select(self.model.id).where(*criteria))
+
+    def _insert_multi(
+        self,
+        db: Session,
+        objs_in: Sequence[CreateSchemaType],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> List[ModelType]:
+        # create_multi のINSERT（コミットはしない）
+        rows = [{**obj_in.model_dump(), **(extra or {})} for obj_in in objs_in]
+        return list(
+            db.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True),
+                rows,
+            ).all()
+        )
+
+    def create_multi(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[CreateSchemaType],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> List[ModelType]:
+        """
+        複数行を1つの INSERT ... RETURNING でまとめて作成する
+
+        `extra` は全行に共通で設定する値（owner_id など）。
+        戻り値は `objs_in` と同じ順序になる
+        """
+        if not objs_in:
+            return []
+        db_objs = self._insert_multi(db, objs_in, extra)
         db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return db_objs
 
-    def remove(self, db: Session, *, id: UUID) -> ModelType:
-        obj = db.get(self.model, id)
-        db.delete(obj)
+    def update_multi(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Dict[str, Any]],
+        criteria: Sequence[ColumnElement] = (),
+    ) -> List[ModelType]:
+        """
+        主キー（id）を含む辞書のリストでまとめて更新する（executemany）
+
+        `criteria` は各行のWHERE句に追加する条件（所有者の確認など）。
+        更新後の行を返す
+        """
+        ids = [obj_in["id"] for obj_in in objs_in]
+        if not ids:
+            return []
+        # 更新後の行はpopulate_existingで再取得するため、セッション内の同期は行わない
+        for stmt, params in _update_multi_batches(self.model, objs_in, criteria):
+            db.execute(stmt, params)
         db.commit()
+        return list(
+            db.scalars(
+                select(self.model)
+                .where(self.model.id.in_(ids), *criteria)
+                .execution_options(populate_existing=True)
+            )
+        )
+
+    def remove_multi(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[UUID],
+        criteria: Sequence[ColumnElement] = (),
+    ) -> List[UUID]:
+        """
+        1つの DELETE ... RETURNING でまとめて削除し、削除したidを返す
+        """
+        if not ids:
+            return []
+        deleted = db.scalars(
+            delete(self.model)
+            .where(self.model.id.in_(ids), *criteria)
+            .returning(self.model.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        return list(deleted)
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        AsyncSession用のCRUD操作のベースクラス
+
+        **Parameters**
+        * `model`: SQLAlchemyモデルクラス
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: UUID) -> Optional[ModelType]:
+        return await db.scalar(select(self.model).where(self.model.id == id))
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+    ) -> List[ModelType]:
+        stmt = select(self.model).order_by(self.model.id)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        else:
+            stmt = stmt.offset(skip)
+        result = await db.scalars(stmt.limit(limit))
+        return list(result)
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.commit()
+        # expire_on_commit=False のため refresh は不要
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        version: Optional[int] = None,
+    ) -> Optional[ModelType]:
+        values = get_update_values(self.model, obj_in)
+        stmt = _where_version(
+            _update_stmt(self.model, db_obj.id, values), self.model, version
+        )
+        obj = (
+            await db.scalars(stmt.execution_options(populate_existing=True))
+        ).first()
+        await db.commit()
         return obj
+
+    async def remove(
+        self, db: AsyncSession, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[ModelType]:
+        stmt = _where_version(
+            delete(self.model).where(self.model.id == id), self.model, version
+        )
+        obj = (await db.scalars(stmt.returning(self.model))).first()
+        await db.commit()
+        return obj
+
+    async def get_version(
+        self, db: AsyncSession, *, id: UUID, criteria: Sequence[ColumnElement] = ()
+    ) -> Optional[int]:
+        return await db.scalar(
+            select(self.model.version).where(self.model.id == id, *criteria)
+        )
+
+    async def get_multi_versions(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+        criteria: Sequence[ColumnElement] = (),
+    ) -> List[Row]:
+        stmt = (
+            select(self.model.id, self.model.version)
+            .where(*criteria)
+            .order_by(self.model.id)
+        )
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        else:
+            stmt = stmt.offset(skip)
+        return list(await db.execute(stmt.limit(limit)))
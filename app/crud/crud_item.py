@@ -1,38 +1,528 @@
-from typing import List
+import re
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Row,
+    and_,
+    cast,
+    delete,
+    func,
+    literal_column,
+    or_,
+    select,
+    table,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
-from app.models.item import Item
+from app.crud.base import (
+    AsyncCRUDBase,
+    CRUDBase,
+    dialect_insert,
+    get_update_values,
+    get_version_values,
+)
+from app.models.item import Item, ItemCount
 from app.models.user import User
-from app.schemas.item import ItemCreate, ItemUpdate
+from app.schemas.item import ItemBulkUpdate, ItemCreate, ItemUpdate
+from app.utils.pagination import CountMode
+
+
+def _owned(
+    stmt, id: UUID, owner_id: Optional[UUID], version: Optional[int] = None
+):
+    """
+    id と（指定されていれば）所有者・バージョンの条件をWHERE句に追加する
+    """
+    stmt = stmt.where(Item.id == id)
+    if owner_id is not None:
+        stmt = stmt.where(Item.owner_id == owner_id)
+    if version is not None:
+        stmt = stmt.where(Item.version == version)
+    return stmt
+
+
+def _owner_criteria(owner_id: Optional[UUID]) -> list:
+    return [Item.owner_id == owner_id] if owner_id is not None else []
+
+
+def _owner_counts_upsert(dialect_name: str):
+    """
+    所有者ごとのアイテム数に差分を加える `INSERT ... ON CONFLICT DO UPDATE`
+    """
+    stmt = dialect_insert(dialect_name, ItemCount)
+    return stmt.on_conflict_do_update(
+        index_elements=[ItemCount.owner_id],
+        set_={"item_count": ItemCount.item_count + stmt.excluded.item_count},
+    )
+
+
+def _owner_count_rows(deltas: Dict[Optional[UUID], int]) -> List[Dict]:
+    # 複数の所有者の行を更新するトランザクション同士がデッドロックしないよう、
+    # 行ロックを取る順序を owner_id 順にそろえる
+    return [
+        {"owner_id": owner_id, "item_count": deltas[owner_id]}
+        for owner_id in sorted(o for o in deltas if o is not None and deltas[o])
+    ]
+
+
+def _update_by_owner_stmt(
+    id: UUID, obj_in: ItemUpdate, owner_id: Optional[UUID], version: Optional[int]
+):
+    values = get_update_values(Item, obj_in)
+    if not values:
+        return _owned(select(Item), id, owner_id, version)
+    return (
+        _owned(update(Item), id, owner_id, version)
+        .values(**values, **get_version_values(Item))
+        .returning(Item)
+    )
+
+
+def _export_query(owner_id: Optional[UUID]):
+    """
+    エクスポート用のクエリ。ORMエンティティではなく列だけを選択するため、
+    取得した行はアイデンティティマップに登録されない
+    """
+    stmt = select(Item.id, Item.title, Item.description, Item.owner_id).order_by(
+        Item.id
+    )
+    if owner_id is not None:
+        stmt = stmt.where(Item.owner_id == owner_id)
+    return stmt
+
+
+def _search_query(
+    dialect: str,
+    q: str,
+    *,
+    owner_id: Optional[UUID],
+    limit: int,
+    after: Optional[Tuple[float, UUID]],
+):
+    """
+    全文検索のクエリ。(アイテム, 関連度) を関連度の高い順（同じ場合はid順）に返す。
+    PostgreSQLでは search_vector 列とGINインデックス、SQLiteではFTS5の items_fts を使う。
+    検索語が含まれない場合はNone
+    """
+    if dialect == "postgresql":
+        tsquery = func.plainto_tsquery("simple", q)
+        vector = literal_column("items.search_vector")
+        # ts_rank は real を返すため、カーソルに入れた値と正確に比較できるよう倍精度にする
+        rank = cast(func.ts_rank(vector, tsquery), Float)
+        stmt = select(Item, rank).where(vector.op("@@")(tsquery))
+    else:
+        terms = re.findall(r"\w+", q)
+        if not terms:
+            return None
+        fts = literal_column("items_fts")
+        # bm25 は関連度が高いほど小さい値を返す
+        rank = -func.bm25(fts)
+        stmt = (
+            select(Item, rank)
+            .join(
+                table("items_fts"),
+                literal_column("items_fts.rowid") == literal_column("items.rowid"),
+            )
+            .where(fts.op("MATCH")(" ".join(f'"{term}"' for term in terms)))
+        )
+    if owner_id is not None:
+        stmt = stmt.where(Item.owner_id == owner_id)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(
+            or_(rank < after_rank, and_(rank == after_rank, Item.id > after_id))
+        )
+    return stmt.order_by(rank.desc(), Item.id).limit(limit)
 
 
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
+    def adjust_owner_counts(
+        self, db: Session, deltas: Dict[Optional[UUID], int]
+    ) -> None:
+        """
+        所有者ごとのアイテム数（item_counts）に差分を加える。コミットは呼び出し側で行う
+        """
+        rows = _owner_count_rows(deltas)
+        if rows:
+            db.execute(_owner_counts_upsert(db.get_bind().dialect.name), rows)
+
+    def count_by_owner(
+        self, db: Session, *, owner_id: Optional[UUID] = None, mode: CountMode = "exact"
+    ) -> int:
+        """
+        read_items の対象（`owner_id` を指定しなければ全件）の件数を `mode` の方法で返す
+        """
+        if mode == "counter":
+            if owner_id is None:
+                stmt = select(func.coalesce(func.sum(ItemCount.item_count), 0))
+            else:
+                stmt = select(ItemCount.item_count).where(
+                    ItemCount.owner_id == owner_id
+                )
+            return int(db.scalar(stmt) or 0)
+        if mode == "estimated":
+            return self.estimate_count(db, criteria=_owner_criteria(owner_id))
+        return self.count(db, criteria=_owner_criteria(owner_id))
+
     def create_with_owner(
         self, db: Session, *, obj_in: ItemCreate, owner_id: int
     ) -> Item:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data, owner_id=owner_id)
         db.add(db_obj)
+        self.adjust_owner_counts(db, {owner_id: 1})
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
     ) -> List[Item]:
-        return (
+        # (owner_id, id) の複合インデックスでシークできるよう id 順に並べる
+        query = (
             db.query(self.model)
             .filter(Item.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .order_by(Item.id)
         )
+        if after is not None:
+            query = query.filter(Item.id > after)
+        else:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def update_by_owner(
+        self,
+        db: Session,
+        *,
+        id: UUID,
+        obj_in: ItemUpdate,
+        owner_id: Optional[UUID] = None,
+        version: Optional[int] = None,
+    ) -> Optional[Item]:
+        """
+        `UPDATE ... WHERE id = :id [AND owner_id = :owner_id] [AND version = :version]
+        RETURNING *` の1回の往復で更新する。該当する行がなければNone
+        """
+        stmt = _update_by_owner_stmt(id, obj_in, owner_id, version)
+        db_obj = db.scalars(
+            stmt.execution_options(populate_existing=True)
+        ).first()
+        db.commit()
+        return db_obj
+
+    def remove_by_owner(
+        self,
+        db: Session,
+        *,
+        id: UUID,
+        owner_id: Optional[UUID] = None,
+        version: Optional[int] = None,
+    ) -> Optional[Item]:
+        """
+        `DELETE ... WHERE id = :id [AND owner_id = :owner_id] [AND version = :version]
+        RETURNING *` の1回の往復で削除する。該当する行がなければNone
+        """
+        db_obj = db.scalars(
+            _owned(delete(Item), id, owner_id, version).returning(Item)
+        ).first()
+        if db_obj is not None:
+            self.adjust_owner_counts(db, {db_obj.owner_id: -1})
+        db.commit()
+        return db_obj
+
+    def remove(
+        self, db: Session, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[Item]:
+        # 所有者ごとのアイテム数も減らす
+        return self.remove_by_owner(db, id=id, version=version)
+
+    def get_owner_and_version(self, db: Session, *, id: UUID) -> Optional[Row]:
+        """
+        所有者とバージョンを取得する（更新・削除が0行だったときに理由を調べる）
+        """
+        return db.execute(
+            select(Item.owner_id, Item.version).where(Item.id == id)
+        ).first()
+
+    def get_multi_versions_by_owner(
+        self,
+        db: Session,
+        *,
+        owner_id: Optional[UUID] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+    ) -> List[Row]:
+        """
+        read_items が返す行（get_multi / get_multi_by_owner）の (id, version) だけを取得する
+        """
+        return self.get_multi_versions(
+            db, skip=skip, limit=limit, after=after, criteria=_owner_criteria(owner_id)
+        )
+
+    def get_owner_ids(self, db: Session, *, ids: Sequence[UUID]) -> Dict[UUID, UUID]:
+        """
+        指定したidのアイテムの所有者を1回のSELECTで取得する（存在しないidは含まれない）
+        """
+        if not ids:
+            return {}
+        return dict(
+            db.execute(select(Item.id, Item.owner_id).where(Item.id.in_(ids))).all()
+        )
+
+    def create_multi_with_owner(
+        self, db: Session, *, objs_in: Sequence[ItemCreate], owner_id: UUID
+    ) -> List[Item]:
+        return self.create_multi(db, objs_in=objs_in, extra={"owner_id": owner_id})
+
+    def create_multi(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[ItemCreate],
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> List[Item]:
+        """
+        CRUDBase.create_multi と同じく作成し、同じトランザクションで
+        所有者ごとのアイテム数を増やす
+        """
+        if not objs_in:
+            return []
+        db_objs = self._insert_multi(db, objs_in, extra)
+        deltas: Dict[Optional[UUID], int] = {}
+        for db_obj in db_objs:
+            deltas[db_obj.owner_id] = deltas.get(db_obj.owner_id, 0) + 1
+        self.adjust_owner_counts(db, deltas)
+        db.commit()
+        return db_objs
+
+    def update_multi_by_owner(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[ItemBulkUpdate],
+        owner_id: Optional[UUID] = None,
+    ) -> List[Item]:
+        """
+        まとめて更新する。`owner_id` を指定した場合はそのユーザーの所有する行だけを更新する
+        """
+        criteria = _owner_criteria(owner_id)
+        return self.update_multi(
+            db,
+            objs_in=[obj_in.model_dump(exclude_unset=True) for obj_in in objs_in],
+            criteria=criteria,
+        )
+
+    def remove_multi_by_owner(
+        self, db: Session, *, ids: Sequence[UUID], owner_id: Optional[UUID] = None
+    ) -> List[UUID]:
+        """
+        1つの DELETE ... RETURNING でまとめて削除し、削除したidを返す
+        """
+        return self.remove_multi(db, ids=ids, criteria=_owner_criteria(owner_id))
+
+    def remove_multi(
+        self,
+        db: Session,
+        *,
+        ids: Sequence[UUID],
+        criteria: Sequence[ColumnElement] = (),
+    ) -> List[UUID]:
+        """
+        CRUDBase.remove_multi と同じく削除し、同じトランザクションで
+        所有者ごとのアイテム数を減らす
+        """
+        if not ids:
+            return []
+        deleted = db.execute(
+            delete(Item)
+            .where(Item.id.in_(ids), *criteria)
+            .returning(Item.id, Item.owner_id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        deltas: Dict[Optional[UUID], int] = {}
+        for _, deleted_owner_id in deleted:
+            deltas[deleted_owner_id] = deltas.get(deleted_owner_id, 0) - 1
+        self.adjust_owner_counts(db, deltas)
+        db.commit()
+        return [id for id, _ in deleted]
+
+    def search(
+        self,
+        db: Session,
+        *,
+        q: str,
+        owner_id: Optional[UUID] = None,
+        limit: int = 100,
+        after: Optional[Tuple[float, UUID]] = None,
+    ) -> List[Tuple[Item, float]]:
+        stmt = _search_query(
+            db.get_bind().dialect.name, q, owner_id=owner_id, limit=limit, after=after
+        )
+        if stmt is None:
+            return []
+        return [tuple(row) for row in db.execute(stmt)]
+
+    def stream_for_export(
+        self, db: Session, *, owner_id: Optional[UUID] = None, batch_size: int = 1000
+    ) -> Iterator[Sequence[Row]]:
+        """
+        アイテムを `batch_size` 行ずつのまとまりで返す。`yield_per` により
+        PostgreSQLではサーバーサイドカーソルを使い、全件をメモリに読み込まない
+        """
+        result = db.execute(
+            _export_query(owner_id).execution_options(yield_per=batch_size)
+        )
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
 
     def is_superuser(self, user: User) -> bool:
         return user.is_superuser
 
 
 item = CRUDItem(Item)
+
+
+class AsyncCRUDItem(AsyncCRUDBase[Item, ItemCreate, ItemUpdate]):
+    async def adjust_owner_counts(
+        self, db: AsyncSession, deltas: Dict[Optional[UUID], int]
+    ) -> None:
+        rows = _owner_count_rows(deltas)
+        if rows:
+            await db.execute(_owner_counts_upsert(db.get_bind().dialect.name), rows)
+
+    async def create_with_owner(
+        self, db: AsyncSession, *, obj_in: ItemCreate, owner_id: int
+    ) -> Item:
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data, owner_id=owner_id)
+        db.add(db_obj)
+        await self.adjust_owner_counts(db, {owner_id: 1})
+        await db.commit()
+        return db_obj
+
+    async def update_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        id: UUID,
+        obj_in: ItemUpdate,
+        owner_id: Optional[UUID] = None,
+        version: Optional[int] = None,
+    ) -> Optional[Item]:
+        stmt = _update_by_owner_stmt(id, obj_in, owner_id, version)
+        db_obj = (
+            await db.scalars(stmt.execution_options(populate_existing=True))
+        ).first()
+        await db.commit()
+        return db_obj
+
+    async def remove_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        id: UUID,
+        owner_id: Optional[UUID] = None,
+        version: Optional[int] = None,
+    ) -> Optional[Item]:
+        stmt = _owned(delete(Item), id, owner_id, version).returning(Item)
+        db_obj = (await db.scalars(stmt)).first()
+        if db_obj is not None:
+            await self.adjust_owner_counts(db, {db_obj.owner_id: -1})
+        await db.commit()
+        return db_obj
+
+    async def remove(
+        self, db: AsyncSession, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[Item]:
+        # 所有者ごとのアイテム数も減らす
+        return await self.remove_by_owner(db, id=id, version=version)
+
+    async def get_owner_and_version(
+        self, db: AsyncSession, *, id: UUID
+    ) -> Optional[Row]:
+        result = await db.execute(
+            select(Item.owner_id, Item.version).where(Item.id == id)
+        )
+        return result.first()
+
+    async def get_multi_versions_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: Optional[UUID] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+    ) -> List[Row]:
+        return await self.get_multi_versions(
+            db, skip=skip, limit=limit, after=after, criteria=_owner_criteria(owner_id)
+        )
+
+    async def get_multi_by_owner(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[UUID] = None,
+    ) -> List[Item]:
+        stmt = select(self.model).where(Item.owner_id == owner_id).order_by(Item.id)
+        if after is not None:
+            stmt = stmt.where(Item.id > after)
+        else:
+            stmt = stmt.offset(skip)
+        result = await db.scalars(stmt.limit(limit))
+        return list(result)
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        owner_id: Optional[UUID] = None,
+        limit: int = 100,
+        after: Optional[Tuple[float, UUID]] = None,
+    ) -> List[Tuple[Item, float]]:
+        stmt = _search_query(
+            db.get_bind().dialect.name, q, owner_id=owner_id, limit=limit, after=after
+        )
+        if stmt is None:
+            return []
+        return [tuple(row) for row in await db.execute(stmt)]
+
+    async def stream_for_export(
+        self,
+        db: AsyncSession,
+        *,
+        owner_id: Optional[UUID] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        result = await db.stream(
+            _export_query(owner_id).execution_options(yield_per=batch_size)
+        )
+        try:
+            async for partition in result.partitions():
+                yield partition
+        finally:
+            await result.close()
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+
+async_item = AsyncCRUDItem(Item)
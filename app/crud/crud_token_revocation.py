@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Row, delete, select
+from sqlalchemy.orm import Session
+
+from app.crud.base import dialect_insert
+from app.models.mixins import utcnow
+from app.models.token_revocation import TokenRevocation
+
+
+class CRUDTokenRevocation:
+    def revoke(self, db: Session, *, jti: str, expires_at: datetime) -> bool:
+        """
+        トークンを失効させる。すでに失効していた場合はFalse
+        （リフレッシュトークンが同時に2回使われた場合に片方だけを通すのに使う）
+        """
+        stmt = (
+            dialect_insert(db.get_bind().dialect.name, TokenRevocation)
+            .values(jti=jti, expires_at=expires_at, revoked_at=utcnow())
+            .on_conflict_do_nothing(index_elements=[TokenRevocation.jti])
+        )
+        inserted = db.execute(stmt).rowcount == 1
+        db.commit()
+        return inserted
+
+    def is_revoked(self, db: Session, *, jti: str) -> bool:
+        return (
+            db.scalar(select(TokenRevocation.jti).where(TokenRevocation.jti == jti))
+            is not None
+        )
+
+    def get_revoked_since(
+        self, db: Session, *, since: Optional[datetime] = None
+    ) -> List[Row]:
+        """
+        `since` 以降に失効した、まだ期限の切れていないトークンの
+        (jti, expires_at, revoked_at) を返す（`since` を省略すると全件）
+        """
+        stmt = select(
+            TokenRevocation.jti, TokenRevocation.expires_at, TokenRevocation.revoked_at
+        ).where(TokenRevocation.expires_at > utcnow())
+        if since is not None:
+            stmt = stmt.where(TokenRevocation.revoked_at >= since)
+        return list(db.execute(stmt))
+
+    def purge_expired(self, db: Session) -> int:
+        """
+        期限の切れたトークンの行を削除し、削除した行数を返す
+        """
+        result = db.execute(
+            delete(TokenRevocation).where(TokenRevocation.expires_at < utcnow())
+        )
+        db.commit()
+        return result.rowcount
+
+
+token_revocation = CRUDTokenRevocation()
@@ -1,11 +1,20 @@
 from typing import Any, Dict, Optional, Union
+from uuid import UUID
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.security import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
+from app.services.principal import PRINCIPAL_FIELDS, invalidate_principal
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
@@ -22,12 +31,16 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         )
         db.add(db_obj)
         db.commit()
-        db.refresh(db_obj)
         return db_obj
 
     def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
-    ) -> User:
+        self,
+        db: Session,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        version: Optional[int] = None,
+    ) -> Optional[User]:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
@@ -36,7 +49,20 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        user_id = db_obj.id
+        db_obj = super().update(
+            db, db_obj=db_obj, obj_in=update_data, version=version
+        )
+        if any(field in update_data for field in PRINCIPAL_FIELDS):
+            invalidate_principal(user_id)
+        return db_obj
+
+    def remove(
+        self, db: Session, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[User]:
+        obj = super().remove(db, id=id, version=version)
+        invalidate_principal(id)
+        return obj
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
@@ -54,3 +80,71 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
 
 
 user = CRUDUser(User)
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.email == email))
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        hashed_password = await get_password_hash_async(obj_in.password)
+        db_obj = User(
+            email=obj_in.email,
+            hashed_password=hashed_password,
+            full_name=obj_in.full_name,
+            is_superuser=obj_in.is_superuser,
+            is_active=obj_in.is_active,
+        )
+        db.add(db_obj)
+        await db.commit()
+        return db_obj
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        version: Optional[int] = None,
+    ) -> Optional[User]:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        if update_data.get("password"):
+            hashed_password = await get_password_hash_async(update_data["password"])
+            del update_data["password"]
+            update_data["hashed_password"] = hashed_password
+        user_id = db_obj.id
+        db_obj = await super().update(
+            db, db_obj=db_obj, obj_in=update_data, version=version
+        )
+        if any(field in update_data for field in PRINCIPAL_FIELDS):
+            invalidate_principal(user_id)
+        return db_obj
+
+    async def remove(
+        self, db: AsyncSession, *, id: UUID, version: Optional[int] = None
+    ) -> Optional[User]:
+        obj = await super().remove(db, id=id, version=version)
+        invalidate_principal(id)
+        return obj
+
+    async def authenticate(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        if not await verify_password_async(password, user.hashed_password):
+            return None
+        return user
+
+    def is_active(self, user: User) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: User) -> bool:
+        return user.is_superuser
+
+
+async_user = AsyncCRUDUser(User)
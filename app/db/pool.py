@@ -0,0 +1,59 @@
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import db_pool_checkout_duration, db_pool_checkout_timeouts
+
+
+class _CheckoutTimingMixin:
+    """
+    プールからコネクションを取り出すまでの待ち時間を計測する。
+    ラベルには create_engine の `pool_logging_name` を使う
+    """
+
+    def connect(self):
+        name = self.logging_name or "default"
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts.inc(name)
+            raise
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - started, name)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def install_idle_pre_ping(engine: Engine, idle_seconds: float) -> None:
+    """
+    プールに戻されてから `idle_seconds` 秒以上経った接続だけ、取り出し時に
+    死活確認（SELECT 1）を行う。
+
+    頻繁に使われている接続では確認の往復を省き、長く使われずにDBやファイアウォールに
+    切断されている可能性がある接続だけを確認する。確認に失敗した接続は捨てられ、
+    プールが新しい接続で取り出しをやり直す
+    """
+    dialect = engine.dialect
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return
+        try:
+            dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError() from e
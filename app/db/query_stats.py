@@ -0,0 +1,91 @@
+import logging
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    1リクエストの間に実行されたSQL文の数と合計時間
+
+    同じ文（パラメータを除いたSQL）の実行回数も数え、
+    `QUERY_REPEAT_WARNING_THRESHOLD` 回を超えたらN+1の疑いとして警告する
+    """
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: "Counter[str]" = Counter()
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    ブロック内（同じコンテキストから呼ばれたスレッドを含む）で実行されたSQLを集計する
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started_at = conn.info.get("query_started")
+    if stats is None or not started_at:
+        return
+    started = started_at.pop()
+    stats.count += 1
+    stats.duration += time.perf_counter() - started
+
+    threshold = settings.QUERY_REPEAT_WARNING_THRESHOLD
+    if threshold <= 0:
+        return
+    stats.statements[statement] += 1
+    # 文ごとに1回だけ（閾値を超えた時点で）、呼び出し元のスタックとともに警告する
+    if stats.statements[statement] == threshold + 1:
+        logger.warning(
+            "同じSQL文が1リクエスト内で%d回を超えて実行されました（N+1の疑い）: %s\n%s",
+            threshold,
+            statement,
+            "".join(traceback.format_stack(limit=25)),
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # 失敗した文の開始時刻を捨て、後続の計測がずれないようにする
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+def install() -> None:
+    """
+    すべてのエンジン（非同期エンジンの内部の同期エンジンを含む）にフックを登録する
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,111 @@
+import itertools
+import logging
+import threading
+import time
+from typing import List, Literal, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+ReplicaStrategy = Literal["round_robin", "least_connections"]
+
+
+class Replica:
+    __slots__ = ("name", "engine", "session_factory", "in_use", "ejected_until")
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+        )
+        # このレプリカのセッションを使っている処理の数（least_connectionsで使う）
+        self.in_use = 0
+        self.ejected_until = 0.0
+
+
+class ReplicaSet:
+    """
+    読み取り専用レプリカの選択
+
+    `strategy` は round_robin（順番に割り当てる）か least_connections（使用中の
+    セッションが最も少ないものを選ぶ）。接続できない・切断されたなどのエラーが
+    起きたレプリカは `eject_seconds` 秒間候補から外し、その後また割り当てる。
+    使えるレプリカがない場合、`checkout` はNoneを返す（呼び出し側はプライマリを使う）
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[Engine],
+        strategy: ReplicaStrategy = "round_robin",
+        eject_seconds: float = 30.0,
+    ):
+        self.strategy = strategy
+        self.eject_seconds = eject_seconds
+        self.replicas: List[Replica] = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        for engine in engines:
+            self.add(engine)
+
+    def add(self, engine: Engine) -> Replica:
+        """
+        レプリカを追加する（エンジンを起動時に作成する場合に使う）
+        """
+        replica = Replica(f"replica{len(self.replicas)}", engine)
+        event.listen(
+            engine,
+            "handle_error",
+            lambda context: self._on_error(replica, context),
+        )
+        # 選択中のスレッドが途中の状態を見ないよう、リストごと差し替える
+        self.replicas = self.replicas + [replica]
+        return replica
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def healthy(self) -> List[Replica]:
+        now = time.monotonic()
+        return [r for r in self.replicas if r.ejected_until <= now]
+
+    def checkout(self) -> Optional[Replica]:
+        """
+        レプリカを1つ選んで使用中にする。使い終わったら `release` を呼ぶこと
+        """
+        candidates = self.healthy()
+        if not candidates:
+            return None
+        with self._lock:
+            if self.strategy == "least_connections":
+                replica = min(candidates, key=lambda r: r.in_use)
+            else:
+                replica = candidates[next(self._counter) % len(candidates)]
+            replica.in_use += 1
+        return replica
+
+    def release(self, replica: Replica) -> None:
+        with self._lock:
+            replica.in_use -= 1
+
+    def eject(self, replica: Replica) -> None:
+        if replica.ejected_until <= time.monotonic():
+            logger.warning(
+                "レプリカ %s を%.0f秒間読み取りの対象から外します",
+                replica.name,
+                self.eject_seconds,
+            )
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+
+    def _on_error(self, replica: Replica, context) -> None:
+        # SQLの誤りやタイムアウトではなく、接続の問題の場合だけ外す
+        # （connection が None なのは新しい接続を開けなかった場合）
+        if context.is_disconnect or context.connection is None:
+            self.eject(replica)
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
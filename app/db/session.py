@@ -1,10 +1,194 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import Settings, settings
+from app.core.metrics import register_engine
+from app.db import query_stats
+from app.db.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    install_idle_pre_ping,
+)
+from app.db.replicas import ReplicaSet
+
+# リクエストごとのSQL文の集計（app/middleware/query_stats.py）
+query_stats.install()
+
+
+def _server_settings(config: Settings) -> Dict[str, str]:
+    # 接続時に設定するPostgreSQLのパラメータ（0は設定しない）
+    values = {
+        "statement_timeout": config.DB_STATEMENT_TIMEOUT_MS,
+        "idle_in_transaction_session_timeout": config.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS,
+    }
+    return {name: str(value) for name, value in values.items() if value > 0}
+
+
+def engine_options(config: Settings, url: str, *, is_async: bool) -> Dict[str, Any]:
+    """
+    設定から create_engine / create_async_engine に渡す引数を組み立てる
+    """
+    connect_args: Dict[str, Any] = {}
+    if config.DB_PGBOUNCER:
+        # 接続はPgBouncerがプールする。トランザクションごとにサーバー側の接続が
+        # 変わるため、プリペアドステートメントを接続にキャッシュしない
+        options: Dict[str, Any] = {
+            "poolclass": NullPool,
+            "pool_pre_ping": config.DB_POOL_PRE_PING == "always",
+        }
+        if is_async:
+            connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+    else:
+        pool_class = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+        options = {
+            "poolclass": pool_class,
+            "pool_size": config.DB_POOL_SIZE,
+            "max_overflow": config.DB_MAX_OVERFLOW,
+            "pool_timeout": config.DB_POOL_TIMEOUT,
+            "pool_recycle": config.DB_POOL_RECYCLE,
+            "pool_pre_ping": config.DB_POOL_PRE_PING == "always",
+        }
+        server_settings = _server_settings(config)
+        if server_settings and make_url(url).get_backend_name() == "postgresql":
+            if is_async:
+                connect_args["server_settings"] = server_settings
+            else:
+                connect_args["options"] = " ".join(
+                    f"-c {name}={value}" for name, value in server_settings.items()
+                )
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def worker_pool_size(config: Settings, workers: int) -> Tuple[int, int]:
+    """
+    DB_MAX_CONNECTIONS をワーカー数で分けた、エンジンごとの
+    (DB_POOL_SIZE, DB_MAX_OVERFLOW)。各ワーカーは同期・非同期の2つのエンジンを持つ
+    """
+    if config.DB_MAX_CONNECTIONS <= 0:
+        return config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW
+    per_engine = max(1, config.DB_MAX_CONNECTIONS // (workers * 2))
+    pool_size = max(1, per_engine // 2)
+    return pool_size, per_engine - pool_size
+
+
+def _install_pre_ping(config: Settings, engine: Engine) -> None:
+    if config.DB_POOL_PRE_PING == "idle" and not config.DB_PGBOUNCER:
+        install_idle_pre_ping(engine, config.DB_POOL_PRE_PING_IDLE_SECONDS)
+
+
+def make_engine(
+    config: Settings, url: Optional[str] = None, logging_name: str = "sync"
+) -> Engine:
+    url = url or config.SQLALCHEMY_DATABASE_URI
+    engine = create_engine(
+        url,
+        pool_logging_name=logging_name,
+        **engine_options(config, url, is_async=False),
+    )
+    _install_pre_ping(config, engine)
+    return engine
+
+
+def make_async_engine(config: Settings) -> AsyncEngine:
+    url = config.SQLALCHEMY_ASYNC_DATABASE_URI
+    engine = create_async_engine(
+        url, pool_logging_name="async", **engine_options(config, url, is_async=True)
+    )
+    _install_pre_ping(config, engine.sync_engine)
+    return engine
+
+
+class LazySessionMaker(sessionmaker):
+    """
+    最初のセッションを作るときにエンジンを作成する sessionmaker。
+    アプリでは lifespan の `init_engines` で先に作成するため、スクリプトなど
+    lifespan を通らない場合のためのもの
+    """
+
+    def __call__(self, **local_kw: Any) -> Session:
+        init_engines()
+        return super().__call__(**local_kw)
+
+
+class LazyAsyncSessionMaker(async_sessionmaker):
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        init_engines()
+        return super().__call__(**local_kw)
+
+
+# エンジン（とDBドライバのimport）は `init_engines` まで作成しない。
+# app.main をimportしただけではDBに関わる処理を行わないようにする
+engine: Optional[Engine] = None
+async_engine: Optional[AsyncEngine] = None
+_engines_lock = threading.Lock()
+
+# コミット後に読み込み済みの属性を破棄しない（一括処理の結果などを
+# コミット後に参照しても1行ずつ再SELECTされないようにする）
+SessionLocal = LazySessionMaker(
+    autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+# 読み取り専用レプリカ（v1のGETエンドポイントが使う。app/api/deps.py の get_read_db）
+read_replicas = ReplicaSet(
+    [],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    eject_seconds=settings.DB_REPLICA_EJECT_SECONDS,
+)
+
+# 非同期エンジン（asyncpg）。非同期セッションではコミット後の暗黙的な
+# 再読み込みができないため expire_on_commit=False にする
+AsyncSessionLocal = LazyAsyncSessionMaker(autoflush=False, expire_on_commit=False)
+
+
+def init_engines(config: Settings = settings) -> None:
+    """
+    エンジンを作成してセッションファクトリに設定する（2回目以降は何もしない）
+    """
+    global engine, async_engine
+    if engine is not None:
+        return
+    with _engines_lock:
+        if engine is not None:
+            return
+        sync_engine = make_engine(config)
+        register_engine("sync", sync_engine)
+        SessionLocal.configure(bind=sync_engine)
+
+        for i, url in enumerate(config.DB_REPLICA_URLS):
+            replica = read_replicas.add(
+                make_engine(config, url, logging_name=f"replica{i}")
+            )
+            register_engine(replica.name, replica.engine)
+
+        async_engine = make_async_engine(config)
+        register_engine("async", async_engine.sync_engine)
+        AsyncSessionLocal.configure(bind=async_engine)
+        engine = sync_engine
+
 
-from app.core.config import settings
+async def dispose_engines() -> None:
+    """
+    コネクションプールの接続を閉じる（エンジンはそのまま使える）
+    """
+    if engine is None:
+        return
+    engine.dispose()
+    read_replicas.dispose()
+    await async_engine.dispose()
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
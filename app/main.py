@@ -1,8 +1,43 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
+from app.api.v2.router import api_router as api_v2_router
+from app.core import security
 from app.core.config import settings
+from app.core.metrics import registry
+from app.db.session import SessionLocal, dispose_engines, init_engines
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.services import token_revocation
+from app.utils import metrics
+from app.utils.etag import ETAG_HEADER, etag_matches
+from app.utils.serialization import default_response_class
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # DBのエンジンと鍵はimport時ではなくここで用意する（importを速くするため）
+    init_engines()
+    security.init_crypto()
+    # 失効したトークンを読み込んでから受け付けを始め、以降は定期的に差分を読み込む
+    # （失効の判定は新しく失効したものが反映されるまで最大でこの間隔だけ遅れる）
+    if settings.TOKEN_REVOCATION_SYNC_SECONDS > 0:
+        await run_in_threadpool(token_revocation.sync_once, SessionLocal)
+        token_revocation.start_sync(
+            SessionLocal, settings.TOKEN_REVOCATION_SYNC_SECONDS
+        )
+    yield
+    token_revocation.stop_sync()
+    # bcrypt用のプロセスプールを停止
+    security.shutdown_password_executor()
+    await dispose_engines()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -11,6 +46,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
+    default_response_class=default_response_class(),
 )
 
 # CORSミドルウェアの設定
@@ -20,15 +57,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # ページング用のレスポンスヘッダー（次ページのカーソル、総件数）をブラウザから読めるようにする
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
+# リクエストごとのSQL文の数を集計し、同じ文の繰り返し（N+1）を警告する
+app.add_middleware(QueryStatsMiddleware)
+
+# 書き込んだ直後のクライアントの読み取りをプライマリで処理する（読み取りレプリカ用）
+app.add_middleware(ReadYourWritesMiddleware)
+
+# レスポンスの本文を圧縮する。件数の多いエクスポートは速さを優先して低いレベルにする
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        level=settings.COMPRESSION_LEVEL,
+        route_levels={
+            f"{settings.API_V1_STR}/items/export": 1,
+            f"{settings.API_V2_STR}/items/export": 1,
+        },
+    )
+
+# ルートごとのレイテンシなどを記録する（CORSを含めた処理時間を計測するため最後に追加する）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # APIルーターを含める
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(api_v2_router, prefix=settings.API_V2_STR)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to FastAPI Template"}
 
+
+@app.get("/.well-known/jwks.json", include_in_schema=False)
+async def read_jwks(request: Request) -> Response:
+    """
+    トークンの検証用の公開鍵（JWK Set）。他のサービスはこれを取得してトークンを
+    自分で検証する。本文は起動時に作成したものを返す
+    """
+    key_set = security.get_key_set()
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        ETAG_HEADER: key_set.jwks_etag,
+    }
+    if etag_matches(request.headers.get("If-None-Match"), key_set.jwks_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        key_set.jwks_body, media_type="application/json", headers=headers
+    )
+
+
+if settings.METRICS_ENABLED:
+
+    @app.get(settings.METRICS_PATH, include_in_schema=False)
+    async def read_metrics() -> Response:
+        """
+        Prometheus形式のメトリクス（スレッドプールの状態を読むためイベントループ上で実行する）
+        """
+        return Response(registry.render(), media_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
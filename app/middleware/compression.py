@@ -0,0 +1,178 @@
+import os
+from typing import Callable, Dict, Optional, Sequence
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import (
+    Compressor,
+    available_encodings,
+    make_compressor,
+    negotiate_encoding,
+)
+
+# 圧縮するContent-Type（画像などすでに圧縮されている形式は対象外）
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+# これより大きい本文はスレッドで圧縮し、イベントループを止めない
+# （zlib・brotli・zstandardは圧縮中にGILを解放する）
+OFFLOAD_THRESHOLD = 64 * 1024
+
+# 圧縮に使うスレッド数の上限。同期エンドポイント用のスレッドプールを使い切らない
+_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith(
+        ("+json", "+xml")
+    )
+
+
+async def _run(fn: Callable[[bytes], bytes], data: bytes) -> bytes:
+    global _limiter
+    if len(data) < OFFLOAD_THRESHOLD:
+        return fn(data)
+    if _limiter is None:
+        _limiter = anyio.CapacityLimiter(os.cpu_count() or 1)
+    return await anyio.to_thread.run_sync(fn, data, limiter=_limiter)
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding に応じてレスポンスの本文を圧縮するASGIミドルウェア
+
+    gzipに加え、brotli・zstandardがインストールされていれば br・zstd も使う。
+    `minimum_size` バイト未満の本文は圧縮しない。圧縮レベル（1〜9）は
+    `route_levels` でルート（パスのテンプレート）ごとに変えられる。
+    ストリーミングのレスポンス（エクスポートなど）は受け取った分ずつ圧縮して送る
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        level: int = 6,
+        route_levels: Optional[Dict[str, int]] = None,
+        encodings: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        self.route_levels = route_levels or {}
+        self.encodings = list(encodings or available_encodings())
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding"), self.encodings
+        )
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    def level_for(self, scope: Scope) -> int:
+        # ルーティング後、scopeにはFastAPIが一致したルートを設定している
+        template = getattr(scope.get("route"), "path_format", None)
+        return self.route_levels.get(template, self.level)
+
+
+class _CompressionResponder:
+    """
+    1つのレスポンスの送信を仲介する。ヘッダーは最初の本文を見てから
+    （圧縮するかどうか決めてから）送る
+    """
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        send: Send,
+        encoding: Optional[str],
+    ) -> None:
+        self.middleware = middleware
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.start: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self._begin(start, message)
+            return
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        compress = self.compressor.compress if more_body else self.compressor.finish
+        body = await _run(compress, message.get("body", b""))
+        if body or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": body, "more_body": more_body}
+            )
+
+    async def _begin(self, start: Message, message: Message) -> None:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        start = {**start, "headers": headers.raw}
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self._should_compress(start["status"], headers, body, more_body):
+            await self._send(start)
+            await self._send(message)
+            return
+
+        self.compressor = make_compressor(
+            self.encoding, self.middleware.level_for(self.scope)
+        )
+        headers["Content-Encoding"] = self.encoding
+        # 圧縮した本文は元の本文とバイト列が異なるため、弱いETagにする
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if more_body:
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            body = await _run(self.compressor.compress, body)
+        else:
+            body = await _run(self.compressor.finish, body)
+            headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
+
+    def _should_compress(
+        self, status: int, headers: MutableHeaders, body: bytes, more_body: bool
+    ) -> bool:
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return False
+        if not _is_compressible(headers.get("content-type", "")):
+            return False
+        # 圧縮するかどうかがAccept-Encodingによって変わることをキャッシュに伝える
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is None:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        if more_body:
+            size = headers.get("content-length")
+            return size is None or int(size) >= self.middleware.minimum_size
+        return len(body) >= self.middleware.minimum_size
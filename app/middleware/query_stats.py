@@ -0,0 +1,36 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.db.query_stats import track_queries
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Query-Time-Ms"
+
+
+class QueryStatsMiddleware:
+    """
+    リクエストごとにSQL文の数とDBの処理時間を集計するASGIミドルウェア
+
+    `DEBUG` が有効な場合はレスポンスヘッダーで返す（ストリーミングのレスポンスでは
+    ヘッダーを送るまでに実行された分だけが含まれる）
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    headers = MutableHeaders(scope=message)
+                    headers[QUERY_COUNT_HEADER] = str(stats.count)
+                    headers[QUERY_TIME_HEADER] = f"{stats.duration * 1000:.2f}"
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
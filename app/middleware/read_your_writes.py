@@ -0,0 +1,29 @@
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.services import read_your_writes
+
+
+class ReadYourWritesMiddleware:
+    """
+    書き込み（GET/HEAD/OPTIONS以外）のリクエストを受けたクライアントを記録し、
+    しばらくの間その読み取りをレプリカではなくプライマリで処理させるASGIミドルウェア
+
+    処理の開始時と終了時の両方で記録するため、時間のかかる書き込みでも
+    完了直後の読み取りがレプリカの遅延で古い値を返さない
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in read_your_writes.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        read_your_writes.record_write(connection)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            read_your_writes.record_write(connection)
@@ -1,17 +1,84 @@
 import uuid
-from sqlalchemy import Column, ForeignKey, String
+from sqlalchemy import DDL, BigInteger, Column, ForeignKey, Index, String, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.db.session import Base
+from app.models.mixins import VersionMixin
 
 
-class Item(Base):
+class Item(VersionMixin, Base):
     __tablename__ = "items"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String, index=True)
-    description = Column(String, index=True)
+    description = Column(String)
     owner_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     
-    owner = relationship("User", back_populates="items")
\ No newline at end of file
+    owner = relationship("User", back_populates="items")
+
+    __table_args__ = (
+        # get_multi_by_owner のキーセットページング（owner_id = ? AND id > ? ORDER BY id）用。
+        # owner_id 単独の検索（外部キーの参照チェックを含む）にも使われる
+        Index("ix_items_owner_id_id", "owner_id", "id"),
+    )
+
+
+class ItemCount(Base):
+    """
+    所有者ごとのアイテム数（一覧APIの `X-Total-Count` の counter モード用）
+
+    アイテムを作成・削除するCRUD操作（app/crud/crud_item.py）が同じトランザクションで
+    増減させる。CRUDを通さずに items を変更した場合はずれるため、数え直すこと
+    """
+
+    __tablename__ = "item_counts"
+
+    owner_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    item_count = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+
+# 全文検索用のオブジェクト（マイグレーション d41b7c9e2f63 と同じもの）。
+# ORMのモデルには含めず、テーブル作成時にDBの種類に応じて作成する
+
+# PostgreSQL: title と description から生成する tsvector 列とGINインデックス
+for statement in (
+    "ALTER TABLE items ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, ''))) "
+    "STORED",
+    "CREATE INDEX ix_items_search_vector ON items USING gin (search_vector)",
+):
+    event.listen(
+        Item.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql")
+    )
+
+# SQLite（テスト用）: items を外部コンテンツとするFTS5の仮想テーブルとトリガー
+for statement in (
+    "CREATE VIRTUAL TABLE items_fts USING fts5("
+    "title, description, content='items', content_rowid='rowid')",
+    "CREATE TRIGGER items_fts_ai AFTER INSERT ON items BEGIN "
+    "INSERT INTO items_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+    "CREATE TRIGGER items_fts_ad AFTER DELETE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); END",
+    "CREATE TRIGGER items_fts_au AFTER UPDATE ON items BEGIN "
+    "INSERT INTO items_fts(items_fts, rowid, title, description) "
+    "VALUES ('delete', old.rowid, old.title, old.description); "
+    "INSERT INTO items_fts(rowid, title, description) "
+    "VALUES (new.rowid, new.title, new.description); END",
+):
+    event.listen(
+        Item.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite")
+    )
+
+# トリガーは items と一緒に削除されるが、仮想テーブルは残るため先に削除する
+event.listen(
+    Item.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS items_fts").execute_if(dialect="sqlite"),
+)
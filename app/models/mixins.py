@@ -0,0 +1,23 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, func
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class VersionMixin:
+    """
+    行のバージョン（ETagと楽観的排他制御に使う）と最終更新日時
+
+    version は CRUD の更新処理で1ずつ増やす（app.crud.base.get_version_values）
+    """
+
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=utcnow,
+        server_default=func.now(),
+    )
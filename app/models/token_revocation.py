@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, String
+
+from app.db.session import Base
+from app.models.mixins import utcnow
+
+
+class TokenRevocation(Base):
+    """
+    失効したトークン（ログアウトしたアクセストークン、使用済みのリフレッシュトークン）
+
+    各ワーカーは revoked_at が新しい行だけを定期的に読み込み、プロセス内の
+    集合（app/services/token_revocation.py）で判定する。expires_at を過ぎた行は
+    トークン自体が期限切れで使えないため削除してよい
+    """
+
+    __tablename__ = "token_revocations"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(
+        DateTime(timezone=True), nullable=False, default=utcnow, index=True
+    )
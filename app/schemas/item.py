@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -26,10 +26,41 @@ class ItemInDBBase(ItemBase):
     title: str
     owner_id: UUID
 
-    class ConfigDict:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # APIを通じて返すアイテム情報
 class Item(ItemInDBBase):
-    pass
\ No newline at end of file
+    pass
+
+
+# 一括更新時のプロパティ（更新対象のidを含む）
+class ItemBulkUpdate(ItemUpdate):
+    id: UUID
+
+
+# 一括削除のリクエスト
+class ItemBulkDelete(BaseModel):
+    ids: List[UUID]
+
+
+# 一括操作の行ごとの結果
+class ItemBulkResult(BaseModel):
+    id: UUID
+    status: Literal["created", "updated", "deleted", "not_found", "forbidden"]
+    item: Optional[Item] = None
+
+
+# インポートで取り込めなかった行（line はファイル内の行番号）
+class ItemImportError(BaseModel):
+    line: int
+    errors: List[str]
+
+
+# インポートの結果
+class ItemImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ItemImportError] = []
+    # エラーが IMPORT_MAX_ERRORS 件を超え、一部を省略した場合はTrue
+    errors_truncated: bool = False
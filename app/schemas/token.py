@@ -1,5 +1,4 @@
 from typing import Optional
-from uuid import UUID
 
 from pydantic import BaseModel
 
@@ -7,7 +6,20 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    # 指定するとリフレッシュトークンも失効させる
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
-    sub: Optional[str] = None  # UUIDを文字列として扱う
\ No newline at end of file
+    sub: Optional[str] = None  # UUIDを文字列として扱う
+    jti: Optional[str] = None
+    type: Optional[str] = None
+    exp: Optional[int] = None
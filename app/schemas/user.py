@@ -27,8 +27,7 @@ class UserUpdate(UserBase):
 class UserInDBBase(UserBase):
     id: Optional[UUID] = None
 
-    class ConfigDict:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # APIを通じて返すユーザー情報
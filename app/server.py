@@ -0,0 +1,258 @@
+"""
+本番用のサーバー（プリフォーク）
+
+アプリを読み込んでからワーカープロセスをforkし、全ワーカーで1つの待ち受けソケットを
+共有する。ワーカーは一定のリクエスト数・RSSを超えると処理中のリクエストを終えてから
+終了し、マスターが新しいワーカーを起動する。開発時は従来どおり
+`uvicorn app.main:app --reload` を使う。
+
+    python -m app.server
+    python -m app.server --workers 8 --port 8080
+"""
+import argparse
+import importlib.util
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.db.session import worker_pool_size
+
+logger = logging.getLogger("uvicorn.error")
+
+APP = "app.main:app"
+
+# ワーカーの起動（lifespan）に失敗したときの終了コード。再起動しても同じため、
+# マスターごと終了する
+STARTUP_FAILURE = 3
+
+# 起動直後に異常終了したワーカーを起動し直すまでの待ち時間（秒）
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def default_workers() -> int:
+    try:
+        # コンテナなどでCPUが制限されている場合は使えるCPUの数
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _rss_bytes() -> int:
+    """
+    このプロセスのRSS（Linux以外では最大RSS）
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    RSSが `max_rss_bytes` を超えたら、リクエスト数の上限（limit_max_requests）と
+    同じく新しい接続の受け付けをやめ、処理中のリクエストを終えてから終了する
+    """
+
+    def __init__(self, config: uvicorn.Config, max_rss_bytes: int = 0):
+        super().__init__(config)
+        self.max_rss_bytes = max_rss_bytes
+
+    async def on_tick(self, counter: int) -> bool:
+        if self.max_rss_bytes and counter % 10 == 0 and not self.should_exit:
+            rss = _rss_bytes()
+            if rss > self.max_rss_bytes:
+                logger.info(
+                    "RSSが上限を超えたためワーカーを入れ替えます（%.0fMB）",
+                    rss / 1024 / 1024,
+                )
+                self.should_exit = True
+        return await super().on_tick(counter)
+
+
+class Arbiter:
+    """
+    ワーカーを起動・監視するマスタープロセス
+
+    ワーカーが終了すると（入れ替え・異常終了）新しいワーカーを起動する。
+    SIGTERM / SIGINT を受けるとワーカーに SIGTERM を送り、処理中のリクエストの完了を
+    `graceful_timeout` 秒待ってから、残ったワーカーを強制終了する
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        max_rss_bytes: int = 0,
+        graceful_timeout: int = 30,
+    ):
+        self.config = config
+        self.num_workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_rss_bytes = max_rss_bytes
+        self.graceful_timeout = graceful_timeout
+        # pid -> 起動した時刻
+        self.workers: Dict[int, float] = {}
+        self.socket: Optional[socket.socket] = None
+        self.should_exit = False
+        self.exit_code = 0
+
+    def run(self) -> int:
+        self.socket = self.config.bind_socket()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._handle_exit)
+        logger.info("マスタープロセス [%d]、ワーカー数 %d", os.getpid(), self.num_workers)
+
+        for _ in range(self.num_workers):
+            self.spawn()
+        while not self.should_exit:
+            self.reap()
+            time.sleep(0.1)
+        self.stop()
+        return self.exit_code
+
+    def _handle_exit(self, sig: int, frame) -> None:
+        self.should_exit = True
+
+    def spawn(self) -> None:
+        # 乱数はfork前に引く（fork後はすべてのワーカーで同じ値になるため）
+        max_requests = None
+        if self.max_requests > 0:
+            max_requests = self.max_requests + random.randint(
+                0, max(0, self.max_requests_jitter)
+            )
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = self._run_worker(max_requests)
+            except BaseException:
+                logger.exception("ワーカーが異常終了しました")
+            finally:
+                # マスターの後処理（atexitなど）を実行しない
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+
+    def _run_worker(self, max_requests: Optional[int]) -> int:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        self.config.limit_max_requests = max_requests
+        server = WorkerServer(self.config, max_rss_bytes=self.max_rss_bytes)
+        server.run(sockets=[self.socket])
+        return 0 if server.started else STARTUP_FAILURE
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started_at = self.workers.pop(pid, None)
+            if started_at is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code == STARTUP_FAILURE:
+                logger.error("ワーカー [%d] の起動に失敗したため終了します", pid)
+                self.should_exit = True
+                self.exit_code = 1
+                return
+            if code != 0:
+                logger.warning("ワーカー [%d] が終了しました（終了コード %d）", pid, code)
+                if time.monotonic() - started_at < RESTART_BACKOFF_SECONDS:
+                    time.sleep(RESTART_BACKOFF_SECONDS)
+            if not self.should_exit:
+                self.spawn()
+
+    def stop(self) -> None:
+        for pid in self.workers:
+            self._kill(pid, signal.SIGTERM)
+        # lifespan の終了処理の分だけ余裕を持たせる
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                break
+            if pid == 0:
+                time.sleep(0.1)
+            else:
+                self.workers.pop(pid, None)
+        for pid in self.workers:
+            logger.warning("ワーカー [%d] を強制終了します", pid)
+            self._kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        self.socket.close()
+
+    @staticmethod
+    def _kill(pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.WEB_CONCURRENCY or default_workers()
+    )
+    args = parser.parse_args()
+    workers = max(1, args.workers)
+
+    # ワーカーのエンジンはlifespanで作られるため、fork前に設定を変えれば反映される
+    settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW = worker_pool_size(
+        settings, workers
+    )
+    config = uvicorn.Config(
+        APP,
+        host=args.host,
+        port=args.port,
+        # あれば uvloop / httptools を使う
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+    # fork前にアプリを読み込み、各ワーカーでのimportを省く（DBの接続やスレッドは
+    # lifespanで作られるため、fork前には存在しない）
+    config.load()
+    logger.info(
+        "loop=%s http=%s、DBプール %d + %d（エンジンごと）",
+        config.loop,
+        config.http,
+        settings.DB_POOL_SIZE,
+        settings.DB_MAX_OVERFLOW,
+    )
+
+    arbiter = Arbiter(
+        config,
+        workers,
+        max_requests=settings.SERVER_MAX_REQUESTS,
+        max_requests_jitter=settings.SERVER_MAX_REQUESTS_JITTER,
+        max_rss_bytes=settings.SERVER_MAX_RSS_MB * 1024 * 1024,
+        graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+    )
+    sys.exit(arbiter.run())
+
+
+if __name__ == "__main__":
+    main()
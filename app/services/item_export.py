@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Literal, Sequence
+
+from sqlalchemy import Row
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = ("id", "title", "description", "owner_id")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_chunk(rows: Sequence[Row]) -> bytes:
+    lines = [
+        json.dumps(
+            {
+                "id": str(row.id),
+                "title": row.title,
+                "description": row.description,
+                "owner_id": str(row.owner_id) if row.owner_id else None,
+            },
+            ensure_ascii=False,
+        )
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _csv_chunk(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def _header(format: ExportFormat) -> bytes:
+    if format == "csv":
+        return _csv_chunk([EXPORT_FIELDS])
+    return b""
+
+
+def _encode(format: ExportFormat, rows: Sequence[Row]) -> bytes:
+    return _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows)
+
+
+def export_disposition(format: ExportFormat) -> str:
+    return f'attachment; filename="items.{format}"'
+
+
+def iter_export(
+    partitions: Iterable[Sequence[Row]], format: ExportFormat
+) -> Iterator[bytes]:
+    """
+    CRUDから受け取った行のまとまりを、まとまりごとに1つのチャンクへ変換する
+    （保持するのは常に1まとまり分だけなので、件数に関係なくメモリ使用量は一定）
+    """
+    header = _header(format)
+    if header:
+        yield header
+    for rows in partitions:
+        yield _encode(format, rows)
+
+
+async def aiter_export(
+    partitions: AsyncIterable[Sequence[Row]], format: ExportFormat
+) -> AsyncIterator[bytes]:
+    header = _header(format)
+    if header:
+        yield header
+    async for rows in partitions:
+        yield _encode(format, rows)
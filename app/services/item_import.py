@@ -0,0 +1,228 @@
+import codecs
+import csv
+import io
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+
+from app.crud.crud_item import item as crud_item
+from app.models.item import Item
+from app.schemas.item import ItemCreate, ItemImportError, ItemImportResult
+from app.services.item_export import ExportFormat
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = ExportFormat
+
+IMPORT_COLUMNS = ("id", "title", "description", "owner_id")
+
+# (行番号, 行の内容) または (行番号, 解析エラー)
+ParsedRow = Tuple[int, Any]
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    バイト列のチャンクを行に分割する（改行を含めて返す）。
+    保持するのは最後の未完了の行だけなので、入力全体をメモリに読み込まない
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        # 最後の要素は改行で終わっていない（次のチャンクに続く）行
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _iter_ndjson(lines: Iterable[str]) -> Iterator[ParsedRow]:
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"JSONとして解析できません: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield line_no, ValueError("各行はJSONオブジェクトである必要があります")
+            continue
+        yield line_no, data
+
+
+def _iter_csv(lines: Iterable[str]) -> Iterator[ParsedRow]:
+    reader = csv.DictReader(lines)
+    # 1行目はヘッダー
+    line_no = 1
+    while True:
+        try:
+            data = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, ValueError(f"CSVとして解析できません: {e}")
+        else:
+            # 空欄はNoneとして扱う（エクスポートしたCSVをそのまま取り込めるように）
+            yield line_no + 1, {k: (v if v != "" else None) for k, v in data.items()}
+        line_no = reader.line_num
+
+
+def _validate(
+    rows: Iterable[ParsedRow],
+    owner_id: uuid.UUID,
+    on_error: Callable[[int, List[str]], None],
+) -> Iterator[Dict[str, Any]]:
+    for line_no, data in rows:
+        if isinstance(data, Exception):
+            on_error(line_no, [str(data)])
+            continue
+        try:
+            item_in = ItemCreate.model_validate(data)
+        except ValidationError as e:
+            on_error(
+                line_no,
+                [
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                    for err in e.errors()
+                ],
+            )
+            continue
+        yield {
+            "id": uuid.uuid4(),
+            "title": item_in.title,
+            "description": item_in.description,
+            "owner_id": owner_id,
+        }
+
+
+class _ExecutemanyLoader:
+    """
+    COPYが使えないDB（テスト用のSQLiteなど）向け。まとまりごとにexecutemanyでINSERTする
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load(self, rows: List[Dict[str, Any]]) -> None:
+        self.db.execute(insert(Item), rows)
+
+    def finish(self) -> None:
+        pass
+
+
+class _CopyLoader:
+    """
+    PostgreSQL（psycopg2）向け。まとまりごとに `COPY ... FROM STDIN` で一時テーブルに
+    書き込み、最後に1回の INSERT ... SELECT で items に反映する
+    """
+
+    staging_table = "items_import"
+
+    def __init__(self, db: Session):
+        self.db = db
+        db.execute(
+            text(
+                f"CREATE TEMP TABLE {self.staging_table} "
+                "(LIKE items INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        )
+        self.cursor = db.connection().connection.dbapi_connection.cursor()
+
+    def load(self, rows: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in IMPORT_COLUMNS])
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            f"COPY {self.staging_table} ({', '.join(IMPORT_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+    def finish(self) -> None:
+        self.cursor.close()
+        columns = ", ".join(IMPORT_COLUMNS)
+        self.db.execute(
+            text(
+                f"INSERT INTO items ({columns}) "
+                f"SELECT {columns} FROM {self.staging_table}"
+            )
+        )
+
+
+def _get_loader(db: Session):
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        return _CopyLoader(db)
+    return _ExecutemanyLoader(db)
+
+
+def import_items(
+    db: Session,
+    chunks: Iterable[bytes],
+    *,
+    format: ImportFormat,
+    owner_id: uuid.UUID,
+    batch_size: int,
+    max_errors: int,
+    progress: Optional[Callable[[ItemImportResult], None]] = None,
+) -> ItemImportResult:
+    """
+    NDJSON/CSVのチャンクを読みながら ItemCreate で検証し、`batch_size` 行ずつDBへ書き込む
+
+    検証に失敗した行は取り込まずに行番号とエラーを記録する（最大 `max_errors` 件）。
+    書き込みは1つのトランザクションで行い、DBエラーの場合は何も取り込まれない
+    """
+    result = ItemImportResult()
+    started = time.perf_counter()
+
+    def on_error(line_no: int, errors: List[str]) -> None:
+        result.failed += 1
+        if len(result.errors) < max_errors:
+            result.errors.append(ItemImportError(line=line_no, errors=errors))
+        else:
+            result.errors_truncated = True
+
+    def report() -> None:
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "item import: %d imported, %d failed (%.0f rows/s)",
+            result.imported,
+            result.failed,
+            (result.imported + result.failed) / elapsed if elapsed else 0,
+        )
+        if progress:
+            progress(result)
+
+    lines = _iter_lines(chunks)
+    parsed = _iter_csv(lines) if format == "csv" else _iter_ndjson(lines)
+    try:
+        loader = _get_loader(db)
+        batch: List[Dict[str, Any]] = []
+        for row in _validate(parsed, owner_id, on_error):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                loader.load(batch)
+                result.imported += len(batch)
+                batch = []
+                report()
+        if batch:
+            loader.load(batch)
+            result.imported += len(batch)
+        loader.finish()
+        crud_item.adjust_owner_counts(db, {owner_id: result.imported})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    report()
+    return result
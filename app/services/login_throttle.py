@@ -0,0 +1,51 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.core.exceptions import TooManyRequestsError
+from app.utils.rate_limit import (
+    InMemoryTokenBuckets,
+    TokenBucketBackend,
+    TokenBucketLimiter,
+    retry_after_seconds,
+)
+
+# プロセス内のバケットのため、制限はワーカーごとにかかる。
+# ワーカー間で共有する場合は configure_backend で共有ストアの実装に差し替える
+login_buckets = InMemoryTokenBuckets(maxsize=settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+email_limiter = TokenBucketLimiter(
+    capacity=settings.LOGIN_RATE_LIMIT_EMAIL_BURST,
+    per_second=settings.LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE / 60,
+    backend=login_buckets,
+    prefix="email:",
+)
+ip_limiter = TokenBucketLimiter(
+    capacity=settings.LOGIN_RATE_LIMIT_IP_BURST,
+    per_second=settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE / 60,
+    backend=login_buckets,
+    prefix="ip:",
+)
+
+
+def configure_backend(backend: TokenBucketBackend) -> None:
+    for limiter in (email_limiter, ip_limiter):
+        limiter.backend = backend
+
+
+def check_login_attempt(email: str, client_ip: Optional[str]) -> None:
+    """
+    ログイン試行を1回分数え、上限を超えていれば429を返す
+
+    DBの参照やbcryptの前に呼ぶことで、総当たり攻撃でCPUを使い切られないようにする
+    """
+    wait = max(ip_limiter.hit(client_ip), email_limiter.hit(email.strip().lower()))
+    if wait > 0:
+        raise TooManyRequestsError(
+            detail="ログインの試行回数が多すぎます。しばらくしてから再度お試しください",
+            retry_after=retry_after_seconds(wait),
+        )
+
+
+def clear() -> None:
+    for limiter in (email_limiter, ip_limiter):
+        limiter.backend.clear()
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from app.core.config import settings
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    認証済みユーザーの軽量な表現（セッションから切り離されたオブジェクト）
+
+    認可の判定に必要な属性だけを持つ。ORMのUserが必要な処理では
+    `crud.user.get(db, id=principal.id)` で取得し直すこと。
+    """
+
+    id: UUID
+    email: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+# プロセス内のキャッシュのため、他のワーカーでの変更はTTLが切れるまで反映されない
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+# これらの属性が変わったときはキャッシュを破棄する
+PRINCIPAL_FIELDS = ("email", "is_active", "is_superuser")
+
+
+def get_cached_principal(user_id: UUID) -> Optional[Principal]:
+    return principal_cache.get(user_id)
+
+
+def cache_principal(user: User) -> Principal:
+    principal = Principal.from_user(user)
+    principal_cache.set(principal.id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    principal_cache.pop(user_id)
@@ -0,0 +1,51 @@
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# 直近に書き込みを行ったクライアント。プロセス内に保持するため、
+# 別のワーカーに振り分けられたリクエストはレプリカから読む場合がある
+recent_writers = TTLCache(
+    maxsize=settings.DB_READ_YOUR_WRITES_MAX_CLIENTS,
+    ttl=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
+
+def client_key(request: HTTPConnection) -> Optional[str]:
+    """
+    同じトークンを使うクライアントを同じ書き手とみなす。トークンのない書き込み
+    （ユーザーの作成など）は接続元のアドレスで区別する。プロキシの背後では
+    複数のクライアントが同じアドレスになるが、プライマリから読む範囲が広がるだけで
+    古い値を返すことはない
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return authorization
+    if request.client is not None:
+        return f"client:{request.client.host}"
+    return None
+
+
+def record_write(request: HTTPConnection) -> None:
+    """
+    書き込みのリクエストなら、そのクライアントの読み取りをしばらくプライマリに向ける
+    """
+    ttl = settings.DB_READ_YOUR_WRITES_SECONDS
+    if request.scope["method"] in SAFE_METHODS or ttl <= 0:
+        return
+    key = client_key(request)
+    if key is not None:
+        recent_writers.set(key, True, ttl=ttl)
+
+
+def reads_from_primary(request: HTTPConnection) -> bool:
+    key = client_key(request)
+    return key is not None and recent_writers.get(key, False)
+
+
+def clear() -> None:
+    recent_writers.clear()
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.utils.revocation import RevocationSet
+
+logger = logging.getLogger(__name__)
+
+# 他のワーカー・ホストで失効したトークンを取りこぼさないよう（時刻のずれや
+# コミットの遅れ）、前回読み込んだ最新の revoked_at からこの時間だけ遡って読み込む
+SYNC_OVERLAP = timedelta(seconds=60)
+# DBから期限切れの行を削除する間隔（秒）
+PURGE_INTERVAL_SECONDS = 3600
+
+# 失効したトークンのjti（プロセス内）。認証のたびにDBを参照しないよう、
+# TOKEN_REVOCATION_SYNC_SECONDS 秒ごとに token_revocations の差分を読み込む
+revoked_tokens = RevocationSet(capacity=settings.TOKEN_REVOCATION_CAPACITY)
+
+_sync_lock = threading.Lock()
+_last_revoked_at: Optional[datetime] = None
+_next_purge = 0.0
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLiteではタイムゾーンなしで返るためUTCとみなす
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def is_revoked(jti: Optional[str]) -> bool:
+    """
+    失効したトークンかどうか。DBは参照しない（リクエストごとの認証で呼ぶ）
+    """
+    return jti is not None and jti in revoked_tokens
+
+
+def revoke(db: Session, jti: str, exp: int) -> bool:
+    """
+    トークンを失効させる。このプロセスには即座に、他のワーカーには次の同期で反映される。
+    すでに失効していた場合はFalse
+    """
+    inserted = crud.token_revocation.revoke(
+        db, jti=jti, expires_at=datetime.fromtimestamp(exp, tz=timezone.utc)
+    )
+    revoked_tokens.add(jti, exp)
+    return inserted
+
+
+def sync(db: Session) -> int:
+    """
+    前回以降に失効したトークンをDBから読み込み、期限切れのものを取り除く。
+    新しく追加した数を返す
+    """
+    global _last_revoked_at, _next_purge
+    with _sync_lock:
+        since = _last_revoked_at - SYNC_OVERLAP if _last_revoked_at else None
+        rows = crud.token_revocation.get_revoked_since(db, since=since)
+        added = revoked_tokens.update(
+            (jti, _as_utc(expires_at).timestamp()) for jti, expires_at, _ in rows
+        )
+        for _, _, revoked_at in rows:
+            revoked_at = _as_utc(revoked_at)
+            if _last_revoked_at is None or revoked_at > _last_revoked_at:
+                _last_revoked_at = revoked_at
+        revoked_tokens.prune()
+
+        if time.monotonic() >= _next_purge:
+            crud.token_revocation.purge_expired(db)
+            _next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+        return added
+
+
+def sync_once(session_factory: Callable[[], Session]) -> None:
+    try:
+        with session_factory() as db:
+            sync(db)
+    except Exception:
+        logger.exception("失効したトークンの読み込みに失敗しました")
+
+
+def start_sync(session_factory: Callable[[], Session], interval: float) -> None:
+    """
+    `interval` 秒ごとに差分を読み込むバックグラウンドスレッドを開始する
+    """
+    global _thread
+    if interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+
+    def run() -> None:
+        while not _stop.wait(interval):
+            sync_once(session_factory)
+
+    _thread = threading.Thread(target=run, name="token-revocation-sync", daemon=True)
+    _thread.start()
+
+
+def stop_sync() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+
+def clear() -> None:
+    global _last_revoked_at, _next_purge
+    with _sync_lock:
+        revoked_tokens.clear()
+        _last_revoked_at = None
+        _next_purge = 0.0
@@ -0,0 +1,52 @@
+import hashlib
+import math
+from typing import Iterator
+
+
+class BloomFilter:
+    """
+    ブルームフィルター。`key in filter` がFalseなら確実に追加されていない
+
+    Trueの場合は `error_rate` 程度の確率で誤判定（追加していないのにTrue）があるため、
+    正確な判定が必要な場合は別の構造で確かめること。要素の削除はできない
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # 最適なビット数 m = -n ln(p) / (ln 2)^2 とハッシュの数 k = m / n ln 2
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(8, math.ceil(bits))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _indexes(self, key: str) -> Iterator[int]:
+        # 1つの128ビットのハッシュを2つに分け、h1 + i * h2 でk個の位置を作る
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % size
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for index in self._indexes(key):
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        for index in self._indexes(key):
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
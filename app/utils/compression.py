@@ -0,0 +1,125 @@
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 圧縮レベルは1〜9で指定する（大きいほど小さく遅い）。brotli（0〜11）と
+# zstd（1〜22）でも同じ値を使い、動的なレスポンスに向く範囲に収める
+MIN_LEVEL = 1
+MAX_LEVEL = 9
+
+
+class Compressor:
+    """
+    1つのレスポンスの本文を圧縮する。ストリーミングでは `compress` のたびに
+    それまでの入力を出力し切る（受け取った分をすぐにクライアントへ送れる）
+    """
+
+    def compress(self, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def finish(self, data: bytes = b"") -> bytes:
+        raise NotImplementedError
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        # wbits=31 でgzip形式（ヘッダーとCRC付き）にする
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+# Content-Encoding の値 -> 圧縮の実装（ライブラリがインストールされているものだけ）
+CODECS: Dict[str, type] = {"gzip": GzipCompressor}
+if brotli is not None:
+    CODECS["br"] = BrotliCompressor
+if zstandard is not None:
+    CODECS["zstd"] = ZstdCompressor
+
+# クライアントのq値が同じ場合に優先する順（圧縮率の高い順）
+PREFERRED_ENCODINGS = ("br", "zstd", "gzip")
+
+
+def available_encodings() -> List[str]:
+    return [name for name in PREFERRED_ENCODINGS if name in CODECS]
+
+
+def make_compressor(encoding: str, level: int) -> Compressor:
+    return CODECS[encoding](max(MIN_LEVEL, min(MAX_LEVEL, level)))
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    qualities = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name] = quality
+    return qualities
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str], encodings: Sequence[str]
+) -> Optional[str]:
+    """
+    Accept-Encoding から使う圧縮方式を選ぶ（`encodings` は優先する順）。
+    q値の大きいものを選び、q=0 のものと指定のないものは使わない（`*` は除く）。
+    圧縮しない場合はNone
+    """
+    if not accept_encoding:
+        return None
+    qualities = _parse_accept_encoding(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
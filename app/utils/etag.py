@@ -0,0 +1,74 @@
+import hashlib
+from typing import Any, Iterable, Mapping, Optional
+
+from fastapi import Response
+
+from app.core.exceptions import PreconditionFailedError
+
+ETAG_HEADER = "ETag"
+
+
+def resource_etag(version: int) -> str:
+    """
+    単一リソースのETag（行のバージョンをそのまま使う）
+    """
+    return f'"{version}"'
+
+
+def collection_etag(rows: Iterable[Any]) -> str:
+    """
+    一覧のETag。ページに含まれる行の (id, version) から計算するため、
+    行の追加・削除・更新のいずれでも値が変わる
+    """
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update(f"{row.id}:{row.version};".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _parse_etags(header: str) -> list:
+    return [
+        tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+        for tag in header.split(",")
+        if tag.strip()
+    ]
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match の値が etag に一致するか（`*`、カンマ区切り、弱いETagに対応）
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in _parse_etags(header)
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """
+    If-Match の値から期待するバージョンを取り出す。
+    ヘッダーがない場合と `*` の場合はNone（バージョンを確認しない）。
+    解釈できない値は、どのバージョンにも一致しないため412を返す
+
+    RFC 9110 では If-Match は強い比較だが、ここでは意図的に弱いETag（`W/"3"`）も
+    受け付ける。圧縮のミドルウェアがレスポンスのETagを弱いETagに変えるため、
+    クライアントが受け取ったETagをそのまま送れるようにする。ETagは行のバージョンで、
+    表現（圧縮の有無）によらず同じ行の状態を指すため、弱い比較でも更新の衝突は検出できる
+    """
+    if not header or header.strip() == "*":
+        return None
+    tags = _parse_etags(header)
+    if len(tags) == 1 and tags[0].startswith('"') and tags[0].endswith('"'):
+        try:
+            return int(tags[0][1:-1])
+        except ValueError:
+            pass
+    raise PreconditionFailedError(detail="リソースが更新されています")
+
+
+def not_modified(etag: str, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """
+    304 Not Modified のレスポンス（本文なし）
+    """
+    return Response(status_code=304, headers={**(headers or {}), ETAG_HEADER: etag})
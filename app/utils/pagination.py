@@ -0,0 +1,77 @@
+import base64
+import json
+from typing import Any, Dict, Literal, Optional, Sequence, Tuple
+from uuid import UUID
+
+from app.core.exceptions import BadRequestError
+
+# 次ページのカーソルを返すレスポンスヘッダー
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 一覧の総件数を返すレスポンスヘッダーと、その数え方（一覧APIの `count` パラメーター）。
+# exact: count(*)、estimated: プランナーの推定値、counter: 所有者ごとに保持している件数
+TOTAL_COUNT_HEADER = "X-Total-Count"
+CountMode = Literal["exact", "estimated", "counter"]
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    ソートキーの値から不透明なカーソル文字列を作成する
+    """
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    encode_cursorで作成したカーソルを復元する。不正な値は400を返す
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise BadRequestError(detail="カーソルが不正です")
+    if not isinstance(values, dict):
+        raise BadRequestError(detail="カーソルが不正です")
+    return values
+
+
+def decode_id_cursor(cursor: str) -> UUID:
+    """
+    idをソートキーとするカーソルからidを取り出す
+    """
+    values = decode_cursor(cursor)
+    try:
+        return UUID(values["id"])
+    except (KeyError, TypeError, ValueError):
+        raise BadRequestError(detail="カーソルが不正です")
+
+
+def next_id_cursor(rows: Sequence[Any], limit: int) -> Optional[str]:
+    """
+    ページが埋まっていれば最後の行のidから次ページのカーソルを作成する
+    """
+    if limit <= 0 or len(rows) < limit:
+        return None
+    return encode_cursor({"id": rows[-1].id})
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, UUID]:
+    """
+    (関連度, id) をソートキーとするカーソル（検索結果用）から値を取り出す
+    """
+    values = decode_cursor(cursor)
+    try:
+        return float(values["rank"]), UUID(values["id"])
+    except (KeyError, TypeError, ValueError):
+        raise BadRequestError(detail="カーソルが不正です")
+
+
+def next_rank_cursor(rows: Sequence[Tuple[Any, float]], limit: int) -> Optional[str]:
+    """
+    (行, 関連度) のリストから次ページのカーソルを作成する
+    """
+    if limit <= 0 or len(rows) < limit:
+        return None
+    row, rank = rows[-1]
+    return encode_cursor({"rank": rank, "id": row.id})
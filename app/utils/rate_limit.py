@@ -0,0 +1,143 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Protocol
+
+
+class TokenBucketBackend(Protocol):
+    """
+    トークンバケットの保存先
+
+    複数のプロセス・ホストで制限を共有する場合は、この `take` を共有ストア
+    （Redisなど）上でアトミックに実装したものに差し替える
+    """
+
+    def take(self, key: Hashable, capacity: int, per_second: float) -> float:
+        """
+        `key` のバケットからトークンを1つ取り出す。
+        取り出せた場合は0を、空の場合は次の1つが貯まるまでの秒数を返す
+        """
+        ...
+
+    def clear(self) -> None:
+        ...
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "next_sweep")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # key -> [残りトークン数, 最終更新時刻, 満杯に戻る時刻]（最終更新の古い順）
+        self.buckets: "OrderedDict[Hashable, List[float]]" = OrderedDict()
+        self.next_sweep = 0.0
+
+
+class InMemoryTokenBuckets:
+    """
+    プロセス内のトークンバケット（スレッドセーフ）
+
+    キーのハッシュでシャードに分け、ロックはシャードごとに取るため
+    スレッド間の競合が少ない。満杯に戻ったバケットは存在しないのと同じなので、
+    `sweep_interval` 秒ごとに古い順に削除する。シャードあたり
+    `maxsize / shards` 件を超えた場合は最も古く使われたバケットから削除する
+    """
+
+    def __init__(self, maxsize: int, shards: int = 16, sweep_interval: float = 1.0):
+        self.shards = max(1, shards)
+        self.maxsize_per_shard = max(1, maxsize // self.shards)
+        self.sweep_interval = sweep_interval
+        self._shards = [_Shard() for _ in range(self.shards)]
+
+    def take(self, key: Hashable, capacity: int, per_second: float) -> float:
+        now = time.monotonic()
+        shard = self._shards[hash(key) % self.shards]
+        with shard.lock:
+            buckets = shard.buckets
+            if now >= shard.next_sweep:
+                self._sweep(buckets, now)
+                shard.next_sweep = now + self.sweep_interval
+
+            bucket = buckets.get(key)
+            if bucket is not None:
+                buckets.move_to_end(key)
+            if bucket is None or bucket[2] <= now:
+                tokens = float(capacity)
+            else:
+                tokens = min(capacity, bucket[0] + (now - bucket[1]) * per_second)
+
+            if tokens < 1:
+                if bucket is not None:
+                    bucket[0], bucket[1] = tokens, now
+                return (1 - tokens) / per_second
+
+            tokens -= 1
+            full_at = now + (capacity - tokens) / per_second
+            if bucket is None:
+                buckets[key] = [tokens, now, full_at]
+                if len(buckets) > self.maxsize_per_shard:
+                    buckets.popitem(last=False)
+            else:
+                bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+            return 0.0
+
+    @staticmethod
+    def _sweep(buckets: "OrderedDict[Hashable, List[float]]", now: float) -> None:
+        # 古い順に見て、満杯に戻ったものを削除する（まだ回復中のものに当たったら終える）
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket[2] > now:
+                return
+            del buckets[key]
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+    def __len__(self) -> int:
+        return sum(len(shard.buckets) for shard in self._shards)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self),
+            "maxsize": self.maxsize_per_shard * self.shards,
+            "shards": self.shards,
+        }
+
+
+class TokenBucketLimiter:
+    """
+    キーごとに `capacity` 回まで連続で許可し、その後は毎秒 `per_second` 回まで回復する。
+    `capacity` が0以下の場合は制限しない。制限する場合、`per_second` は0より大きい値にする
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        per_second: float,
+        backend: TokenBucketBackend,
+        prefix: str = "",
+    ):
+        if capacity > 0 and per_second <= 0:
+            raise ValueError("per_second must be greater than 0")
+        self.capacity = capacity
+        self.per_second = per_second
+        self.backend = backend
+        self.prefix = prefix
+
+    def hit(self, key: Optional[str]) -> float:
+        """
+        1回分を消費する。許可する場合は0を、拒否する場合は再試行までの秒数を返す
+        """
+        if self.capacity <= 0 or key is None:
+            return 0.0
+        return self.backend.take(f"{self.prefix}{key}", self.capacity, self.per_second)
+
+
+def retry_after_seconds(wait: float) -> int:
+    """
+    Retry-After ヘッダーの値（整数秒、最低1秒）
+    """
+    return max(1, math.ceil(wait))
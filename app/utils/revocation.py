@@ -0,0 +1,119 @@
+import heapq
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.bloom import BloomFilter
+
+# フィルターに残った期限切れのIDがこの割合を超えたら、フィルターを作り直す
+STALE_FRACTION = 0.5
+
+
+class RevocationSet:
+    """
+    有効期限付きの失効したID（JWTのjtiなど）の集合
+
+    判定はまずブルームフィルターで行い、ほとんどの（失効していない）IDはそこで
+    Falseになる。フィルターがTrueを返した場合だけIDの辞書を引いて誤判定を除く。
+
+    追加・期限切れの削除は件数に比例した処理（全体のコピーやソート）を行わない。
+    フィルターからは削除できないため、期限切れのIDはしばらくフィルターに残り
+    （辞書を引けば除かれる）、その割合が `STALE_FRACTION` を超えたとき、または
+    想定の件数を超えたときだけ作り直す。作り直しの費用は追加・削除した件数で償却される。
+
+    判定はロックを取らない（辞書の参照とフィルターの差し替えはGILの下で不可分）
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        # ID -> 有効期限のUNIX時刻
+        self._ids: Dict[str, float] = {}
+        # (有効期限のUNIX時刻, ID) のヒープ
+        self._expiry: List[Tuple[float, str]] = []
+        self._bloom = BloomFilter(self.capacity, error_rate)
+        # フィルターに残っている、削除済みのIDの数
+        self._stale = 0
+        self.rebuilds = 0
+
+    def add(self, id: str, expires_at: float) -> bool:
+        """
+        IDを追加する。すでに含まれている・期限を過ぎている場合はFalse
+        """
+        return self.update([(id, expires_at)]) == 1
+
+    def update(self, items: Iterable[Tuple[str, float]]) -> int:
+        """
+        (ID, 有効期限) をまとめて追加し、新しく追加した数を返す
+        """
+        now = time.time()
+        with self._lock:
+            ids = self._ids
+            added = []
+            for id, expires_at in items:
+                if expires_at > now and id not in ids:
+                    ids[id] = expires_at
+                    heapq.heappush(self._expiry, (expires_at, id))
+                    added.append(id)
+            if not added:
+                return 0
+            bloom = self._bloom
+            if bloom.count + len(added) > bloom.capacity:
+                # 想定の件数を超えると誤判定が増えるため、現在のIDだけで作り直す
+                self._rebuild()
+            else:
+                for id in added:
+                    bloom.add(id)
+        return len(added)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._bloom and id in self._ids
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        期限を過ぎたIDを取り除き、取り除いた数を返す
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            expiry = self._expiry
+            while expiry and expiry[0][0] <= now:
+                expires_at, id = heapq.heappop(expiry)
+                if self._ids.get(id) == expires_at:
+                    del self._ids[id]
+                    removed += 1
+            if removed:
+                self._stale += removed
+                if self._stale > self._bloom.count * STALE_FRACTION:
+                    self._rebuild()
+        return removed
+
+    def _rebuild(self) -> None:
+        # 次の作り直しまでに現在と同じ数を追加できる大きさにする
+        capacity = max(self.capacity, 2 * len(self._ids))
+        bloom = BloomFilter(capacity, self.error_rate)
+        for id in self._ids:
+            bloom.add(id)
+        self._bloom = bloom
+        self._stale = 0
+        self.rebuilds += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids = {}
+            self._expiry = []
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._stale = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._ids),
+            "stale": self._stale,
+            "bloom_capacity": self._bloom.capacity,
+            "bloom_bytes": self._bloom.nbytes,
+            "rebuilds": self.rebuilds,
+        }
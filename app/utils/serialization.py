@@ -0,0 +1,64 @@
+from typing import Any, Dict, Generic, Iterable, List, Optional, Type, TypeVar
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+from app.core.config import settings
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+
+def default_response_class() -> Type[JSONResponse]:
+    return ORJSONResponse if settings.FAST_JSON_RESPONSES else JSONResponse
+
+
+class ListSerializer(Generic[SchemaType]):
+    """
+    レスポンスモデルのリストを、FastAPIの response_model による検証・変換を通さずに
+    直接JSONのバイト列へ変換する（TypeAdapterはモジュール読み込み時に1回だけ作る）
+    """
+
+    def __init__(self, schema: Type[SchemaType]):
+        self.schema = schema
+        self.fields = tuple(schema.model_fields)
+        self.adapter = TypeAdapter(List[schema])
+
+    def dump_json(self, objs: Iterable[Any], *, trusted: bool = False) -> bytes:
+        """
+        `trusted=True` の場合、DBから取得した行は検証済みとみなして、スキーマの
+        フィールドだけを取り出してそのまま変換する（EmailStrなどの再検証を省く）
+        """
+        if trusted:
+            return to_json([{f: getattr(obj, f) for f in self.fields} for obj in objs])
+        validated = self.adapter.validate_python(objs, from_attributes=True)
+        return self.adapter.dump_json(validated)
+
+    def response(
+        self,
+        objs: Iterable[Any],
+        *,
+        trusted: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        return Response(
+            content=self.dump_json(objs, trusted=trusted),
+            media_type="application/json",
+            headers=headers,
+        )
+
+
+def list_response(
+    serializer: ListSerializer, rows: List[Any], response: Response
+) -> Any:
+    """
+    一覧APIの戻り値。FAST_JSON_RESPONSES が有効ならDBの行を直接JSONへ変換した
+    Responseを返し、無効ならそのまま返して response_model による変換に任せる
+
+    Responseを直接返すと依存関係で注入した `response` のヘッダーは反映されないため、
+    ここで引き継ぐ
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return rows
+    return serializer.response(rows, trusted=True, headers=dict(response.headers))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+レスポンスの圧縮の方式・レベルごとのCPU時間と削減できるバイト数
+
+GET /items/ のページと同じ形のJSON（--items 件、説明文は --description-words 語）を
+作り、利用できる方式（gzip、brotli・zstandardがあればbr・zstd）の各レベルで
+1回圧縮するCPU時間、圧縮後の大きさ、CPU 1ミリ秒あたりに削減できるバイト数を表示する。
+
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --items 1000 --levels 1 5 9
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import orjson
+
+from app.utils.compression import available_encodings, make_compressor
+
+WORDS = (
+    "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu nu xi "
+    "omicron pi rho sigma tau upsilon phi chi psi omega 在庫 配送 注文 商品 説明"
+).split()
+
+
+def make_page(items: int, description_words: int) -> bytes:
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+    owner_id = uuid.uuid4()
+    return orjson.dumps(
+        [
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128)),
+                "title": f"item {i}",
+                "description": " ".join(rng.choices(WORDS, k=description_words)),
+                "owner_id": owner_id,
+                "version": 1,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(items)
+        ]
+    )
+
+
+def measure(encoding: str, level: int, payload: bytes, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        compressed = make_compressor(encoding, level).finish(payload)
+        timings.append(time.process_time() - started)
+    return statistics.median(timings) * 1000, len(compressed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--description-words", type=int, default=60)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 5, 6, 9])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for items in args.items:
+        payload = make_page(items, args.description_words)
+        print(f"{items} items: {len(payload) / 1024:.1f}KB")
+        for encoding in available_encodings():
+            for level in args.levels:
+                cpu_ms, size = measure(encoding, level, payload, args.repeat)
+                saved = len(payload) - size
+                print(
+                    f"  {encoding:4s} level {level}: {cpu_ms:7.2f}ms  "
+                    f"{size / 1024:8.1f}KB ({size / len(payload) * 100:5.1f}%)  "
+                    f"{saved / 1024 / max(cpu_ms, 1e-3):8.1f}KB saved/ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+JWTの署名方式（HS256 / RS256 / ES256）ごとの署名・検証のスループット
+
+アプリと同じく鍵を一度だけ読み込み（app.core.jwt_keys.load_key_set）、
+アクセストークンと同じクレームで jwt.encode / jwt.decode を繰り返す。
+結果はpython-joseのバックエンドに大きく依存する（cryptographyがなければ
+RSAとECDSAは純Pythonの実装になる）ため、使われたバックエンドも表示する。
+
+    python benchmarks/bench_jwt_algorithms.py
+    python benchmarks/bench_jwt_algorithms.py --seconds 5 --rsa-bits 3072
+"""
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import ecdsa
+import rsa
+from jose import jwt
+
+from app.core.config import settings
+from app.core.jwt_keys import load_key_set
+
+ALGORITHMS = ("HS256", "RS256", "ES256")
+
+
+def private_pem(algorithm: str, rsa_bits: int) -> bytes:
+    if algorithm == "RS256":
+        return rsa.newkeys(rsa_bits)[1].save_pkcs1()
+    return ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem()
+
+
+def per_second(fn, seconds: float) -> float:
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS))
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    claims = {
+        "exp": datetime.utcnow() + timedelta(minutes=15),
+        "sub": str(uuid.uuid4()),
+        "jti": uuid.uuid4().hex,
+        "type": "access",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for algorithm in args.algorithms:
+            update = {"JWT_ALGORITHM": algorithm}
+            if algorithm != "HS256":
+                path = Path(directory) / f"{algorithm}.pem"
+                path.write_bytes(private_pem(algorithm, args.rsa_bits))
+                update["JWT_PRIVATE_KEY_FILE"] = str(path)
+            key_set = load_key_set(settings.model_copy(update=update))
+
+            def sign() -> str:
+                return jwt.encode(
+                    claims,
+                    key_set.signing_key,
+                    algorithm=key_set.algorithm,
+                    headers=key_set.headers,
+                )
+
+            token = sign()
+            key = key_set.verification_key(key_set.signing_kid)
+
+            def verify() -> None:
+                jwt.decode(token, key, algorithms=[key_set.algorithm])
+
+            print(
+                f"{algorithm}: sign {per_second(sign, args.seconds):9.0f}/s  "
+                f"verify {per_second(verify, args.seconds):9.0f}/s  "
+                f"token {len(token)} bytes  "
+                f"({type(key_set.signing_key).__module__})"
+            )
+
+
+if __name__ == "__main__":
+    main()
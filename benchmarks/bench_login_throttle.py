@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+ログイン試行のレート制限（トークンバケット）自体のオーバーヘッド計測
+
+check_login_attempt の1回あたりの処理時間を、許可される場合・拒否される場合
+（429の例外を送出）・無効の場合で比較する。あわせて、複数スレッドから同時に
+呼んだときのスループットをシャード数を変えて計測する。
+
+    python benchmarks/bench_login_throttle.py
+    python benchmarks/bench_login_throttle.py --keys 1000000 --threads 8
+"""
+import argparse
+import sys
+import threading
+import time
+import timeit
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+
+from app.services import login_throttle
+from app.utils.rate_limit import InMemoryTokenBuckets
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def threaded_ops_per_second(
+    backend: InMemoryTokenBuckets, threads: int, keys: int, duration: float
+) -> float:
+    counts = [0] * threads
+    stop = threading.Event()
+
+    def worker(n: int) -> None:
+        i = n
+        take = backend.take
+        while not stop.is_set():
+            for _ in range(1000):
+                take(f"ip:{i % keys}", 1_000_000, 1000.0)
+                i += threads
+            counts[n] += 1000
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in workers:
+        t.join()
+    return sum(counts) / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=2.0)
+    args = parser.parse_args()
+
+    emails = [f"user{i}@example.com" for i in range(args.keys)]
+    counter = iter(range(10**12))
+
+    def allowed() -> None:
+        i = next(counter)
+        login_throttle.check_login_attempt(emails[i % args.keys], f"10.0.{i % 256}.1")
+
+    def rejected() -> None:
+        try:
+            login_throttle.check_login_attempt("victim@example.com", "10.9.9.9")
+        except HTTPException:
+            pass
+
+    limiters = (login_throttle.email_limiter, login_throttle.ip_limiter)
+    capacities = [limiter.capacity for limiter in limiters]
+
+    # 許可される場合：容量を大きくし、異なるキーを順に使う（バケットの作成・更新を含む）
+    for limiter in limiters:
+        limiter.capacity = 10**9
+    print(f"{'allowed':<10}: {per_call_us(allowed, args.number):6.2f}us per attempt")
+    print(f"buckets held: {login_throttle.login_buckets.stats()}")
+
+    # 拒否される場合：同じメールアドレスの容量を使い切った状態
+    for limiter, capacity in zip(limiters, capacities):
+        limiter.capacity = capacity
+    login_throttle.clear()
+    print(f"{'rejected':<10}: {per_call_us(rejected, args.number):6.2f}us per attempt")
+
+    for limiter in limiters:
+        limiter.capacity = 0
+    print(f"{'disabled':<10}: {per_call_us(allowed, args.number):6.2f}us per attempt")
+
+    for shards in (1, 16):
+        backend = InMemoryTokenBuckets(maxsize=args.keys, shards=shards)
+        ops = threaded_ops_per_second(backend, args.threads, args.keys, args.duration)
+        print(f"threads={args.threads} shards={shards:>2}: {ops:12,.0f} takes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+メトリクス用ミドルウェア（MetricsMiddleware）のリクエストあたりのオーバーヘッド計測
+
+何もしないASGIアプリ（200を返すだけ）を直接呼び出し、ミドルウェアの有無で
+1リクエストあたりの処理時間を比較する。あわせて /metrics の出力にかかる時間も計測する。
+
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --requests 200000 --routes 50
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.metrics import registry
+from app.middleware.metrics import MetricsMiddleware
+
+
+class _Route:
+    def __init__(self, path_format: str):
+        self.path_format = path_format
+
+
+async def endpoint(scope, receive, send) -> None:
+    # FastAPIのルーターと同じく、一致したルートをscopeに設定する
+    scope["route"] = scope["_bench_route"]
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def receive() -> dict:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: dict) -> None:
+    pass
+
+
+async def per_request_us(app, scopes, requests: int) -> float:
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(dict(scopes[i % len(scopes)]), receive, send)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--routes", type=int, default=20)
+    args = parser.parse_args()
+
+    scopes = [
+        {
+            "type": "http",
+            "method": "GET",
+            "path": f"/api/v1/resource{i}/1",
+            "_bench_route": _Route(f"/api/v1/resource{i}/{{id}}"),
+        }
+        for i in range(args.routes)
+    ]
+    instrumented = MetricsMiddleware(endpoint)
+
+    # 1回目は系列の作成を含むため、ウォームアップしてから計測する
+    await per_request_us(instrumented, scopes, args.routes)
+    baseline = min(
+        [await per_request_us(endpoint, scopes, args.requests) for _ in range(3)]
+    )
+    with_metrics = min(
+        [await per_request_us(instrumented, scopes, args.requests) for _ in range(3)]
+    )
+    print(f"without middleware: {baseline:6.2f}us per request")
+    print(f"with middleware   : {with_metrics:6.2f}us per request")
+    print(f"overhead          : {with_metrics - baseline:6.2f}us per request")
+
+    started = time.perf_counter()
+    body = registry.render()
+    print(
+        f"render /metrics   : {(time.perf_counter() - started) * 1000:6.2f}ms "
+        f"({len(body.splitlines())} lines)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+認証の依存関係（トークン検証）のマイクロベンチマーク
+
+トークンキャッシュの有無で、トークン検証（_get_user_id_from_token）と
+get_current_user（プリンシパルキャッシュ済み、DBアクセスなし）の1回あたりの
+処理時間を比較する。不正なトークンを大量に送られた場合の処理時間も計測する。
+
+    python benchmarks/bench_token_cache.py
+"""
+import argparse
+import sys
+import timeit
+import uuid
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi import HTTPException
+
+from app.api import deps
+from app.core import security
+from app.services.principal import Principal, principal_cache
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    user_id = uuid.uuid4()
+    token = security.create_access_token(user_id)
+    principal_cache.set(
+        user_id,
+        Principal(
+            id=user_id, email="bench@example.com", is_active=True, is_superuser=False
+        ),
+    )
+
+    def invalid_token() -> None:
+        try:
+            deps._get_user_id_from_token("not.a.token")
+        except HTTPException:
+            pass
+
+    cases = {
+        "token verification": lambda: deps._get_user_id_from_token(token),
+        "get_current_user": lambda: deps.get_current_user(db=None, token=token),
+        "invalid token": invalid_token,
+    }
+
+    maxsize = security.token_cache.maxsize
+    for label, fn in cases.items():
+        security.token_cache.maxsize = 0
+        security.token_cache.clear()
+        uncached = per_call_us(fn, args.number)
+        security.token_cache.maxsize = maxsize
+        security.token_cache.clear()
+        cached = per_call_us(fn, args.number)
+        print(
+            f"{label:<20}: no cache {uncached:7.2f}us  cache {cached:7.2f}us  "
+            f"({uncached / cached:5.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
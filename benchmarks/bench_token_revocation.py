@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+トークンの失効の判定（token_revocation.is_revoked）のマイクロベンチマーク
+
+失効したトークンが --sizes 件ある場合に、失効していないトークン（ほとんどの
+リクエスト）と失効したトークンを1回判定する処理時間と、集合のメモリ使用量を計測する。
+また、定期的な同期1回分（--churn 件の追加と、同じ数の期限切れの削除）の処理時間を
+計測する。比較のため、認証の依存関係（_get_token_payload、トークンキャッシュ済み）全体の
+処理時間も表示する。
+
+    python benchmarks/bench_token_revocation.py
+    python benchmarks/bench_token_revocation.py --sizes 1000 1000000
+"""
+import argparse
+import sys
+import time
+import timeit
+import tracemalloc
+import uuid
+from pathlib import Path
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api import deps
+from app.core import security
+from app.services import token_revocation
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def sync_ms(revoked, expires_at: float, churn: int, rounds: int = 20) -> str:
+    """
+    同期1回分（追加と期限切れの削除）の処理時間の中央値と最大値
+    """
+    times = []
+    for step in range(rounds):
+        start = time.perf_counter()
+        revoked.update((uuid.uuid4().hex, expires_at + 86400) for _ in range(churn))
+        revoked.prune(expires_at + step)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return f"median {times[len(times) // 2]:.2f}ms  max {times[-1]:.2f}ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[0, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--churn", type=int, default=100)
+    args = parser.parse_args()
+
+    token = security.create_access_token(uuid.uuid4())
+    payload = security.decode_access_token(token)
+    expires_at = time.time() + 3600
+
+    for size in args.sizes:
+        token_revocation.clear()
+        tracemalloc.start()
+        revoked = [uuid.uuid4().hex for _ in range(size)]
+        baseline = tracemalloc.get_traced_memory()[0]
+        # 先頭から --churn 件ずつ1秒ごとに期限が切れる
+        token_revocation.revoked_tokens.update(
+            (jti, expires_at + i // args.churn) for i, jti in enumerate(revoked)
+        )
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        stats = token_revocation.revoked_tokens.stats()
+        miss = per_call_us(
+            lambda: token_revocation.is_revoked(payload.jti), args.number
+        )
+        line = f"{size:>9d} revoked: miss {miss:6.3f}us"
+        if revoked:
+            hit = per_call_us(
+                lambda: token_revocation.is_revoked(revoked[0]), args.number
+            )
+            line += f"  hit {hit:6.3f}us"
+        print(
+            f"{line}  memory {memory / 1024 / 1024:7.1f}MiB "
+            f"(bloom {stats['bloom_bytes'] / 1024 / 1024:.1f}MiB)"
+        )
+        if size:
+            sync = sync_ms(token_revocation.revoked_tokens, expires_at, args.churn)
+            print(f"{'':>18s}sync (+{args.churn} / -{args.churn}): {sync}")
+
+    dependency = per_call_us(lambda: deps._get_token_payload(token), args.number)
+    print(
+        "_get_token_payload (cached token, revocation check included): "
+        f"{dependency:.3f}us"
+    )
+    token_revocation.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+NDJSON/CSVファイルからアイテムを一括登録するスクリプト
+
+ファイルは少しずつ読み込み、IMPORT_BATCH_SIZE 行ごとに検証・書き込みする
+（PostgreSQLでは COPY を使う）。取り込めなかった行は最後に行番号とエラーを表示する。
+
+    python scripts/import_items.py items.ndjson --owner-email user@example.com
+    python scripts/import_items.py items.csv --owner-email user@example.com
+    cat items.ndjson | python scripts/import_items.py - --format ndjson \\
+        --owner-email user@example.com
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+# プロジェクトのルートディレクトリをPythonパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.crud.crud_user import user
+from app.db.session import SessionLocal
+from app.schemas.item import ItemImportResult
+from app.services.item_import import import_items
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def read_chunks(file: BinaryIO) -> Iterator[bytes]:
+    while chunk := file.read(CHUNK_SIZE):
+        yield chunk
+
+
+def print_progress(result: ItemImportResult) -> None:
+    print(
+        f"\r{result.imported} 件登録 / {result.failed} 件エラー",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="入力ファイル（- で標準入力）")
+    parser.add_argument("--owner-email", required=True, help="アイテムの所有者")
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        help="入力形式（省略時は拡張子から判定）",
+    )
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument("--max-errors", type=int, default=settings.IMPORT_MAX_ERRORS)
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    db = SessionLocal()
+    try:
+        owner = user.get_by_email(db, email=args.owner_email)
+        if not owner:
+            sys.exit(f"ユーザーが見つかりません: {args.owner_email}")
+
+        file = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with file:
+            result = import_items(
+                db,
+                read_chunks(file),
+                format=format,
+                owner_id=owner.id,
+                batch_size=args.batch_size,
+                max_errors=args.max_errors,
+                progress=print_progress,
+            )
+    finally:
+        db.close()
+
+    print(file=sys.stderr)
+    for error in result.errors:
+        print(f"{error.line}行目: {'; '.join(error.errors)}")
+    if result.errors_truncated:
+        print(f"（エラーが多いため最初の {len(result.errors)} 件のみ表示しています）")
+    print(f"{result.imported} 件のアイテムを登録しました（エラー {result.failed} 件）")
+
+
+if __name__ == "__main__":
+    main()
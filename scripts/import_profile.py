@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+モジュールごとのimport時間の内訳を表示するスクリプト
+
+新しいPythonプロセスで `python -X importtime -c "import app.main"` を実行し、
+自身の処理時間（self）が長いモジュールと、トップレベルのパッケージごとの合計を表示する。
+初回はバイトコードのコンパイルを含むため、--repeat 回実行して最も速い回を使う。
+
+    python scripts/import_profile.py
+    python scripts/import_profile.py --module app.api.deps --top 30
+    python scripts/import_profile.py --depth 2  # app.api / sqlalchemy.orm などの単位で集計
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+ROOT = Path(__file__).parent.parent
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def profile_import(module: str) -> List[ImportTime]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        # import time:  self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(ImportTime(name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def group_by_package(rows: List[ImportTime], depth: int) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        totals[".".join(row.module.split(".")[:depth])] += row.self_us
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [profile_import(args.module) for _ in range(args.repeat)]
+    rows = min(runs, key=lambda run: sum(row.self_us for row in run))
+    total_us = sum(row.self_us for row in rows)
+    print(f"import {args.module}: {total_us / 1000:.1f}ms ({len(rows)} modules)\n")
+
+    print(f"{'self':>9s} {'cumulative':>11s}  module")
+    for row in sorted(rows, key=lambda row: row.self_us, reverse=True)[: args.top]:
+        print(
+            f"{row.self_us / 1000:7.1f}ms {row.cumulative_us / 1000:9.1f}ms  "
+            f"{row.module}"
+        )
+
+    print(f"\n{'self':>9s} {'share':>6s}  package")
+    totals = group_by_package(rows, args.depth)
+    for package in sorted(totals, key=totals.get, reverse=True)[: args.top]:
+        self_us = totals[package]
+        print(f"{self_us / 1000:7.1f}ms {self_us / total_us * 100:5.1f}%  {package}")
+
+
+if __name__ == "__main__":
+    main()
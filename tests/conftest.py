@@ -1,7 +1,18 @@
+import os
+
+# テストではbcryptをプロセスプールを使わずに実行する（プールのテストは個別に有効化する）
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+# 失効したトークンの定期的な読み込み（本番のDBへ接続する）は行わない
+os.environ.setdefault("TOKEN_REVOCATION_SYNC_SECONDS", "0")
+
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
 from app.api import deps
@@ -12,7 +23,16 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+# v2（非同期）エンドポイント用。同じSQLiteファイルをaiosqlite経由で参照する
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 # テスト用のデータベース依存関係をオーバーライド
@@ -27,6 +47,61 @@ def db():
         Base.metadata.drop_all(bind=engine)
 
 
+# テスト用エンジン（v1の同期・v2の非同期）で実行されたSQL文を記録する
+# with count_queries() as statements: ... で、ブロック内で実行された文の一覧を得る
+@pytest.fixture
+def count_queries():
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engines = (engine, async_engine.sync_engine)
+        for target in engines:
+            event.listen(target, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+    return _count_queries
+
+
+# エンドポイントのSQL文の数の上限を確認する
+# with query_budget(2): client.get(...) で、ブロック内の文が2つを超えると失敗する
+@pytest.fixture
+def query_budget(count_queries):
+    @contextmanager
+    def _query_budget(max_queries: int):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= max_queries, (
+            f"SQL文が{len(statements)}個実行されました（上限{max_queries}個）:\n"
+            + "\n".join(statements)
+        )
+
+    return _query_budget
+
+
+# プロセス内キャッシュをテストごとに初期化
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from app.core.security import invalid_token_cache, token_cache
+    from app.services import login_throttle, read_your_writes, token_revocation
+    from app.services.principal import principal_cache
+
+    principal_cache.clear()
+    token_cache.clear()
+    invalid_token_cache.clear()
+    login_throttle.clear()
+    read_your_writes.clear()
+    token_revocation.clear()
+    yield
+
+
 # テスト用のDBセッションを提供するための依存関係をオーバーライド
 @pytest.fixture(scope="function")
 def client(db):
@@ -36,7 +111,12 @@ def client(db):
         finally:
             pass
 
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as async_db:
+            yield async_db
+
     app.dependency_overrides[deps.get_db] = override_get_db
+    app.dependency_overrides[deps.get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -70,3 +150,19 @@ def normal_user(db):
         is_superuser=False,
     )
     return user.create(db, obj_in=user_in)
+
+
+# 一般ユーザーの認証ヘッダー
+@pytest.fixture(scope="function")
+def normal_user_token_headers(normal_user):
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token(normal_user.id)}"}
+
+
+# スーパーユーザーの認証ヘッダー
+@pytest.fixture(scope="function")
+def superuser_token_headers(superuser):
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token(superuser.id)}"}
@@ -0,0 +1,170 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+
+
+@pytest.fixture
+def password_pool(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    yield
+    security.shutdown_password_executor()
+
+
+def test_login_access_token(client: TestClient, normal_user, db: Session) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": normal_user.email, "password": "password"},
+    )
+    assert response.status_code == 200
+    token = response.json()
+    assert token["token_type"] == "bearer"
+    assert token["access_token"]
+
+
+def test_login_wrong_password(client: TestClient, normal_user, db: Session) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": normal_user.email, "password": "wrong"},
+    )
+    assert response.status_code == 400
+
+
+def test_login_uses_password_pool(
+    client: TestClient, normal_user, password_pool, db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": normal_user.email, "password": "password"},
+    )
+    assert response.status_code == 200
+
+
+def test_login_rejected_when_password_pool_is_full(
+    client: TestClient, normal_user, password_pool, monkeypatch, db: Session
+) -> None:
+    security._get_password_executor()
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(security, "_password_slots", full)
+
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": normal_user.email, "password": "password"},
+    )
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_login_throttled_per_email_before_db(
+    client: TestClient, normal_user, monkeypatch, count_queries, db: Session
+) -> None:
+    from app.services import login_throttle
+
+    monkeypatch.setattr(login_throttle.email_limiter, "capacity", 2)
+    url = f"{settings.API_V1_STR}/auth/login/access-token"
+    for _ in range(2):
+        response = client.post(
+            url, data={"username": normal_user.email, "password": "wrong"}
+        )
+        assert response.status_code == 400
+
+    with count_queries() as statements:
+        response = client.post(
+            url, data={"username": normal_user.email.upper(), "password": "password"}
+        )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # 拒否はDBへの問い合わせ（とbcrypt）の前に行われる
+    assert statements == []
+
+    # 別のメールアドレスは制限されない
+    response = client.post(url, data={"username": "other@example.com", "password": "x"})
+    assert response.status_code == 400
+
+
+def test_login_throttled_per_client_ip(
+    client: TestClient, monkeypatch, db: Session
+) -> None:
+    from app.services import login_throttle
+
+    monkeypatch.setattr(login_throttle.ip_limiter, "capacity", 3)
+    url = f"{settings.API_V1_STR}/auth/login/access-token"
+    codes = [
+        client.post(
+            url, data={"username": f"u{i}@example.com", "password": "x"}
+        ).status_code
+        for i in range(4)
+    ]
+    assert codes == [400, 400, 400, 429]
+
+
+def _login(client: TestClient, user) -> dict:
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": user.email, "password": "password"},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_refresh_rotates_tokens(client: TestClient, normal_user, db: Session) -> None:
+    tokens = _login(client, normal_user)
+    assert tokens["refresh_token"]
+
+    url = f"{settings.API_V1_STR}/auth/refresh"
+    response = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["access_token"] != tokens["access_token"]
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    # 使用済みのリフレッシュトークンは再利用できない
+    response = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 403
+    response = client.post(url, json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 200
+
+
+def test_refresh_token_is_not_an_access_token(
+    client: TestClient, normal_user, db: Session
+) -> None:
+    tokens = _login(client, normal_user)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers={"Authorization": f"Bearer {tokens['refresh_token']}"},
+    )
+    assert response.status_code == 403
+
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["access_token"]},
+    )
+    assert response.status_code == 403
+
+
+def test_logout_revokes_tokens(client: TestClient, normal_user, db: Session) -> None:
+    tokens = _login(client, normal_user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    response = client.get(f"{settings.API_V1_STR}/items/", headers=headers)
+    assert response.status_code == 200
+
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/logout",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers=headers,
+    )
+    assert response.status_code == 204
+
+    response = client.get(f"{settings.API_V1_STR}/items/", headers=headers)
+    assert response.status_code == 403
+    response = client.post(
+        f"{settings.API_V1_STR}/auth/refresh",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 403
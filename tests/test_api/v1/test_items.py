@@ -0,0 +1,633 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_item import item as crud_item
+from app.schemas.item import ItemCreate, ItemUpdate
+
+
+def test_create_item(
+    client: TestClient, normal_user_token_headers, db: Session
+) -> None:
+    data = {"title": "Foo", "description": "Fighters"}
+    response = client.post(
+        f"{settings.API_V1_STR}/items/", json=data, headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["title"] == data["title"]
+    assert content["description"] == data["description"]
+    assert "id" in content
+
+
+def test_read_items_cursor_pagination(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    for i in range(5):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            params=params,
+            headers=normal_user_token_headers,
+        )
+        assert response.status_code == 200
+        seen.extend(i["id"] for i in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params = {"limit": 2, "cursor": next_cursor}
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    # オフセット指定も従来どおり利用でき、同じ順序になる
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        params={"skip": 2, "limit": 2},
+        headers=normal_user_token_headers,
+    )
+    assert [i["id"] for i in response.json()] == seen[2:4]
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, normal_user_token_headers, db: Session
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        params={"cursor": "not-a-cursor"},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_bulk_create_update_delete(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    superuser,
+    db: Session,
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        json=[{"title": f"bulk {i}"} for i in range(3)],
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert [r["status"] for r in created] == ["created"] * 3
+    assert [r["item"]["title"] for r in created] == ["bulk 0", "bulk 1", "bulk 2"]
+    ids = [r["id"] for r in created]
+
+    others = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin"), owner_id=superuser.id
+    )
+    missing = "00000000-0000-0000-0000-000000000000"
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        json=[
+            {"id": ids[0], "title": "renamed"},
+            {"id": str(others.id), "title": "hijacked"},
+            {"id": missing, "title": "ghost"},
+        ],
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["status"] for r in results] == ["updated", "forbidden", "not_found"]
+    assert results[0]["item"]["title"] == "renamed"
+    db.refresh(others)
+    assert others.title == "admin"
+
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        json={"ids": [ids[1], str(others.id), missing]},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()] == [
+        "deleted",
+        "forbidden",
+        "not_found",
+    ]
+    remaining = crud_item.get_multi_by_owner(db, owner_id=normal_user.id)
+    assert sorted(str(i.id) for i in remaining) == sorted([ids[0], ids[2]])
+
+
+def test_read_items_total_count_modes(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    superuser,
+    superuser_token_headers,
+    db: Session,
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    for i in range(3):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin"), owner_id=superuser.id
+    )
+    # 一括作成・一括削除・削除・インポートも所有者ごとの件数に反映される
+    created = client.post(
+        f"{url}bulk",
+        json=[{"title": f"bulk {i}"} for i in range(4)],
+        headers=normal_user_token_headers,
+    ).json()
+    client.request(
+        "DELETE",
+        f"{url}bulk",
+        json={"ids": [created[0]["item"]["id"], created[1]["item"]["id"]]},
+        headers=normal_user_token_headers,
+    )
+    client.delete(f"{url}{created[2]['item']['id']}", headers=normal_user_token_headers)
+    client.post(
+        f"{url}import?format=ndjson",
+        content=b'{"title": "imported"}\n',
+        headers=normal_user_token_headers,
+    )
+
+    expected_counts = ((normal_user_token_headers, 5), (superuser_token_headers, 6))
+    for headers, expected in expected_counts:
+        for mode in ("exact", "estimated", "counter"):
+            response = client.get(
+                url, params={"count": mode, "limit": 2}, headers=headers
+            )
+            assert response.status_code == 200
+            assert response.headers["X-Total-Count"] == str(expected), mode
+
+    response = client.get(url, headers=normal_user_token_headers)
+    assert "X-Total-Count" not in response.headers
+    response = client.get(
+        url, params={"count": "bogus"}, headers=normal_user_token_headers
+    )
+    assert response.status_code == 422
+
+
+def test_generic_crud_methods_maintain_item_counts(
+    normal_user, superuser, db: Session
+) -> None:
+    # CRUDBase から継承した汎用の作成・削除も所有者ごとの件数を更新する
+    items = crud_item.create_multi(
+        db,
+        objs_in=[ItemCreate(title=f"generic {i}") for i in range(3)],
+        extra={"owner_id": normal_user.id},
+    )
+    crud_item.create_multi(
+        db, objs_in=[ItemCreate(title="admin")], extra={"owner_id": superuser.id}
+    )
+    crud_item.remove(db, id=items[0].id)
+    crud_item.remove_multi(db, ids=[items[1].id])
+
+    for owner_id in (normal_user.id, superuser.id, None):
+        assert crud_item.count_by_owner(
+            db, owner_id=owner_id, mode="counter"
+        ) == crud_item.count_by_owner(db, owner_id=owner_id), owner_id
+
+
+def test_bulk_create_rejects_oversized_request(
+    client: TestClient, normal_user_token_headers, monkeypatch, db: Session
+) -> None:
+    monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        json=[{"title": f"bulk {i}"} for i in range(3)],
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_update_item_in_one_statement(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    count_queries,
+    db: Session,
+) -> None:
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="before"), owner_id=normal_user.id
+    )
+    # 認証ユーザーをキャッシュさせておく
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    with count_queries() as statements:
+        response = client.put(
+            f"{settings.API_V1_STR}/items/{item.id}",
+            json={"title": "after"},
+            headers=normal_user_token_headers,
+        )
+    assert response.status_code == 200
+    assert response.json()["title"] == "after"
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE items")
+
+
+def test_delete_item_statements(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    count_queries,
+    db: Session,
+) -> None:
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="doomed"), owner_id=normal_user.id
+    )
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    with count_queries() as statements:
+        response = client.delete(
+            f"{settings.API_V1_STR}/items/{item.id}", headers=normal_user_token_headers
+        )
+    assert response.status_code == 200
+    assert response.json()["title"] == "doomed"
+    # DELETE ... RETURNING と、所有者ごとのアイテム数の更新
+    assert len(statements) == 2
+    assert statements[0].startswith("DELETE FROM items")
+    assert statements[1].startswith("INSERT INTO item_counts")
+
+
+def test_update_item_forbidden_and_not_found(
+    client: TestClient,
+    normal_user_token_headers,
+    superuser,
+    count_queries,
+    db: Session,
+) -> None:
+    others = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin"), owner_id=superuser.id
+    )
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    with count_queries() as statements:
+        response = client.put(
+            f"{settings.API_V1_STR}/items/{others.id}",
+            json={"title": "hijacked"},
+            headers=normal_user_token_headers,
+        )
+    assert response.status_code == 403
+    # 失敗した場合だけ所有者を確認する1文が追加される
+    assert len(statements) == 2
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/items/00000000-0000-0000-0000-000000000000",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 404
+    db.refresh(others)
+    assert others.title == "admin"
+
+
+def test_export_items_ndjson_and_csv(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    superuser,
+    superuser_token_headers,
+    db: Session,
+    monkeypatch,
+) -> None:
+    # まとまりの境界をまたぐように小さくする
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        crud_item.create_with_owner(
+            db,
+            obj_in=ItemCreate(title=f"item {i}", description="説明"),
+            owner_id=normal_user.id,
+        )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title='admin, "quoted"'), owner_id=superuser.id
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["title"] for row in rows) == [f"item {i}" for i in range(5)]
+    assert {row["owner_id"] for row in rows} == {str(normal_user.id)}
+    assert rows[0]["description"] == "説明"
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        params={"format": "csv"},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 6
+    assert 'admin, "quoted"' in {row["title"] for row in rows}
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        params={"format": "xml"},
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_read_items_fast_json_matches_default(
+    client: TestClient,
+    normal_user,
+    superuser_token_headers,
+    db: Session,
+    monkeypatch,
+) -> None:
+    for i in range(3):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+
+    responses = {}
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", fast)
+        for path in ("items", "users"):
+            responses[fast, path] = client.get(
+                f"{settings.API_V1_STR}/{path}/",
+                params={"limit": 2},
+                headers=superuser_token_headers,
+            )
+
+    for path in ("items", "users"):
+        default, fast = responses[False, path], responses[True, path]
+        assert fast.status_code == default.status_code == 200
+        assert fast.json() == default.json()
+        # Responseを直接返す場合もページング用のヘッダーが引き継がれる
+        assert fast.headers["X-Next-Cursor"] == default.headers["X-Next-Cursor"]
+
+
+def test_import_items_ndjson_and_csv(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    lines = [json.dumps({"title": f"item {i}", "description": "説明"}) for i in range(5)]
+    lines.insert(2, json.dumps({"description": "no title"}))
+    lines.insert(4, "{broken")
+
+    def body():
+        # 行の途中や複数バイト文字の途中で区切られたチャンクとして送る
+        data = ("\n".join(lines) + "\n").encode()
+        for start in range(0, len(data), 7):
+            yield data[start : start + 7]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        content=body(),
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 5
+    assert result["failed"] == 2
+    assert [error["line"] for error in result["errors"]] == [3, 5]
+    assert result["errors"][0]["errors"] == ["title: Field required"]
+
+    items = crud_item.get_multi_by_owner(db, owner_id=normal_user.id)
+    assert sorted(item.title for item in items) == [f"item {i}" for i in range(5)]
+    assert {item.description for item in items} == {"説明"}
+
+    # エクスポートしたCSVをそのまま取り込める（id と owner_id の列は無視される）
+    exported = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        params={"format": "csv"},
+        headers=normal_user_token_headers,
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        params={"format": "csv"},
+        content=exported.content + b",,,\n",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == 5
+    assert response.json()["errors"][0]["line"] == 7
+    assert len(crud_item.get_multi_by_owner(db, owner_id=normal_user.id)) == 10
+
+
+def test_import_items_caps_error_report(
+    client: TestClient, normal_user_token_headers, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "IMPORT_MAX_ERRORS", 2)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/import",
+        content=b"[]\n" * 5,
+        headers=normal_user_token_headers,
+    )
+    result = response.json()
+    assert result["failed"] == 5
+    assert len(result["errors"]) == 2
+    assert result["errors_truncated"] is True
+
+
+def test_search_items_ranked_and_paged(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    superuser,
+    superuser_token_headers,
+    db: Session,
+) -> None:
+    titles = [
+        ("apple apple apple", "apple pie"),
+        ("apple", None),
+        ("banana", "with apple"),
+        ("banana", None),
+        ("apple tart", "crumble"),
+        ("Apple cider", None),
+    ]
+    for title, description in titles:
+        crud_item.create_with_owner(
+            db,
+            obj_in=ItemCreate(title=title, description=description),
+            owner_id=normal_user.id,
+        )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin apple"), owner_id=superuser.id
+    )
+    # 更新・削除も索引に反映される
+    banana = next(
+        item
+        for item in crud_item.get_multi_by_owner(db, owner_id=normal_user.id)
+        if item.title == "banana" and item.description is None
+    )
+    crud_item.update_by_owner(db, id=banana.id, obj_in=ItemUpdate(title="apple banana"))
+
+    url = f"{settings.API_V1_STR}/items/search"
+    response = client.get(url, params={"q": "apple"}, headers=normal_user_token_headers)
+    assert response.status_code == 200
+    results = [item["title"] for item in response.json()]
+    assert len(results) == 6
+    assert results[0] == "apple apple apple"
+    assert "admin apple" not in results
+
+    # キーセットページングで全件をたどっても重複・欠落がない
+    seen = []
+    params = {"q": "apple", "limit": 2}
+    while True:
+        response = client.get(url, params=params, headers=normal_user_token_headers)
+        assert response.status_code == 200
+        seen.extend(item["title"] for item in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            break
+        params["cursor"] = next_cursor
+    assert seen == results
+
+    response = client.get(
+        url, params={"q": "apple crumble"}, headers=normal_user_token_headers
+    )
+    assert [item["title"] for item in response.json()] == ["apple tart"]
+
+    response = client.get(url, params={"q": "apple"}, headers=superuser_token_headers)
+    assert len(response.json()) == 7
+
+    response = client.get(url, params={"q": "!!"}, headers=normal_user_token_headers)
+    assert response.json() == []
+
+    response = client.get(
+        url, params={"q": "apple", "cursor": "bad"}, headers=normal_user_token_headers
+    )
+    assert response.status_code == 400
+
+
+def test_read_item_conditional_get(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    count_queries,
+    db: Session,
+) -> None:
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="cached"), owner_id=normal_user.id
+    )
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    response = client.get(url, headers=normal_user_token_headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert etag == '"1"'
+
+    with count_queries() as statements:
+        response = client.get(
+            url, headers={**normal_user_token_headers, "If-None-Match": etag}
+        )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    # 所有者とバージョンだけを読む1文で済む
+    assert len(statements) == 1
+    assert "items.title" not in statements[0]
+
+    # 更新するとバージョンが上がり、古いETagでは304にならない
+    response = client.put(
+        url, json={"title": "changed"}, headers=normal_user_token_headers
+    )
+    assert response.headers["ETag"] == '"2"'
+    response = client.get(
+        url, headers={**normal_user_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "changed"
+    assert response.headers["ETag"] == '"2"'
+
+
+def test_read_items_conditional_get(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    items = [
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+        for i in range(3)
+    ]
+    url = f"{settings.API_V1_STR}/items/"
+    params = {"limit": 2}
+    response = client.get(url, params=params, headers=normal_user_token_headers)
+    etag = response.headers["ETag"]
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(
+        url,
+        params=params,
+        headers={**normal_user_token_headers, "If-None-Match": f'W/{etag}, "other"'},
+    )
+    assert response.status_code == 304
+    assert response.headers["X-Next-Cursor"] == next_cursor
+    assert "X-Total-Count" not in response.headers
+
+    # 304でも200と同じく総件数を返す
+    response = client.get(
+        url,
+        params={**params, "count": "exact"},
+        headers={**normal_user_token_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+    assert response.headers["X-Total-Count"] == "3"
+
+    # 一括更新でもバージョンが上がり、一覧のETagが変わる
+    first = min(items, key=lambda item: str(item.id))
+    client.patch(
+        f"{url}bulk",
+        json=[{"id": str(first.id), "title": "bulk"}],
+        headers=normal_user_token_headers,
+    )
+    response = client.get(
+        url, params=params, headers={**normal_user_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_update_item_if_match(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="v1"), owner_id=normal_user.id
+    )
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+
+    response = client.put(
+        url,
+        json={"title": "v2"},
+        headers={**normal_user_token_headers, "If-Match": '"1"'},
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    # 古いバージョンを前提にした更新・削除は412で拒否される
+    response = client.put(
+        url,
+        json={"title": "lost update"},
+        headers={**normal_user_token_headers, "If-Match": '"1"'},
+    )
+    assert response.status_code == 412
+    response = client.delete(
+        url, headers={**normal_user_token_headers, "If-Match": '"1"'}
+    )
+    assert response.status_code == 412
+    response = client.put(
+        url,
+        json={"title": "garbage"},
+        headers={**normal_user_token_headers, "If-Match": "garbage"},
+    )
+    assert response.status_code == 412
+    db.refresh(item)
+    assert (item.title, item.version) == ("v2", 2)
+
+    response = client.delete(
+        url, headers={**normal_user_token_headers, "If-Match": '"2"'}
+    )
+    assert response.status_code == 200
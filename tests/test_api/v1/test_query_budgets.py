@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_item import item as crud_item
+from app.schemas.item import ItemCreate
+
+# エンドポイントごとのSQL文の上限（認証済みユーザーがキャッシュされている状態）。
+# 一覧で関連の遅延読み込みなどが起きると件数に比例して文が増え、ここで失敗する
+BUDGETS = [
+    ("GET", "/items/", 1),
+    ("GET", "/items/{item_id}", 1),
+    ("GET", "/items/search?q=item", 1),
+    ("PUT", "/items/{item_id}", 1),
+    ("GET", "/users/", 1),
+    ("GET", "/users/{user_id}", 1),
+]
+
+
+@pytest.mark.parametrize("method,path,max_queries", BUDGETS)
+def test_endpoint_query_budget(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    query_budget,
+    db: Session,
+    method: str,
+    path: str,
+    max_queries: int,
+) -> None:
+    items = [
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+        for i in range(20)
+    ]
+    url = settings.API_V1_STR + path.format(item_id=items[0].id, user_id=normal_user.id)
+    # 認証ユーザーをキャッシュさせておく
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    with query_budget(max_queries):
+        response = client.request(
+            method, url, headers=normal_user_token_headers, json={"title": "updated"}
+        )
+    assert response.status_code == 200
+
+
+def test_login_query_budget(client: TestClient, normal_user, query_budget) -> None:
+    with query_budget(1):
+        response = client.post(
+            f"{settings.API_V1_STR}/auth/login/access-token",
+            data={"username": normal_user.email, "password": "password"},
+        )
+    assert response.status_code == 200
+
+
+def test_bulk_update_query_budget(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    query_budget,
+    db: Session,
+) -> None:
+    items = crud_item.create_multi_with_owner(
+        db,
+        objs_in=[ItemCreate(title=f"item {i}") for i in range(20)],
+        owner_id=normal_user.id,
+    )
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+    payload = [{"id": str(item.id), "title": "updated"} for item in items[:10]] + [
+        {"id": str(item.id), "title": "updated", "description": "both"}
+        for item in items[10:]
+    ]
+
+    # 所有者の確認・カラムの組み合わせごとのUPDATE（executemany）・再取得
+    with query_budget(4) as statements:
+        response = client.patch(
+            f"{settings.API_V1_STR}/items/bulk",
+            json=payload,
+            headers=normal_user_token_headers,
+        )
+    assert response.status_code == 200
+    assert sum(s.startswith("UPDATE items") for s in statements) == 2
+    db.expire_all()
+    assert {crud_item.get(db, id=item.id).version for item in items} == {2}
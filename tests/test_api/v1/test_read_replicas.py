@@ -0,0 +1,141 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.crud.crud_item import item as crud_item
+from app.db.replicas import ReplicaSet
+from app.db.session import Base
+from app.schemas.item import ItemCreate
+
+
+# プライマリ（テスト用のtest.db）とは別のSQLiteファイルをレプリカとして使う。
+# レプリカへの複製は行わないため、どちらから読んだかを結果の違いで確認できる
+@pytest.fixture
+def replica_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'replica.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas(monkeypatch, replica_engine, normal_user):
+    # 認証で参照するユーザーだけはレプリカにも複製しておく
+    with Session(replica_engine) as replica_db:
+        replica_db.merge(normal_user)
+        replica_db.commit()
+    replica_set = ReplicaSet([replica_engine])
+    monkeypatch.setattr(deps, "read_replicas", replica_set)
+    return replica_set
+
+
+def test_get_endpoints_read_from_replica(
+    client: TestClient, replicas, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="primary only"), owner_id=normal_user.id
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item.id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 404
+
+
+def test_reads_follow_writes_to_primary(
+    client: TestClient, replicas, normal_user_token_headers, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 0.2)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        json={"title": "just written"},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+
+    # 書き込んだ直後は同じクライアントの読み取りをプライマリで処理する
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert [item["title"] for item in response.json()] == ["just written"]
+
+    time.sleep(0.3)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.json() == []
+
+
+def test_unreachable_replica_is_ejected(
+    client: TestClient,
+    monkeypatch,
+    tmp_path,
+    normal_user,
+    normal_user_token_headers,
+    db: Session,
+) -> None:
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="primary"), owner_id=normal_user.id
+    )
+    unreachable = create_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replica_set = ReplicaSet([unreachable], eject_seconds=60)
+    monkeypatch.setattr(deps, "read_replicas", replica_set)
+
+    with pytest.raises(OperationalError):
+        client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+    assert replica_set.healthy() == []
+
+    # 外れている間はプライマリから読む
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert [item["title"] for item in response.json()] == ["primary"]
+
+
+def test_unauthenticated_writes_read_from_primary(
+    client: TestClient, replicas, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 0.2)
+    response = client.post(
+        f"{settings.API_V1_STR}/users/",
+        json={"email": "ryw@example.com", "password": "password"},
+    )
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+
+    # トークンのない書き込みは接続元のアドレスで同じクライアントとみなす
+    response = client.get(f"{settings.API_V1_STR}/users/{user_id}")
+    assert response.status_code == 200
+    assert "etag" in response.headers
+
+    time.sleep(0.3)
+    response = client.get(f"{settings.API_V1_STR}/users/{user_id}")
+    assert response.status_code == 404
+
+
+def test_current_user_is_loaded_from_primary(
+    client: TestClient, replicas, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    # プライマリでだけ無効化する（レプリカには有効な古い行が残っている）
+    normal_user.is_active = False
+    db.add(normal_user)
+    db.commit()
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 400
@@ -29,6 +29,34 @@ def test_get_users(client: TestClient, normal_user, db: Session) -> None:
     assert users[0]["email"] == normal_user.email
 
 
+def test_get_users_total_count(client: TestClient, normal_user, db: Session) -> None:
+    for mode in ("exact", "estimated"):
+        response = client.get(f"{settings.API_V1_STR}/users/", params={"count": mode})
+        assert response.headers["X-Total-Count"] == "1"
+    response = client.get(f"{settings.API_V1_STR}/users/", params={"count": "counter"})
+    assert response.status_code == 422
+
+
+def test_get_users_cursor_pagination(
+    client: TestClient, normal_user, superuser, db: Session
+) -> None:
+    response = client.get(f"{settings.API_V1_STR}/users/", params={"limit": 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    next_cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/", params={"limit": 1, "cursor": next_cursor}
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page) == 1
+    assert {first_page[0]["email"], second_page[0]["email"]} == {
+        normal_user.email,
+        superuser.email,
+    }
+
+
 def test_get_user(client: TestClient, normal_user, db: Session) -> None:
     
     response = client.get(f"{settings.API_V1_STR}/users/{normal_user.id}")
@@ -56,3 +84,36 @@ def test_delete_user(client: TestClient, normal_user, db: Session) -> None:
     # ユーザーが削除されたことを確認
     response = client.get(f"{settings.API_V1_STR}/users/{normal_user.id}")
     assert response.status_code == 404
+
+
+def test_user_etag_and_if_match(client: TestClient, normal_user, db: Session) -> None:
+    url = f"{settings.API_V1_STR}/users/{normal_user.id}"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    response = client.put(
+        url, json={"full_name": "Renamed"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    response = client.put(url, json={"full_name": "Stale"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    response = client.delete(url, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(url).json()["full_name"] == "Renamed"
+
+
+def test_read_users_not_modified_keeps_total_count(
+    client: TestClient, normal_user, db: Session
+) -> None:
+    url = f"{settings.API_V1_STR}/users/"
+    response = client.get(url, params={"count": "exact"})
+    etag, total = response.headers["ETag"], response.headers["X-Total-Count"]
+
+    response = client.get(
+        url, params={"count": "exact"}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["X-Total-Count"] == total
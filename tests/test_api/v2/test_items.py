@@ -0,0 +1,181 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def test_create_and_read_item(
+    client: TestClient, normal_user_token_headers, db: Session
+) -> None:
+    data = {"title": "Async Item", "description": "created through v2"}
+    response = client.post(
+        f"{settings.API_V2_STR}/items/", json=data, headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    created_item = response.json()
+    assert created_item["title"] == data["title"]
+
+    response = client.get(
+        f"{settings.API_V2_STR}/items/{created_item['id']}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["description"] == data["description"]
+
+
+def test_read_items_only_own(
+    client: TestClient, normal_user, normal_user_token_headers, superuser, db: Session
+) -> None:
+    from app.crud.crud_item import item as crud_item
+    from app.schemas.item import ItemCreate
+
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="mine"), owner_id=normal_user.id
+    )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin"), owner_id=superuser.id
+    )
+
+    response = client.get(
+        f"{settings.API_V2_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert [i["title"] for i in response.json()] == ["mine"]
+
+
+def test_update_and_delete_item(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    from app.crud.crud_item import item as crud_item
+    from app.schemas.item import ItemCreate
+
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="before"), owner_id=normal_user.id
+    )
+
+    response = client.put(
+        f"{settings.API_V2_STR}/items/{item.id}",
+        json={"title": "after"},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "after"
+
+    response = client.delete(
+        f"{settings.API_V2_STR}/items/{item.id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    response = client.get(
+        f"{settings.API_V2_STR}/items/{item.id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 404
+
+
+def test_export_items_only_own(
+    client: TestClient, normal_user, normal_user_token_headers, superuser, db: Session
+) -> None:
+    from app.crud.crud_item import item as crud_item
+    from app.schemas.item import ItemCreate
+
+    for i in range(3):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"mine {i}"), owner_id=normal_user.id
+        )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin"), owner_id=superuser.id
+    )
+
+    response = client.get(
+        f"{settings.API_V2_STR}/items/export",
+        params={"format": "csv"},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,title,description,owner_id"
+    assert sorted(line.split(",")[1] for line in lines[1:]) == [
+        "mine 0",
+        "mine 1",
+        "mine 2",
+    ]
+
+
+def test_search_items(
+    client: TestClient, normal_user, normal_user_token_headers, superuser, db: Session
+) -> None:
+    from app.crud.crud_item import item as crud_item
+    from app.schemas.item import ItemCreate
+
+    for title in ("red apple", "green apple", "pear"):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=title), owner_id=normal_user.id
+        )
+    crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="admin apple"), owner_id=superuser.id
+    )
+
+    response = client.get(
+        f"{settings.API_V2_STR}/items/search",
+        params={"q": "apple", "limit": 1},
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first) == 1
+
+    response = client.get(
+        f"{settings.API_V2_STR}/items/search",
+        params={"q": "apple", "cursor": response.headers["X-Next-Cursor"]},
+        headers=normal_user_token_headers,
+    )
+    titles = {item["title"] for item in first + response.json()}
+    assert titles == {"red apple", "green apple"}
+
+
+def test_item_etag_and_if_match(
+    client: TestClient, normal_user_token_headers, db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V2_STR}/items/",
+        json={"title": "etag"},
+        headers=normal_user_token_headers,
+    )
+    url = f"{settings.API_V2_STR}/items/{response.json()['id']}"
+    response = client.get(url, headers=normal_user_token_headers)
+    etag = response.headers["ETag"]
+    response = client.get(
+        url, headers={**normal_user_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    headers = {**normal_user_token_headers, "If-Match": etag}
+    assert client.put(url, json={"title": "new"}, headers=headers).status_code == 200
+    assert client.put(url, json={"title": "old"}, headers=headers).status_code == 412
+    response = client.get(
+        f"{settings.API_V2_STR}/items/",
+        headers={**normal_user_token_headers, "If-None-Match": "*"},
+    )
+    assert response.status_code == 304
+
+
+def test_read_items_query_budget(
+    client: TestClient,
+    normal_user,
+    normal_user_token_headers,
+    query_budget,
+    db: Session,
+) -> None:
+    from app.crud.crud_item import item as crud_item
+    from app.schemas.item import ItemCreate
+
+    for i in range(20):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+    url = f"{settings.API_V2_STR}/items/"
+    client.get(url, headers=normal_user_token_headers)
+
+    with query_budget(1) as statements:
+        response = client.get(url, headers=normal_user_token_headers)
+    assert len(response.json()) == 20
+    assert statements[0].startswith("SELECT")
@@ -0,0 +1,135 @@
+import uuid
+
+import ecdsa
+import pytest
+import rsa
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+from app.core.jwt_keys import load_key_set
+
+
+def _private_pem(algorithm: str) -> bytes:
+    if algorithm == "RS256":
+        # テストを速くするため小さい鍵にする
+        return rsa.newkeys(1024)[1].save_pkcs1()
+    return ecdsa.SigningKey.generate(curve=ecdsa.NIST256p).to_pem()
+
+
+def _public_pem(algorithm: str, private_pem: bytes) -> bytes:
+    if algorithm == "RS256":
+        key = rsa.PrivateKey.load_pkcs1(private_pem)
+        return rsa.PublicKey(key.n, key.e).save_pkcs1()
+    return ecdsa.SigningKey.from_pem(private_pem).get_verifying_key().to_pem()
+
+
+@pytest.fixture
+def key_files(tmp_path):
+    def _key_files(algorithm: str, name: str):
+        private_pem = _private_pem(algorithm)
+        private_path = tmp_path / f"{name}.pem"
+        public_path = tmp_path / f"{name}.pub.pem"
+        private_path.write_bytes(private_pem)
+        public_path.write_bytes(_public_pem(algorithm, private_pem))
+        return str(private_path), str(public_path)
+
+    return _key_files
+
+
+def _use_keys(monkeypatch, algorithm: str, private_key_file: str, public_key_files=()):
+    key_set = load_key_set(
+        settings.model_copy(
+            update={
+                "JWT_ALGORITHM": algorithm,
+                "JWT_PRIVATE_KEY_FILE": private_key_file,
+                "JWT_PUBLIC_KEY_FILES": list(public_key_files),
+            }
+        )
+    )
+    monkeypatch.setattr(security, "_key_set", key_set)
+    return key_set
+
+
+@pytest.mark.parametrize("algorithm", ["RS256", "ES256"])
+def test_asymmetric_tokens_verify_with_jwks(
+    client: TestClient, key_files, monkeypatch, algorithm: str
+) -> None:
+    private_key_file, _ = key_files(algorithm, "current")
+    key_set = _use_keys(monkeypatch, algorithm, private_key_file)
+    user_id = uuid.uuid4()
+    token = security.create_access_token(user_id)
+
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == algorithm
+    assert header["kid"] == key_set.signing_kid
+    assert security.decode_access_token(token).sub == str(user_id)
+
+    # 他のサービスと同じく、公開鍵だけで検証できる
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    jwks = response.json()
+    assert [key["kid"] for key in jwks["keys"]] == [key_set.signing_kid]
+    assert "d" not in jwks["keys"][0]
+    assert jwt.decode(token, jwks, algorithms=[algorithm])["sub"] == str(user_id)
+
+
+def test_rotated_key_still_verifies(key_files, monkeypatch) -> None:
+    old_private, old_public = key_files("ES256", "old")
+    new_private, _ = key_files("ES256", "new")
+    old_keys = _use_keys(monkeypatch, "ES256", old_private)
+    old_token = security.create_access_token(uuid.uuid4())
+
+    new_keys = _use_keys(monkeypatch, "ES256", new_private, [old_public])
+    new_token = security.create_access_token(uuid.uuid4())
+    assert jwt.get_unverified_header(new_token)["kid"] == new_keys.signing_kid
+    assert set(new_keys.verification_keys) == {
+        old_keys.signing_kid,
+        new_keys.signing_kid,
+    }
+    security.decode_access_token(old_token)
+    security.decode_access_token(new_token)
+
+    # 公開鍵を外すと以前の鍵で署名されたトークンは検証できない
+    security.token_cache.clear()
+    _use_keys(monkeypatch, "ES256", new_private)
+    with pytest.raises(jwt.JWTError):
+        security.decode_access_token(old_token)
+    security.decode_access_token(new_token)
+
+
+def test_unknown_key_is_rejected(
+    client: TestClient, key_files, monkeypatch, normal_user
+) -> None:
+    other_private, _ = key_files("ES256", "other")
+    _use_keys(monkeypatch, "ES256", other_private)
+    token = security.create_access_token(normal_user.id)
+
+    current_private, _ = key_files("ES256", "current")
+    _use_keys(monkeypatch, "ES256", current_private)
+    with pytest.raises(jwt.JWTError):
+        security.decode_access_token(token)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+
+def test_jwks_is_cacheable(client: TestClient) -> None:
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    # HS256では共有鍵のため公開する鍵はない
+    assert response.json() == {"keys": []}
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    response = client.get(
+        "/.well-known/jwks.json",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_private_key_is_required() -> None:
+    with pytest.raises(ValueError):
+        load_key_set(settings.model_copy(update={"JWT_ALGORITHM": "RS256"}))
@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.crud.crud_item import item as crud_item
+from app.schemas.item import ItemCreate
+
+
+def test_metrics_endpoint(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    registry.clear()
+    item = crud_item.create_with_owner(
+        db, obj_in=ItemCreate(title="metrics"), owner_id=normal_user.id
+    )
+    for _ in range(2):
+        client.get(
+            f"{settings.API_V1_STR}/items/{item.id}", headers=normal_user_token_headers
+        )
+    client.get("/no-such-path")
+    client.post(
+        f"{settings.API_V1_STR}/auth/login/access-token",
+        data={"username": normal_user.email, "password": "password"},
+    )
+
+    response = client.get(settings.METRICS_PATH)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    # 個々のidではなくルートのテンプレートごとに集計される
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/items/{id}",status="200"} 2.0'
+        in lines
+    )
+    assert (
+        'http_requests_total{method="GET",route="<unmatched>",status="404"} 1.0'
+        in lines
+    )
+    # HELP・TYPE行はサンプルと同じ名前（カウンターは _total 付き）
+    assert "# TYPE http_requests_total counter" in lines
+    assert "# TYPE http_requests counter" not in lines
+    assert "# TYPE jwt_duration_seconds histogram" in lines
+    assert 'password_hash_duration_seconds_count{operation="verify"} 1.0' in lines
+    # アクセストークンとリフレッシュトークン
+    assert 'jwt_duration_seconds_count{operation="encode"} 2.0' in lines
+    assert any(line.startswith('db_pool_checkedout{pool="sync"}') for line in lines)
+    assert any(line.startswith("threadpool_total_tokens ") for line in lines)
@@ -0,0 +1,65 @@
+import uuid
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+from app.core import security
+
+
+def test_decode_access_token_is_cached() -> None:
+    user_id = uuid.uuid4()
+    token = security.create_access_token(user_id)
+
+    assert security.decode_access_token(token).sub == str(user_id)
+    assert security.decode_access_token(token).sub == str(user_id)
+
+    stats = security.token_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_invalid_token_is_negatively_cached(monkeypatch) -> None:
+    with pytest.raises(jwt.JWTError):
+        security.decode_access_token("garbage")
+
+    # 2回目は署名検証を行わずにキャッシュから拒否される
+    def fail(*args, **kwargs):
+        raise AssertionError("jwt.decode should not be called")
+
+    monkeypatch.setattr(jwt, "decode", fail)
+    with pytest.raises(jwt.JWTError):
+        security.decode_access_token("garbage")
+
+
+def test_server_errors_are_not_cached(monkeypatch) -> None:
+    token = security.create_access_token(uuid.uuid4())
+
+    def broken_key_set():
+        raise OSError("key file is not readable")
+
+    # 鍵の読み込みの失敗は不正なトークンとして扱わず、キャッシュもしない
+    monkeypatch.setattr(security, "get_key_set", broken_key_set)
+    with pytest.raises(OSError):
+        security.decode_access_token(token)
+    monkeypatch.undo()
+    assert security.decode_access_token(token).sub
+
+
+def test_invalid_tokens_do_not_evict_valid_tokens(monkeypatch) -> None:
+    monkeypatch.setattr(security.invalid_token_cache, "maxsize", 10)
+    token = security.create_access_token(uuid.uuid4())
+    security.decode_access_token(token)
+
+    for i in range(100):
+        with pytest.raises(jwt.JWTError):
+            security.decode_access_token(f"garbage{i}")
+    assert len(security.invalid_token_cache) == 10
+    security.decode_access_token(token)
+    assert security.token_cache_stats()["hits"] == 1
+
+
+def test_expired_token_is_rejected() -> None:
+    token = security.create_access_token(uuid.uuid4(), timedelta(seconds=-1))
+    with pytest.raises(jwt.ExpiredSignatureError):
+        security.decode_access_token(token)
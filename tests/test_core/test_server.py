@@ -0,0 +1,83 @@
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.db.session import worker_pool_size
+
+ROOT = Path(__file__).parents[2]
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(port: int, **env: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1"]
+        + ["--port", str(port), "--workers", "2"],
+        cwd=ROOT,
+        env=dict(os.environ, TOKEN_REVOCATION_SYNC_SECONDS="0", **env),
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+def _wait_until_ready(url: str, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise AssertionError("server did not start")
+
+
+def test_worker_pool_size() -> None:
+    config = settings.model_copy(update={"DB_MAX_CONNECTIONS": 0})
+    assert worker_pool_size(config, 8) == (config.DB_POOL_SIZE, config.DB_MAX_OVERFLOW)
+
+    # 4ワーカー × 同期・非同期 = 8エンジンで 80 接続を分ける
+    config = settings.model_copy(update={"DB_MAX_CONNECTIONS": 80})
+    assert worker_pool_size(config, 4) == (5, 5)
+    assert worker_pool_size(config, 64) == (1, 0)
+
+
+def test_workers_are_recycled_and_drained() -> None:
+    port = _free_port()
+    server = _start_server(
+        port, SERVER_MAX_REQUESTS="3", SERVER_MAX_REQUESTS_JITTER="0"
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/"
+        _wait_until_ready(url)
+        # 入れ替えの間も他のワーカーが受け付けるため、すべて成功する
+        codes = []
+        for _ in range(12):
+            codes.append(httpx.get(url).status_code)
+            time.sleep(0.2)
+        assert codes == [200] * 12
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=60) == 0
+    workers = set(re.findall(r"Started server process \[(\d+)\]", server.stderr.read()))
+    assert len(workers) > 2
+
+
+def test_startup_failure_stops_server() -> None:
+    # 鍵の設定の誤りはlifespanで検出され、ワーカーを起動し直さずに終了する
+    server = _start_server(_free_port(), JWT_ALGORITHM="RS256")
+    assert server.wait(timeout=60) == 1
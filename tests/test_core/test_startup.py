@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# app.main のimportと lifespan の開始にかかる時間の上限（秒）。実行時間はマシンの
+# 負荷に左右されるため、環境変数で指定した場合だけ確認する（例: 3）
+STARTUP_BUDGET_SECONDS = os.environ.get("STARTUP_BUDGET_SECONDS")
+
+# importしただけでは読み込まないモジュール（lifespan や最初の使用時に読み込む）。
+# python-jose は例外クラス（jose.exceptions）だけをimport時に読み込む
+LAZY_MODULES = ("psycopg2", "asyncpg", "passlib", "jose.jwt", "jose.backends")
+
+ROOT = Path(__file__).parents[2]
+
+_STARTUP_SCRIPT = """
+import asyncio, json, sys, time
+
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+loaded = [name for name in %r if name in sys.modules]
+
+from app.db import session
+
+engine_created = session.engine is not None
+
+
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        pass
+
+
+asyncio.run(start())
+print(json.dumps({
+    "import": imported - started,
+    "startup": time.perf_counter() - started,
+    "loaded": loaded,
+    "engine_created": engine_created,
+}))
+""" % (
+    LAZY_MODULES,
+)
+
+
+def _measure_startup() -> dict:
+    env = dict(os.environ, TOKEN_REVOCATION_SYNC_SECONDS="0")
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_does_not_touch_db_or_crypto() -> None:
+    result = _measure_startup()
+    assert result["loaded"] == []
+    assert result["engine_created"] is False
+
+
+@pytest.mark.skipif(
+    STARTUP_BUDGET_SECONDS is None, reason="STARTUP_BUDGET_SECONDS が未設定"
+)
+def test_startup_within_budget() -> None:
+    budget = float(STARTUP_BUDGET_SECONDS)
+    # 1回目はバイトコードのコンパイルを含むことがあるため、速い方の回で判定する
+    startup = min(_measure_startup()["startup"] for _ in range(2))
+    assert startup < budget, (
+        f"起動に{startup:.2f}秒かかりました（上限{budget}秒）。"
+        "python scripts/import_profile.py で内訳を確認してください"
+    )
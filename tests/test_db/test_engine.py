@@ -0,0 +1,117 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import Settings
+from app.db.pool import (
+    InstrumentedAsyncQueuePool,
+    InstrumentedQueuePool,
+    install_idle_pre_ping,
+)
+from app.db.session import engine_options, make_async_engine, make_engine
+
+
+def _settings(**values) -> Settings:
+    return Settings(_env_file=None, **values)
+
+
+def test_pool_settings_reach_engines() -> None:
+    config = _settings(
+        DB_POOL_SIZE=3,
+        DB_MAX_OVERFLOW=4,
+        DB_POOL_TIMEOUT=2.5,
+        DB_POOL_RECYCLE=60,
+        DB_POOL_PRE_PING="always",
+    )
+    sync_engine = make_engine(config)
+    async_engine = make_async_engine(config)
+    for engine_, pool_class in (
+        (sync_engine, InstrumentedQueuePool),
+        (async_engine.sync_engine, InstrumentedAsyncQueuePool),
+    ):
+        pool = engine_.pool
+        assert type(pool) is pool_class
+        assert pool.size() == 3
+        assert pool._max_overflow == 4
+        assert pool._timeout == 2.5
+        assert pool._recycle == 60
+        assert pool._pre_ping is True
+    sync_engine.dispose()
+
+
+def test_timeouts_are_sent_as_connection_parameters() -> None:
+    config = _settings(
+        DB_STATEMENT_TIMEOUT_MS=5000, DB_IDLE_IN_TRANSACTION_TIMEOUT_MS=0
+    )
+
+    sync_options = engine_options(
+        config, config.SQLALCHEMY_DATABASE_URI, is_async=False
+    )
+    assert sync_options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    async_options = engine_options(
+        config, config.SQLALCHEMY_ASYNC_DATABASE_URI, is_async=True
+    )
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": "5000"}
+    }
+
+    # PostgreSQL以外（テスト用のSQLiteなど）には渡さない
+    assert "connect_args" not in engine_options(config, "sqlite://", is_async=False)
+
+
+def test_pgbouncer_mode_uses_null_pool_without_session_state() -> None:
+    config = _settings(DB_PGBOUNCER=True, DB_STATEMENT_TIMEOUT_MS=5000)
+
+    sync_options = engine_options(
+        config, config.SQLALCHEMY_DATABASE_URI, is_async=False
+    )
+    assert sync_options["poolclass"] is NullPool
+    assert "pool_size" not in sync_options
+    assert "connect_args" not in sync_options
+
+    async_options = engine_options(
+        config, config.SQLALCHEMY_ASYNC_DATABASE_URI, is_async=True
+    )
+    assert async_options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+    }
+
+    async_engine = make_async_engine(config)
+    assert isinstance(async_engine.sync_engine.pool, NullPool)
+
+
+def test_idle_pre_ping_only_checks_idle_connections(monkeypatch) -> None:
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool)
+    pings = []
+    monkeypatch.setattr(engine.dialect, "do_ping", lambda conn: pings.append(conn))
+
+    install_idle_pre_ping(engine, idle_seconds=3600)
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert pings == []
+
+    install_idle_pre_ping(engine, idle_seconds=0)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert len(pings) == 1
+    engine.dispose()
+
+
+def test_idle_pre_ping_replaces_dead_connection(monkeypatch) -> None:
+    engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool)
+    install_idle_pre_ping(engine, idle_seconds=0)
+    with engine.connect() as conn:
+        first = conn.connection.dbapi_connection
+
+    def ping(dbapi_connection):
+        if dbapi_connection is first:
+            raise engine.dialect.dbapi.OperationalError("server closed the connection")
+        return True
+
+    monkeypatch.setattr(engine.dialect, "do_ping", ping)
+    with engine.connect() as conn:
+        assert conn.connection.dbapi_connection is not first
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
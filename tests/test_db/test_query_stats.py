@@ -0,0 +1,54 @@
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_item import item as crud_item
+from app.db.query_stats import track_queries
+from app.middleware.query_stats import QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from app.models.item import Item
+from app.schemas.item import ItemCreate
+
+
+def test_repeated_statement_warns_with_stack(
+    normal_user, monkeypatch, caplog, db: Session
+) -> None:
+    monkeypatch.setattr(settings, "QUERY_REPEAT_WARNING_THRESHOLD", 3)
+    for i in range(5):
+        crud_item.create_with_owner(
+            db, obj_in=ItemCreate(title=f"item {i}"), owner_id=normal_user.id
+        )
+    db.expunge_all()
+
+    with caplog.at_level(logging.WARNING, logger="app.db.query_stats"):
+        with track_queries() as stats:
+            # 典型的なN+1: 一覧を取得してから関連（owner）を1件ずつ遅延読み込みする
+            for item in db.scalars(select(Item)).all():
+                db.expire(item, ["owner"])
+                item.owner
+                db.expunge(item.owner)
+
+    assert stats.count == 6
+    assert stats.duration > 0
+    warnings = [r for r in caplog.records if "N+1" in r.getMessage()]
+    assert len(warnings) == 1
+    assert "test_repeated_statement_warns_with_stack" in warnings[0].getMessage()
+
+
+def test_debug_query_headers(
+    client: TestClient, normal_user_token_headers, monkeypatch
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert QUERY_COUNT_HEADER not in response.headers
+
+    monkeypatch.setattr(settings, "DEBUG", True)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    # 認証ユーザーはキャッシュ済みのため、一覧の1文だけ
+    assert response.headers[QUERY_COUNT_HEADER] == "1"
+    assert float(response.headers[QUERY_TIME_HEADER]) >= 0
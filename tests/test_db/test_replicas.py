@@ -0,0 +1,39 @@
+from sqlalchemy import create_engine
+
+from app.db.replicas import ReplicaSet
+
+
+def _replica_set(count: int, **kwargs) -> ReplicaSet:
+    return ReplicaSet([create_engine("sqlite://") for _ in range(count)], **kwargs)
+
+
+def test_round_robin() -> None:
+    replicas = _replica_set(3)
+    chosen = []
+    for _ in range(6):
+        replica = replicas.checkout()
+        chosen.append(replica.name)
+        replicas.release(replica)
+    assert chosen == ["replica0", "replica1", "replica2"] * 2
+
+
+def test_least_connections() -> None:
+    replicas = _replica_set(2, strategy="least_connections")
+    first = replicas.checkout()
+    second = replicas.checkout()
+    assert first is not second
+    replicas.release(first)
+    assert replicas.checkout() is first
+
+
+def test_ejected_replica_returns_after_timeout() -> None:
+    replicas = _replica_set(2, eject_seconds=10)
+    ejected = replicas.replicas[0]
+    replicas.eject(ejected)
+    assert all(replicas.checkout() is not ejected for _ in range(4))
+
+    replicas.eject(replicas.replicas[1])
+    assert replicas.checkout() is None
+
+    ejected.ejected_until = 0.0
+    assert replicas.checkout() is ejected
@@ -0,0 +1,60 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_user import user as crud_user
+from app.services.principal import principal_cache
+
+
+def test_principal_is_cached(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    for _ in range(3):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+        )
+        assert response.status_code == 200
+
+    stats = principal_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_deactivation_invalidates_principal(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert principal_cache.get(normal_user.id) is not None
+
+    crud_user.update(db, db_obj=normal_user, obj_in={"is_active": False})
+    assert principal_cache.get(normal_user.id) is None
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 400
+
+
+def test_unrelated_update_keeps_principal(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    crud_user.update(db, db_obj=normal_user, obj_in={"full_name": "Renamed"})
+    assert principal_cache.get(normal_user.id) is not None
+
+
+def test_remove_invalidates_principal(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    client.get(f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers)
+
+    crud_user.remove(db, id=normal_user.id)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 404
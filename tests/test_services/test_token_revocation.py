@@ -0,0 +1,76 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.services import token_revocation
+from app.utils.revocation import RevocationSet
+
+
+def test_revocation_set_add_and_prune() -> None:
+    revoked = RevocationSet(capacity=4)
+    now = time.time()
+    ids = [uuid.uuid4().hex for _ in range(10)]
+    for i, id in enumerate(ids):
+        # 半分はすぐに期限が切れる
+        assert revoked.add(id, now + (1 if i % 2 else 3600))
+    assert not revoked.add(ids[0], now + 3600)
+    assert not revoked.add("expired", now - 1)
+
+    # 想定の件数を超えるとフィルターを大きくして作り直す
+    assert revoked.stats()["bloom_capacity"] >= 10
+    assert all(id in revoked for id in ids)
+    assert uuid.uuid4().hex not in revoked
+
+    assert revoked.prune(now + 2) == 5
+    assert len(revoked) == 5
+    assert [id in revoked for id in ids] == [i % 2 == 0 for i in range(10)]
+
+    more = [uuid.uuid4().hex for _ in range(20)]
+    assert revoked.update((id, now + 3600) for id in more + ids[::2]) == 20
+    assert len(revoked) == 25
+    assert all(id in revoked for id in more)
+
+
+def test_revocation_set_prunes_incrementally() -> None:
+    revoked = RevocationSet(capacity=1000)
+    now = time.time()
+    ids = [uuid.uuid4().hex for _ in range(20_000)]
+    # 1秒ごとに100件ずつ期限が切れる
+    revoked.update((id, now + 1 + i // 100) for i, id in enumerate(ids))
+    rebuilds = revoked.stats()["rebuilds"]
+
+    # 同期のたびに一部が期限切れになり、新しい失効が加わる状態を繰り返す
+    for step in range(50):
+        assert revoked.prune(now + 1 + step) == 100
+        revoked.update((uuid.uuid4().hex, now + 3600) for _ in range(100))
+    assert len(revoked) == 20_000
+    # 期限切れのたびにフィルターを作り直さない
+    assert revoked.stats()["rebuilds"] == rebuilds
+    assert revoked.stats()["stale"] == 5000
+    assert ids[0] not in revoked
+    assert ids[-1] in revoked
+
+    # 期限切れの割合が閾値を超えたら作り直す
+    revoked.prune(now + 200)
+    assert revoked.stats()["rebuilds"] == rebuilds + 1
+    assert revoked.stats()["stale"] == 0
+    assert len(revoked) == 5000
+
+
+def test_sync_loads_revocations_from_other_workers(db: Session) -> None:
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=15)
+    first, second = uuid.uuid4().hex, uuid.uuid4().hex
+
+    # 他のワーカーでの失効（このプロセスの集合には追加されない）
+    crud.token_revocation.revoke(db, jti=first, expires_at=expires_at)
+    assert not token_revocation.is_revoked(first)
+    assert token_revocation.sync(db) == 1
+    assert token_revocation.is_revoked(first)
+
+    crud.token_revocation.revoke(db, jti=second, expires_at=expires_at)
+    assert token_revocation.sync(db) == 1
+    assert token_revocation.is_revoked(second)
+    assert token_revocation.sync(db) == 0
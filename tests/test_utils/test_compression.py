@@ -0,0 +1,133 @@
+import gzip
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_item import item as crud_item
+from app.middleware.compression import CompressionMiddleware
+from app.schemas.item import ItemCreate
+from app.utils.compression import make_compressor, negotiate_encoding
+
+BODY = "compressible text " * 200
+
+
+def test_negotiate_encoding() -> None:
+    encodings = ["br", "zstd", "gzip"]
+    assert negotiate_encoding("gzip, deflate", encodings) == "gzip"
+    # q値が同じならサーバーの優先順、異なればq値の大きいもの
+    assert negotiate_encoding("gzip, br", encodings) == "br"
+    assert negotiate_encoding("br;q=0.5, gzip", encodings) == "gzip"
+    assert negotiate_encoding("gzip;q=0, identity", encodings) is None
+    assert negotiate_encoding("*", encodings) == "br"
+    assert negotiate_encoding("*, br;q=0", encodings) == "zstd"
+    assert negotiate_encoding(None, encodings) is None
+
+
+def test_streaming_compressor_flushes_each_chunk() -> None:
+    compressor = make_compressor("gzip", 6)
+    decompressor = zlib.decompressobj(31)
+    first = compressor.compress(b"first chunk ")
+    # 最後まで待たずに、それまでの入力を復元できる
+    assert decompressor.decompress(first) == b"first chunk "
+    rest = compressor.finish(b"last chunk")
+    assert decompressor.decompress(rest) == b"last chunk"
+    assert decompressor.eof
+
+
+def _app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/text")
+    def text(size: int = len(BODY)):
+        return PlainTextResponse(BODY[:size], headers={"ETag": '"1"'})
+
+    @app.get("/fast")
+    def fast():
+        return PlainTextResponse(BODY)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (f"line {i}\n".encode() for i in range(1000)),
+            media_type="application/x-ndjson",
+        )
+
+    @app.get("/image")
+    def image():
+        return PlainTextResponse(BODY, media_type="image/png")
+
+    app.add_middleware(CompressionMiddleware, **options)
+    return app
+
+
+def _get(client: TestClient, path: str, accept_encoding: str = "gzip"):
+    # 本文を自動で展開させずに、圧縮されたバイト列を確かめる
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as r:
+        return r, b"".join(r.iter_raw())
+
+
+def test_middleware_compresses_by_size_and_type() -> None:
+    client = TestClient(_app(minimum_size=100, encodings=["gzip"]))
+
+    response, body = _get(client, "/text")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"1"'
+    assert int(response.headers["Content-Length"]) == len(body)
+    assert gzip.decompress(body).decode() == BODY
+
+    response, body = _get(client, "/text?size=50")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert body.decode() == BODY[:50]
+
+    response, body = _get(client, "/text", accept_encoding="identity")
+    assert "Content-Encoding" not in response.headers
+    assert body.decode() == BODY
+
+    response, _ = _get(client, "/image")
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
+
+
+def test_middleware_compresses_streaming_responses() -> None:
+    client = TestClient(_app(minimum_size=100, encodings=["gzip"]))
+    response, body = _get(client, "/stream")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    lines = b"".join(f"line {i}\n".encode() for i in range(1000))
+    assert gzip.decompress(body) == lines
+
+
+def test_middleware_route_levels() -> None:
+    client = TestClient(
+        _app(minimum_size=100, level=9, route_levels={"/fast": 1}, encodings=["gzip"])
+    )
+    _, best = _get(client, "/text")
+    _, fast = _get(client, "/fast")
+    # gzipのヘッダーの圧縮レベルのフラグ（XFL）: 2 = 最大、4 = 最速
+    assert best[8] == 2
+    assert fast[8] == 4
+    assert gzip.decompress(fast).decode() == BODY
+
+
+def test_item_list_is_compressed(
+    client: TestClient, normal_user, normal_user_token_headers, db: Session
+) -> None:
+    for i in range(20):
+        crud_item.create_with_owner(
+            db,
+            obj_in=ItemCreate(title=f"item {i}", description="description " * 20),
+            owner_id=normal_user.id,
+        )
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers={**normal_user_token_headers, "Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.json()) == 20
@@ -0,0 +1,28 @@
+from app.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_render_prometheus_text() -> None:
+    registry = Registry()
+    requests = registry.register(Counter("requests", "Requests.", ("route",)))
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    )
+    registry.register(Gauge("pool_size", "Pool size.", collect=lambda: {(): 5}))
+
+    requests.inc("/items/{id}")
+    requests.inc("/items/{id}")
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/")
+
+    lines = registry.render().splitlines()
+    # HELP・TYPE行はサンプルと同じ _total 付きの名前
+    assert "# HELP requests_total Requests." in lines
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/items/{id}"} 2.0' in lines
+    # バケットは累積で、境界値ちょうどの観測値はそのバケットに含まれる
+    assert 'latency_seconds_bucket{route="/",le="0.1"} 2.0' in lines
+    assert 'latency_seconds_bucket{route="/",le="1.0"} 3.0' in lines
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 4.0' in lines
+    assert 'latency_seconds_sum{route="/"} 3.65' in lines
+    assert 'latency_seconds_count{route="/"} 4.0' in lines
+    assert "pool_size 5.0" in lines
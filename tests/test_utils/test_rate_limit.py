@@ -0,0 +1,61 @@
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings
+from app.utils import rate_limit
+from app.utils.rate_limit import InMemoryTokenBuckets, TokenBucketLimiter
+
+
+def test_token_bucket_refill_and_sweep(monkeypatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    buckets = InMemoryTokenBuckets(maxsize=100, shards=4)
+    limiter = TokenBucketLimiter(capacity=2, per_second=0.5, backend=buckets)
+
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == 0
+    # 空になったら次の1つが貯まるまで（1 / 0.5 = 2秒）待つ
+    assert limiter.hit("a") == 2.0
+    assert limiter.hit("b") == 0
+
+    now[0] += 2
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") > 0
+
+    # 満杯に戻ったバケットは次のスイープで削除される
+    now[0] += 10
+    limiter.hit("c")
+    for key in ("a", "b"):
+        buckets.take(key, 2, 0.5)
+    assert len(buckets) == 3
+    now[0] += 10
+    for shard in buckets._shards:
+        buckets._sweep(shard.buckets, now[0])
+    assert len(buckets) == 0
+
+
+def test_token_bucket_bounded() -> None:
+    buckets = InMemoryTokenBuckets(maxsize=8, shards=2)
+    limiter = TokenBucketLimiter(capacity=1, per_second=0.001, backend=buckets)
+    for i in range(100):
+        limiter.hit(str(i))
+    assert len(buckets) <= 8
+
+
+def test_token_bucket_disabled() -> None:
+    buckets = InMemoryTokenBuckets(maxsize=8)
+    limiter = TokenBucketLimiter(capacity=0, per_second=1, backend=buckets)
+    assert all(limiter.hit("a") == 0 for _ in range(10))
+    assert len(buckets) == 0
+
+
+def test_zero_refill_rate_is_rejected(monkeypatch) -> None:
+    buckets = InMemoryTokenBuckets(maxsize=100)
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(capacity=2, per_second=0, backend=buckets)
+    # 制限しない場合は回復の速さを使わない
+    assert TokenBucketLimiter(capacity=0, per_second=0, backend=buckets).hit("a") == 0
+
+    monkeypatch.setenv("LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE", "0")
+    with pytest.raises(ValidationError):
+        Settings()
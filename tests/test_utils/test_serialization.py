@@ -0,0 +1,28 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+from app.schemas.user import User
+from app.utils.serialization import ListSerializer
+
+
+def test_trusted_dump_matches_validated_dump() -> None:
+    serializer = ListSerializer(User)
+    rows = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            email=f"user{i}@example.com",
+            is_active=True,
+            is_superuser=False,
+            full_name=None,
+            # スキーマにない属性（ハッシュ化されたパスワードなど）は出力されない
+            hashed_password="secret",
+        )
+        for i in range(3)
+    ]
+
+    trusted = json.loads(serializer.dump_json(rows, trusted=True))
+    validated = json.loads(serializer.dump_json(rows))
+    assert trusted == validated
+    assert "hashed_password" not in trusted[0]
+    assert trusted[0]["id"] == str(rows[0].id)